@@ -0,0 +1,440 @@
+"""
+Offline BM25 search over a local snapshot of the Python docs and PEPs.
+
+Build once from a directory of .txt/.rst/.md/.html files (for example the
+plain-text docs archive from https://docs.python.org/3/download.html plus a
+checkout of the PEPs repository):
+
+    python TeachingDocsIndex.py build path/to/python-docs-text --index-dir docs_index
+    python TeachingDocsIndex.py query "list comprehension"
+
+Files are split into passages at paragraph boundaries. Each build writes a
+new generation directory (``gen-<id>``) holding:
+
+- ``postings.bin``  little-endian uint32 passage ids, grouped by term and
+  memory-mapped at query time
+- ``impacts.bin``   the matching little-endian float32 BM25 term-frequency
+  parts (everything but the idf), precomputed so a query only multiplies
+  and adds
+- ``lexicon.json``  term -> [offset, document frequency] into both files
+- ``passages.json`` passage titles, links, snippets and lengths
+
+Next to the generations, the index directory holds:
+
+- ``manifest.json`` per-file mtime/size and cached term frequencies, so a
+  rebuild only re-reads files that changed
+- ``CURRENT``       the name of the live generation
+
+A generation's files never change once written; a build publishes its
+generation by atomically replacing ``CURRENT``, so a reader always pairs a
+lexicon with the postings it was built with. The generation before the live
+one is kept for readers that are still loading it; older ones are removed.
+"""
+import argparse
+import heapq
+import html
+from operator import itemgetter
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_INDEX_DIR = BASE_DIR / "docs_index"
+DEFAULT_BASE_URL = "https://docs.python.org/3"
+PEPS_BASE_URL = "https://peps.python.org"
+DOC_SUFFIXES = {".txt", ".rst", ".md", ".html", ".htm"}
+PASSAGE_WORDS = 180
+SNIPPET_CHARS = 300
+INDEX_VERSION = 2
+GENERATION_PREFIX = "gen-"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r"[a-z0-9_]+")
+_TAG = re.compile(r"<(script|style)\b.*?</\1>|<[^>]+>", re.DOTALL | re.IGNORECASE)
+_PEP_NAME = re.compile(r"pep-(\d{4})")
+_RST_UNDERLINE = re.compile(r"^([=\-~^*#\"'`+])\1{2,}\s*$")
+
+STOPWORDS = frozenset("""
+a an the is are was were be been to of in on at for with by from into as and or but if then than so
+that this these those it its what how why when where which who can do does i you your me my we our
+""".split())
+
+
+def tokenize(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+# -----------------------------
+#  Building
+# -----------------------------
+def _read_text(path):
+    text = path.read_text(encoding="utf-8", errors="replace")
+    if path.suffix.lower() in (".html", ".htm"):
+        text = html.unescape(_TAG.sub(" ", text))
+    return text
+
+
+def _doc_link(rel_path, base_url):
+    stem = rel_path.rsplit(".", 1)[0]
+    pep = _PEP_NAME.search(stem)
+    if pep:
+        return f"{PEPS_BASE_URL}/pep-{pep.group(1)}/"
+    return f"{base_url.rstrip('/')}/{stem}.html"
+
+
+def _passages(text):
+    """Split a document into (heading, passage text) pairs of roughly PASSAGE_WORDS words."""
+    heading = ""
+    current = []
+    words = 0
+    lines = text.splitlines()
+    paragraphs = []
+    para = []
+    for i, line in enumerate(lines):
+        # RST/plain-text headings are a line followed by an underline of punctuation
+        if i + 1 < len(lines) and line.strip() and _RST_UNDERLINE.match(lines[i + 1]) \
+                and len(lines[i + 1].strip()) >= len(line.strip()):
+            if para:
+                paragraphs.append((heading, " ".join(para)))
+                para = []
+            heading = line.strip()
+            continue
+        if _RST_UNDERLINE.match(line):
+            continue
+        if line.strip().startswith("#") and not para:
+            heading = line.strip("# \t")
+            continue
+        if line.strip():
+            para.append(line.strip())
+        elif para:
+            paragraphs.append((heading, " ".join(para)))
+            para = []
+    if para:
+        paragraphs.append((heading, " ".join(para)))
+
+    current_heading = None
+    for heading, para_text in paragraphs:
+        if current and (heading != current_heading or words >= PASSAGE_WORDS):
+            yield current_heading, " ".join(current)
+            current, words = [], 0
+        current_heading = heading
+        current.append(para_text)
+        words += para_text.count(" ") + 1
+    if current:
+        yield current_heading, " ".join(current)
+
+
+def _index_file(path, rel_path, base_url):
+    text = _read_text(path)
+    doc_title = next((line.strip() for line in text.splitlines() if line.strip()), rel_path)[:120]
+    link = _doc_link(rel_path, base_url)
+    passages = []
+    for heading, passage in _passages(text):
+        tokens = tokenize(passage)
+        if not tokens:
+            continue
+        title = f"{doc_title} - {heading}" if heading and heading != doc_title else doc_title
+        passages.append({
+            "title": title,
+            "link": link,
+            "snippet": passage[:SNIPPET_CHARS],
+            "length": len(tokens),
+            "tf": dict(Counter(tokens)),
+        })
+    return passages
+
+
+def _write_atomic(path, data, binary=False):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb" if binary else "w", **({} if binary else {"encoding": "utf-8"})) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def current_generation(index_dir):
+    """The live generation directory named by CURRENT, or None when no index was built."""
+    try:
+        name = (Path(index_dir) / "CURRENT").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return Path(index_dir) / name if name else None
+
+
+def build_index(docs_dir, index_dir=DEFAULT_INDEX_DIR, base_url=DEFAULT_BASE_URL):
+    """
+    (Re)build the index for docs_dir. Files whose mtime and size are unchanged
+    since the last build reuse their cached passages. Returns build stats.
+    """
+    docs_dir = Path(docs_dir)
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = index_dir / "manifest.json"
+
+    previous = {}
+    if manifest_path.exists():
+        try:
+            old = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if old.get("version") == INDEX_VERSION and old.get("base_url") == base_url:
+                previous = old.get("files", {})
+        except (OSError, ValueError):
+            previous = {}
+
+    files = {}
+    reused = reindexed = 0
+    for path in sorted(docs_dir.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in DOC_SUFFIXES:
+            continue
+        rel_path = path.relative_to(docs_dir).as_posix()
+        stat = path.stat()
+        cached = previous.get(rel_path)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            files[rel_path] = cached
+            reused += 1
+            continue
+        files[rel_path] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "passages": _index_file(path, rel_path, base_url),
+        }
+        reindexed += 1
+
+    # Lay out postings grouped by term so each term is one contiguous slice
+    passages = []
+    term_postings = {}
+    for rel_path in sorted(files):
+        for passage in files[rel_path]["passages"]:
+            passage_id = len(passages)
+            passages.append({k: passage[k] for k in ("title", "link", "snippet", "length")})
+            for term, tf in passage["tf"].items():
+                term_postings.setdefault(term, []).append((passage_id, tf))
+
+    total_length = sum(p["length"] for p in passages)
+    avg_length = total_length / len(passages) if passages else 0.0
+    length_norms = [BM25_K1 * (1 - BM25_B + BM25_B * p["length"] / avg_length) for p in passages]
+    postings = array("I")
+    impacts = array("f")
+    lexicon = {}
+    for term in sorted(term_postings):
+        entries = term_postings[term]
+        lexicon[term] = [len(postings), len(entries)]
+        for passage_id, tf in entries:
+            postings.append(passage_id)
+            impacts.append(tf * (BM25_K1 + 1) / (tf + length_norms[passage_id]))
+    if sys.byteorder != "little":
+        postings.byteswap()
+        impacts.byteswap()
+
+    # A fresh directory per build: nothing a reader may have open is ever rewritten
+    previous_generation = current_generation(index_dir)
+    generation = index_dir / f"{GENERATION_PREFIX}{time.time_ns()}"
+    generation.mkdir()
+    (generation / "postings.bin").write_bytes(postings.tobytes())
+    (generation / "impacts.bin").write_bytes(impacts.tobytes())
+    (generation / "lexicon.json").write_text(json.dumps(lexicon, separators=(",", ":")), encoding="utf-8")
+    (generation / "passages.json").write_text(json.dumps({
+        "avg_length": avg_length,
+        "passages": passages,
+    }, separators=(",", ":")), encoding="utf-8")
+    _write_atomic(manifest_path, json.dumps({
+        "version": INDEX_VERSION,
+        "base_url": base_url,
+        "built_at": time.time(),
+        "generation": generation.name,
+        "files": files,
+    }, separators=(",", ":")))
+    # CURRENT last: it publishes the complete generation
+    _write_atomic(index_dir / "CURRENT", generation.name)
+
+    keep = {generation.name, previous_generation.name if previous_generation else None}
+    for old in index_dir.glob(GENERATION_PREFIX + "*"):
+        if old.name not in keep:
+            # Fails harmlessly on Windows while a reader still has it mapped
+            shutil.rmtree(old, ignore_errors=True)
+    for name in ("postings.bin", "lexicon.json", "passages.json"):
+        # Version 1 kept these at the top level
+        (index_dir / name).unlink(missing_ok=True)
+    return {"files": len(files), "reused": reused, "reindexed": reindexed,
+            "passages": len(passages), "terms": len(lexicon)}
+
+
+# -----------------------------
+#  Querying
+# -----------------------------
+class DocsIndex:
+    """
+    Read-only BM25 index over memory-mapped postings, loaded from one
+    generation (the live one by default).
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, generation=None):
+        self.index_dir = Path(index_dir)
+        generation = Path(generation) if generation else current_generation(self.index_dir)
+        if generation is None:
+            raise FileNotFoundError(f"no docs index in {self.index_dir}")
+        self.generation = generation.name
+        self.lexicon = json.loads((generation / "lexicon.json").read_text(encoding="utf-8"))
+        meta = json.loads((generation / "passages.json").read_text(encoding="utf-8"))
+        self.passages = meta["passages"]
+        self.avg_length = meta["avg_length"] or 1.0
+        self._mapped = []
+        self._postings = self._map(generation / "postings.bin", "I")
+        self._impacts = self._map(generation / "impacts.bin", "f")
+        self._lock = threading.Lock()
+        self._searches = 0
+        self._boosts = {}
+        self.closed = False
+
+    def _boosted(self, boost_prefixes):
+        """Ids of the passages whose link contains one of ``boost_prefixes``; a generation never changes, so cached."""
+        boosted = self._boosts.get(boost_prefixes)
+        if boosted is None:
+            boosted = frozenset(passage_id for passage_id, passage in enumerate(self.passages)
+                                if any(prefix in passage["link"] for prefix in boost_prefixes))
+            self._boosts[boost_prefixes] = boosted
+        return boosted
+
+    def _map(self, path, typecode):
+        f = open(path, "rb")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+        view = memoryview(data if data is not None else b"").cast(typecode)
+        self._mapped.append((f, data, view))
+        return view
+
+    def close(self):
+        """Unmap the postings and close their files, once searches still running on them are done."""
+        with self._lock:
+            self.closed = True
+            if self._searches:
+                return
+        self._release()
+
+    def _release(self):
+        for f, data, view in self._mapped:
+            view.release()
+            if data is not None:
+                data.close()
+            f.close()
+
+    def search(self, query, limit=5, boost_prefixes=()):
+        """Return up to ``limit`` passages as {title, link, snippet, score} dicts."""
+        with self._lock:
+            closed = self.closed
+            if not closed:
+                self._searches += 1
+        if closed:
+            # Replaced by a rebuild after the caller got hold of it: ask the live index
+            index = get_docs_index(self.index_dir)
+            return index.search(query, limit, boost_prefixes) if index is not None and index is not self else []
+        try:
+            return self._search(query, limit, boost_prefixes)
+        finally:
+            with self._lock:
+                self._searches -= 1
+                release = self.closed and not self._searches
+            if release:
+                self._release()
+
+    def _search(self, query, limit, boost_prefixes):
+        n = len(self.passages)
+        if not n:
+            return []
+        terms = []
+        for term in set(tokenize(query)):
+            entry = self.lexicon.get(term)
+            if entry is not None:
+                offset, df = entry
+                terms.append((offset, df, math.log(1 + (n - df + 0.5) / (df + 0.5))))
+        ids, impacts = self._postings, self._impacts
+        boosted = self._boosted(tuple(boost_prefixes)) if boost_prefixes else ()
+        if sum(df for _, df, _ in terms) * 8 < n:
+            scores = {}
+            get = scores.get
+            for offset, df, idf in terms:
+                for passage_id, impact in zip(ids[offset:offset + df], impacts[offset:offset + df]):
+                    scores[passage_id] = get(passage_id, 0.0) + idf * impact
+            for passage_id in scores:
+                if passage_id in boosted:
+                    scores[passage_id] *= 1.2
+            best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        else:
+            # Common words touch most passages: a flat list is cheaper than a dict
+            dense = [0.0] * n
+            for offset, df, idf in terms:
+                for passage_id, impact in zip(ids[offset:offset + df], impacts[offset:offset + df]):
+                    dense[passage_id] += idf * impact
+            for passage_id in boosted:
+                dense[passage_id] *= 1.2
+            best = [(passage_id, dense[passage_id])
+                    for passage_id in heapq.nlargest(limit, range(n), key=dense.__getitem__) if dense[passage_id]]
+        return [
+            {"title": self.passages[pid]["title"], "link": self.passages[pid]["link"],
+             "snippet": self.passages[pid]["snippet"], "score": round(score, 3)}
+            for pid, score in best
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_docs_index(index_dir=None):
+    """
+    Shared DocsIndex for index_dir (PYTHONAUT_DOCS_INDEX by default). After a
+    rebuild the new generation is loaded and the replaced index is closed.
+    """
+    global _index
+    index_dir = Path(index_dir or os.getenv("PYTHONAUT_DOCS_INDEX", str(DEFAULT_INDEX_DIR)))
+    generation = current_generation(index_dir)
+    if generation is None:
+        return None
+    with _index_lock:
+        if _index is None or _index.index_dir != index_dir or _index.generation != generation.name:
+            replaced, _index = _index, DocsIndex(index_dir, generation)
+            if replaced is not None:
+                replaced.close()
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the local Python docs index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="(re)build the index from a docs snapshot")
+    build.add_argument("docs_dir")
+    build.add_argument("--index-dir", default=str(DEFAULT_INDEX_DIR))
+    build.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    query = sub.add_parser("query", help="run a search against the index")
+    query.add_argument("text")
+    query.add_argument("--index-dir", default=str(DEFAULT_INDEX_DIR))
+    query.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        stats = build_index(args.docs_dir, args.index_dir, args.base_url)
+        print(f"Indexed {stats['passages']} passages / {stats['terms']} terms from {stats['files']} files "
+              f"({stats['reindexed']} re-read, {stats['reused']} unchanged) "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        index = DocsIndex(args.index_dir)
+        start = time.perf_counter()
+        results = index.search(args.text, limit=args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(f"{result['score']:>7.3f}  {result['title']}\n         {result['link']}")
+        print(f"{len(results)} results in {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,130 @@
 from crewai.tools import tool
-from langchain_community.tools import DuckDuckGoSearchResults
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from TeachingDocsIndex import get_docs_index
+from TutorTracing import span
+import importlib.util
+import os
 import re
+import threading
+import time
+
+# DuckDuckGo (via langchain_community) is optional and only imported on the first web search
+DUCKDUCKGO_AVAILABLE = importlib.util.find_spec("langchain_community") is not None
+
+# "local" (docs index only), "duckduckgo" (web only) or "auto" (local first, web fallback)
+SEARCH_BACKEND = os.getenv("PYTHONAUT_SEARCH_BACKEND", "auto").lower()
+# Local BM25 hits below this score are treated as "nothing relevant" in auto mode
+LOCAL_MIN_SCORE = 2.0
+LOCAL_BOOSTS = {
+    "beginner": ("/tutorial/", "/faq/", "/howto/"),
+    "intermediate": ("/howto/", "/library/"),
+    "professional": ("peps.python.org", "/reference/"),
+}
+
+# Search results are cached per (query, skill_level) for this long
+SEARCH_CACHE_TTL = 3600
+SEARCH_CACHE_MAX_ENTRIES = 512
+# Primary and fallback searches run concurrently and must finish within this deadline
+SEARCH_DEADLINE_SECONDS = 8.0
+# Rough token budget for the text handed back to the agent (~4 characters per token)
+RESULT_TOKEN_BUDGET = 350
+SNIPPET_MAX_CHARS = 280
+NUM_RESULTS = 5
+
+_client = None
+_client_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pythonaut-search")
+
+
+def _get_client():
+    """Build the DuckDuckGo client once and reuse it for every call."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from langchain_community.tools import DuckDuckGoSearchResults
+
+                _client = DuckDuckGoSearchResults(
+                    num_results=NUM_RESULTS,  # Reduced to get more relevant results
+                    backend="lite",
+                    safesearch="Moderate"
+                )
+    return _client
+
+
+def _raw_search(query):
+    """Return a list of {title, link, snippet} dicts, or the plain result string."""
+    client = _get_client()
+    api_wrapper = getattr(client, "api_wrapper", None)
+    if api_wrapper is not None and hasattr(api_wrapper, "results"):
+        return api_wrapper.results(query, NUM_RESULTS)
+    return client.run(query)
+
+
+def _local_search(query, skill_level):
+    """Search the offline docs index; returns [] when no index has been built."""
+    index = get_docs_index()
+    if index is None:
+        return []
+    results = index.search(query, limit=NUM_RESULTS, boost_prefixes=LOCAL_BOOSTS.get(skill_level.lower(), ()))
+    return [r for r in results if r["score"] >= LOCAL_MIN_SCORE]
+
+
+def _has_results(results):
+    if isinstance(results, list):
+        return bool(results)
+    return bool(results) and "no results" not in results.lower()
+
+
+def _shape_results(results):
+    """Deduplicate results and trim them to the token budget."""
+    budget = RESULT_TOKEN_BUDGET * 4
+    if not isinstance(results, list):
+        return results[:budget]
+
+    lines = []
+    seen = set()
+    used = 0
+    for item in results:
+        link = (item.get("link") or "").split("#")[0].rstrip("/")
+        title = " ".join((item.get("title") or "").split())
+        dedup_key = (link, title.lower())
+        if not any(dedup_key) or dedup_key in seen:
+            continue
+        seen.add(dedup_key)
+        snippet = " ".join((item.get("snippet") or "").split())
+        if len(snippet) > SNIPPET_MAX_CHARS:
+            snippet = snippet[:SNIPPET_MAX_CHARS].rsplit(" ", 1)[0] + "..."
+        line = f"- {title} ({link}): {snippet}"
+        if used + len(line) > budget:
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+def _cache_get(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key, value):
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + SEARCH_CACHE_TTL, value)
+        _cache.move_to_end(key)
+        while len(_cache) > SEARCH_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
 
 
 @tool
@@ -15,7 +139,32 @@ def search_python_resources(query: str, skill_level: str = "beginner"):
         query = query.get('description', '') if 'description' in query else str(query)
     if isinstance(skill_level, dict):
         skill_level = skill_level.get('description', 'beginner') if 'description' in skill_level else 'beginner'
-    
+
+    with span("search", backend=SEARCH_BACKEND, skill_level=skill_level) as search_span:
+        result = _search(query, skill_level, search_span)
+    return result
+
+
+def _search(query, skill_level, search_span):
+    if not query.strip():
+        search_span.set(empty=True)
+        return "Search error: the query was empty. Search for a Python topic, e.g. 'list comprehensions'."
+    cache_key = (" ".join(query.lower().split()), skill_level.lower())
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        search_span.set(cached=True)
+        return cached
+
+    if SEARCH_BACKEND in ("local", "auto"):
+        local_results = _local_search(query, skill_level)
+        if local_results:
+            search_span.set(source="local")
+            shaped = _shape_results(local_results)
+            _cache_put(cache_key, shaped)
+            return shaped
+        if SEARCH_BACKEND == "local" or not DUCKDUCKGO_AVAILABLE:
+            return f"No matching passages in the local Python docs. Try simpler terms like '{query.split()[0]} in Python'"
+
     try:
         # Base reliable Python education sites
         base_sites = "site:docs.python.org OR site:python.org OR site:stackoverflow.com"
@@ -28,22 +177,46 @@ def search_python_resources(query: str, skill_level: str = "beginner"):
         else:  # professional/advanced
             level_sites = " OR site:realpython.com OR site:peps.python.org OR site:github.com OR site:pydata.org OR site:python-advanced.org OR site:pycon.org"
 
+        search_span.set(source="duckduckgo")
         sites = f"{base_sites}{level_sites}"
         enhanced_query = f"{sites} {query}"
 
-        search = DuckDuckGoSearchResults(
-            num_results=5,  # Reduced to get more relevant results
-            backend="lite",
-            safesearch="Moderate"
-        )
+        # Run the site-restricted search and the broader fallback side by side
+        deadline = time.monotonic() + SEARCH_DEADLINE_SECONDS
+        primary = _executor.submit(_raw_search, enhanced_query)
+        fallback = _executor.submit(_raw_search, f"Python programming {query}")
+
+        results = None
+        timed_out = False
+        error = None
+        for future in (primary, fallback):
+            try:
+                candidate = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                timed_out = True
+                continue
+            except Exception as e:
+                error = error or e
+                continue
+            if _has_results(candidate):
+                results = candidate
+                break
+        # Only stops searches still waiting for a worker: one already running can't be
+        # interrupted, so it finishes in the background and its result is dropped
+        primary.cancel()
+        fallback.cancel()
 
-        results = search.run(enhanced_query)
+        if results is None:
+            if timed_out:
+                return f"No search results within {SEARCH_DEADLINE_SECONDS:.0f}s. Try simpler terms like '{query.split()[0]} in Python'"
+            if error is not None:
+                # Nothing timed out, so a failed search is why there are no results
+                raise error
+            return f"No search results. Try simpler terms like '{query.split()[0]} in Python'"
 
-        # Filter out irrelevant results
-        if "no results" in results.lower():
-            # Fallback to a broader search if no results found
-            return search.run(f"Python programming {query}")
-        return results
+        shaped = _shape_results(results)
+        _cache_put(cache_key, shaped)
+        return shaped
 
     except Exception as e:
-        return f"Search error: {str(e)}. Try simpler terms like '{query.split()[0]} in Python'"
\ No newline at end of file
+        return f"Search error: {str(e)}. Try simpler terms like '{query.split()[0]} in Python'"
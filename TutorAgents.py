@@ -1,177 +1,383 @@
-from crewai import Agent
+"""
+Agent definitions and the process-wide agent registry.
+
+Agents (and the shared LLM) are built lazily on first use by ``get_agent``
+and then reused by every session in the process, like ``st.cache_resource``
+would. Nothing heavy (crewai, litellm, langchain) is imported until an agent
+is actually needed, which keeps it off the app's first paint.
+Each agent's LLM asks the model router which model and reply budget to use
+for the current intent (``MODEL_ROUTES``, failover in TutorLLM).
+``from TutorAgents import teaching_expert`` still works and builds on access.
+"""
+import json
 import os
-import streamlit as st
+import threading
+
 os.environ["CREWAI_KNOWLEDGE_DISABLED"] = "True"
 os.environ["CREWAI_KNOWLEDGE_STORAGE_DISABLED"] = "True"
-from TeachingTools import search_python_resources
-from crewai import LLM
 
 is_local = "localhost" in os.getenv("STREAMLIT_SERVER_BASE_URL", "localhost")
 http_referer = "http://localhost:8501" if is_local else "https://pythonautpythonteacher-avrff3ruyvpnqueadyn6it.streamlit.app/"
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY") or st.secrets["openrouter"]["api_key"]
-
-if not OPENROUTER_API_KEY:
-    raise ValueError("Missing OPENROUTER_API_KEY environment variable")
-
-# Using Google's Gemini Flash 1.5 8B - optimized for educational applications
-llm = LLM(
-    model="openrouter/google/gemini-flash-1.5-8b",
-    api_key=OPENROUTER_API_KEY,
-    base_url="https://openrouter.ai/api/v1",
-    temperature=0.3,  # Lower temperature for more factual responses
-    headers={
-        "HTTP-Referer": http_referer,
-        "X-Title": "Pythonaut",
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}"
-    }
-)
-
-# Teaching Agent - Explains Python concepts with extreme clarity
-# Teaching Agent - Explains Python concepts with extreme clarity
-teaching_expert = Agent(
-    role="Python Concept Explainer",
-    goal="Provide crystal clear explanations of Python programming concepts tailored to the student's skill level with appropriate examples and analogies",
-    backstory="""You are an award-winning computer science educator with 15 years of experience teaching Python 
+# Default model; also tells TutorContext which tokenizer to estimate with
+LLM_MODEL = "openrouter/google/gemini-flash-1.5-8b"
+# Where routes fail over to when the default breaches its SLO or error budget
+FALLBACK_MODEL = "openrouter/meta-llama/llama-3.1-8b-instruct"
+# OpenAI-compatible endpoint; load tests point this at a local stand-in
+LLM_BASE_URL = os.getenv("PYTHONAUT_LLM_BASE_URL", "https://openrouter.ai/api/v1")
+# "full" (original prompts) or "compact" (trimmed goals/backstories and task templates), per deployment
+PROMPT_PROFILE = os.getenv("PYTHONAUT_PROMPT_PROFILE", "full").lower()
+
+# Model routes: agent -> intent -> candidate models (in order of preference), reply
+# budget and p95 latency SLO in seconds. "*" matches any agent or intent; entries override
+# single keys, an intent's beating an agent's defaults. PYTHONAUT_MODEL_ROUTES can name a
+# JSON file of the same shape.
+MODEL_ROUTES = {
+    "*": {
+        "*": {"models": [LLM_MODEL, FALLBACK_MODEL], "max_tokens": 2000, "p95_slo": 30.0},
+        # Fan-out sections share one reply, so each gets a shorter budget
+        "multi": {"max_tokens": 1200, "p95_slo": 20.0},
+    },
+    "conversation_agent": {"*": {"max_tokens": 500, "p95_slo": 8.0}},
+    "teaching_expert": {"*": {"max_tokens": 2500}},
+    "curriculum_planner": {"*": {"max_tokens": 3000, "p95_slo": 45.0}},
+    "project_coordinator": {"*": {"max_tokens": 1500, "p95_slo": 20.0}},
+}
+
+_registry_lock = threading.RLock()
+_llm = None
+_llm_override = None
+_router = None
+_agents = {}
+
+
+def _openrouter_api_key():
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        import streamlit as st
+        api_key = st.secrets["openrouter"]["api_key"]
+    if not api_key:
+        raise ValueError("Missing OPENROUTER_API_KEY environment variable")
+    return api_key
+
+
+def make_llm(model=LLM_MODEL, max_tokens=None, stop=None):
+    """A new OpenRouter LLM for ``model``; its calls are bounded and retried by the pool in TutorLLM."""
+    from TutorLLM import build_pooled_llm
+
+    api_key = _openrouter_api_key()
+    return build_pooled_llm(
+        model=model,
+        api_key=api_key,
+        base_url=LLM_BASE_URL,
+        max_tokens=max_tokens,
+        stop=stop,
+        temperature=0.3,  # Lower temperature for more factual responses
+        stream=True,  # Emit tokens as they arrive so the chat bubble can render them live
+        headers={
+            "HTTP-Referer": http_referer,
+            "X-Title": "Pythonaut",
+            "Authorization": f"Bearer {api_key}"
+        }
+    )
+
+
+def get_llm():
+    """The shared default-model LLM (or the one given to ``set_llm``), built on first use."""
+    global _llm
+    if _llm_override is not None:
+        return _llm_override
+    if _llm is None:
+        with _registry_lock:
+            if _llm is None:
+                # Using Google's Gemini Flash 1.5 8B - optimized for educational applications
+                _llm = make_llm(LLM_MODEL)
+    return _llm
+
+
+def set_llm(llm):
+    """
+    Use ``llm`` for every agent from now on instead of the model routes (benchmarks
+    use a local fake); ``None`` goes back to routing. Agents already built are
+    dropped and rebuilt on use.
+    """
+    global _llm_override
+    with _registry_lock:
+        _llm_override = llm
+        _agents.clear()
+
+
+def _load_routes():
+    routes = {agent: {intent: dict(route) for intent, route in intents.items()}
+              for agent, intents in MODEL_ROUTES.items()}
+    path = os.getenv("PYTHONAUT_MODEL_ROUTES")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+            for agent, intents in overrides.items():
+                for intent, route in intents.items():
+                    routes.setdefault(agent, {}).setdefault(intent, {}).update(route)
+        except (OSError, ValueError, AttributeError) as e:
+            print("Failed loading model routes:", e)
+    return routes
+
+
+def get_model_router():
+    """
+    Process-wide ModelRouter over MODEL_ROUTES (plus PYTHONAUT_MODEL_ROUTES),
+    judging health over PYTHONAUT_MODEL_WINDOW seconds and failing over above
+    PYTHONAUT_MODEL_MAX_ERROR_RATE.
+    """
+    global _router
+    if _router is None:
+        with _registry_lock:
+            if _router is None:
+                from TutorLLM import ModelRouter
+
+                _router = ModelRouter(
+                    _load_routes(),
+                    make_llm,
+                    window=float(os.getenv("PYTHONAUT_MODEL_WINDOW", "300")),
+                    max_error_rate=float(os.getenv("PYTHONAUT_MODEL_MAX_ERROR_RATE", "0.2")),
+                )
+    return _router
+
+
+def agent_llm(name):
+    """The LLM agent ``name`` is built with: routed per call, unless ``set_llm`` pinned one."""
+    if _llm_override is not None:
+        return _llm_override
+    from TutorLLM import build_routed_llm
+
+    return build_routed_llm(name, get_model_router())
+
+
+def _resolve_tools(names):
+    tools = []
+    for name in names:
+        if name == "search_python_resources":
+            from TeachingTools import search_python_resources
+            tools.append(search_python_resources)
+        else:
+            raise ValueError(f"Unknown tool: {name}")
+    return tools
+
+
+# Agent configurations; "tools" lists tool names that are resolved when the agent is built
+AGENT_CONFIGS = {
+    # Teaching Agent - Explains Python concepts with extreme clarity
+    "teaching_expert": dict(
+        role="Python Concept Explainer",
+        goal="Provide crystal clear explanations of Python programming concepts tailored to the student's skill level with appropriate examples and analogies",
+        backstory="""You are an award-winning computer science educator with 15 years of experience teaching Python 
     to students of all backgrounds. You have a PhD in Computer Science Education and have authored three textbooks 
     on Python programming. Your specialty is finding the perfect analogy to make complex concepts accessible to 
     beginners while still providing depth for advanced learners. You never use jargon without explaining it first 
     and always check for understanding by asking follow-up questions.""",
-    tools=[],  # REMOVED search_python_resources to prevent tool errors
-    verbose=True,
-    max_iter=5,
-    llm=llm,
-    allow_delegation=False,
-    description=(
-        "SPECIALIZES IN: Breaking down Python programming concepts into digestible parts with clear examples. "
-        "TARGET AUDIENCE: All skill levels (beginner, intermediate, professional). "
-        "TEACHING METHOD: Uses relatable analogies, step-by-step explanations, and practical examples. "
-        "RESPONSE STYLE: Patient, encouraging, and thorough. Always starts with a simple explanation before adding complexity. "
-        "AVOIDS: Assuming prior knowledge, using undefined jargon, skipping important foundational concepts. "
-        "DOES NOT USE EXTERNAL SEARCH TOOLS: Relies on internal knowledge only."
-    )
-)
+        tools=[],  # REMOVED search_python_resources to prevent tool errors
+        verbose=True,
+        max_iter=5,
+        allow_delegation=False,
+        description=(
+            "SPECIALIZES IN: Breaking down Python programming concepts into digestible parts with clear examples. "
+            "TARGET AUDIENCE: All skill levels (beginner, intermediate, professional). "
+            "TEACHING METHOD: Uses relatable analogies, step-by-step explanations, and practical examples. "
+            "RESPONSE STYLE: Patient, encouraging, and thorough. Always starts with a simple explanation before adding complexity. "
+            "AVOIDS: Assuming prior knowledge, using undefined jargon, skipping important foundational concepts. "
+            "DOES NOT USE EXTERNAL SEARCH TOOLS: Relies on internal knowledge only."
+        )
+    ),
 
-# Code Review Agent - Reviews and debugs code with detailed feedback
-code_reviewer = Agent(
-    role="Python Code Analyst and Debugger",
-    goal="Thoroughly analyze Python code, identify all issues (syntax errors, logic errors, style violations), provide specific fixes, and explain the reasoning behind improvements",
-    backstory="""You are a senior software engineer at a major tech company with expertise in Python code quality 
+    # Code Review Agent - Reviews and debugs code with detailed feedback
+    "code_reviewer": dict(
+        role="Python Code Analyst and Debugger",
+        goal="Thoroughly analyze Python code, identify all issues (syntax errors, logic errors, style violations), provide specific fixes, and explain the reasoning behind improvements",
+        backstory="""You are a senior software engineer at a major tech company with expertise in Python code quality 
     and best practices. You've reviewed over 10,000 code submissions in your career and have a reputation for 
     providing the most helpful and constructive feedback. You follow PEP 8 guidelines religiously and believe 
     that clean, readable code is just as important as functional code. You never just point out problems - you 
     always explain why they're problematic and suggest better alternatives.""",
-    tools=[search_python_resources],
-    verbose=True,
-    max_iter=5,
-    llm=llm,
-    allow_delegation=False,
-    description=(
-        "SPECIALIZES IN: Code review, debugging, and suggesting improvements based on Python best practices. "
-        "REVIEW PROCESS: 1. Check for syntax errors 2. Identify logic errors 3. Evaluate code style and PEP 8 compliance "
-        "4. Suggest optimizations 5. Explain all findings clearly. "
-        "FEEDBACK STYLE: Constructive, specific, and educational. Always explains the 'why' behind suggestions. "
-        "AVOIDS: Vague criticism, personal remarks, suggesting changes without explanation. "
-        "SEARCH EXAMPLES: 'common Python index errors and solutions', 'PEP 8 style guide examples', "
-        "'Python exception handling best practices', 'how to optimize Python for loops'"
-    )
-)
+        tools=["search_python_resources"],
+        verbose=True,
+        max_iter=5,
+        allow_delegation=False,
+        description=(
+            "SPECIALIZES IN: Code review, debugging, and suggesting improvements based on Python best practices. "
+            "REVIEW PROCESS: 1. Check for syntax errors 2. Identify logic errors 3. Evaluate code style and PEP 8 compliance "
+            "4. Suggest optimizations 5. Explain all findings clearly. "
+            "FEEDBACK STYLE: Constructive, specific, and educational. Always explains the 'why' behind suggestions. "
+            "AVOIDS: Vague criticism, personal remarks, suggesting changes without explanation. "
+            "SEARCH EXAMPLES: 'common Python index errors and solutions', 'PEP 8 style guide examples', "
+            "'Python exception handling best practices', 'how to optimize Python for loops'"
+        )
+    ),
 
-# Curriculum Planner - Creates structured learning paths
-curriculum_planner = Agent(
-    role="Python Learning Path Designer",
-    goal="Create personalized, structured learning paths with appropriate progression from basic to advanced topics based on the student's goals, current skill level, and available time",
-    backstory="""You are an instructional designer specializing in computer science education. You've designed 
+    # Curriculum Planner - Creates structured learning paths
+    "curriculum_planner": dict(
+        role="Python Learning Path Designer",
+        goal="Create personalized, structured learning paths with appropriate progression from basic to advanced topics based on the student's goals, current skill level, and available time",
+        backstory="""You are an instructional designer specializing in computer science education. You've designed 
     curriculum for major coding bootcamps and university computer science programs. You understand how people 
     learn programming concepts most effectively and how to scaffold knowledge properly. You create learning 
     journeys that are challenging but achievable, with each concept building naturally on the previous ones. 
     You always consider the student's goals (web development, data science, automation, etc.) when designing paths.""",
-    tools=[search_python_resources],
-    verbose=True,
-    max_iter=5,
-    llm=llm,
-    allow_delegation=False,
-    description=(
-        "SPECIALIZES IN: Creating structured learning paths with appropriate progression and milestones. "
-        "PLANNING PROCESS: 1. Assess current level 2. Identify goals 3. Create timeline with milestones "
-        "4. Select appropriate learning resources 5. Include practice projects 6. Schedule review sessions. "
-        "OUTPUT STYLE: Clear, organized, and actionable plans with specific recommendations. "
-        "AVOIDS: Overwhelming students, skipping fundamentals, creating unrealistic timelines. "
-        "SEARCH EXAMPLES: 'Python learning path for data science', 'web development with Python curriculum', "
-        "'3-month Python beginner to intermediate plan', 'project-based Python learning schedule'"
-    )
-)
+        tools=["search_python_resources"],
+        verbose=True,
+        max_iter=5,
+        allow_delegation=False,
+        description=(
+            "SPECIALIZES IN: Creating structured learning paths with appropriate progression and milestones. "
+            "PLANNING PROCESS: 1. Assess current level 2. Identify goals 3. Create timeline with milestones "
+            "4. Select appropriate learning resources 5. Include practice projects 6. Schedule review sessions. "
+            "OUTPUT STYLE: Clear, organized, and actionable plans with specific recommendations. "
+            "AVOIDS: Overwhelming students, skipping fundamentals, creating unrealistic timelines. "
+            "SEARCH EXAMPLES: 'Python learning path for data science', 'web development with Python curriculum', "
+            "'3-month Python beginner to intermediate plan', 'project-based Python learning schedule'"
+        )
+    ),
 
-# Quiz Master - Creates and evaluates knowledge checks
-quiz_master = Agent(
-    role="Python Knowledge Assessor",
-    goal="Create effective quizzes to evaluate understanding of Python concepts and provide detailed explanations for all answers to reinforce learning",
-    backstory="""You are an educational assessment specialist with expertise in computer science education. 
+    # Quiz Master - Creates and evaluates knowledge checks
+    "quiz_master": dict(
+        role="Python Knowledge Assessor",
+        goal="Create effective quizzes to evaluate understanding of Python concepts and provide detailed explanations for all answers to reinforce learning",
+        backstory="""You are an educational assessment specialist with expertise in computer science education. 
     You understand how to create questions that truly test conceptual understanding rather than just memorization. 
     You've designed certification exams for major tech companies and know how to craft questions with appropriate 
     difficulty levels and distractors. You believe assessment should be a learning experience itself, which is why 
     you always provide thorough explanations for both correct and incorrect answers.""",
-    tools=[],
-    verbose=True,
-    max_iter=5,
-    llm=llm,
-    allow_delegation=False,
-    description=(
-        "SPECIALIZES IN: Creating knowledge assessments that accurately measure understanding of Python concepts. "
-        "QUIZ DESIGN: 1. Questions cover key concepts 2. Appropriate difficulty level 3. Clear question phrasing "
-        "4. Plausible distractors 5. Comprehensive explanations for all options. "
-        "FEEDBACK STYLE: Educational, encouraging, and detailed. Explains why answers are correct or incorrect. "
-        "AVOIDS: Tricky questions, ambiguous phrasing, feedback that doesn't promote learning. "
-        "QUESTION TYPES: Multiple choice, code output prediction, bug identification, concept explanation."
-    )
-)
+        tools=[],
+        verbose=True,
+        max_iter=5,
+        allow_delegation=False,
+        description=(
+            "SPECIALIZES IN: Creating knowledge assessments that accurately measure understanding of Python concepts. "
+            "QUIZ DESIGN: 1. Questions cover key concepts 2. Appropriate difficulty level 3. Clear question phrasing "
+            "4. Plausible distractors 5. Comprehensive explanations for all options. "
+            "FEEDBACK STYLE: Educational, encouraging, and detailed. Explains why answers are correct or incorrect. "
+            "AVOIDS: Tricky questions, ambiguous phrasing, feedback that doesn't promote learning. "
+            "QUESTION TYPES: Multiple choice, code output prediction, bug identification, concept explanation."
+        )
+    ),
 
-# Project Coordinator - Manages the learning process
-project_coordinator = Agent(
-    role="Learning Journey Coordinator",
-    goal="Oversee the complete learning experience, maintain context across sessions, delegate to appropriate specialists based on student needs, and ensure a cohesive educational journey",
-    backstory="""You are an experienced educational program manager who has coordinated learning experiences 
+    # Project Coordinator - Manages the learning process
+    "project_coordinator": dict(
+        role="Learning Journey Coordinator",
+        goal="Oversee the complete learning experience, maintain context across sessions, delegate to appropriate specialists based on student needs, and ensure a cohesive educational journey",
+        backstory="""You are an experienced educational program manager who has coordinated learning experiences 
     for thousands of students. You have a deep understanding of Python pedagogy and know exactly which specialist 
     to engage for each student need. You maintain detailed records of each student's progress, strengths, 
     weaknesses, and goals. You ensure that the learning experience feels personalized and continuous, with each 
     session building on previous ones. You're also skilled at recognizing when a student is struggling and 
     adjusting the approach accordingly.""",
-    tools=[],
-    verbose=True,
-    max_iter=8,
-    llm=llm,
-    allow_delegation=True,
-    description=(
-        "SPECIALIZES IN: Coordinating the complete learning journey and maintaining context across sessions. "
-        "COORDINATION PROCESS: 1. Maintain student profile with progress, goals, and challenges "
-        "2. Route questions to appropriate specialists 3. Ensure continuity across learning sessions "
-        "4. Identify when students need additional support or challenge 5. Synthesize inputs from multiple experts. "
-        "COMMUNICATION STYLE: Professional, organized, and attentive to student needs. "
-        "AVOIDS: Losing context between sessions, misrouting questions, providing disjointed learning experiences. "
-        "DELEGATION: Knows exactly which specialist to engage for each type of question or need."
-    )
-)
-
-# Conversation Agent - Handles casual conversation and simple interactions
-# Conversation Agent - Handles casual conversation and simple interactions
-conversation_agent = Agent(
-    role="Friendly Conversation Handler",
-    goal="Engage in natural, friendly conversation with students, handle greetings, thanks, and casual chat without technical explanations",
-    backstory="""You are a friendly, approachable AI assistant who specializes in natural conversation. 
+        tools=[],
+        verbose=True,
+        max_iter=8,
+        allow_delegation=True,
+        description=(
+            "SPECIALIZES IN: Coordinating the complete learning journey and maintaining context across sessions. "
+            "COORDINATION PROCESS: 1. Maintain student profile with progress, goals, and challenges "
+            "2. Route questions to appropriate specialists 3. Ensure continuity across learning sessions "
+            "4. Identify when students need additional support or challenge 5. Synthesize inputs from multiple experts. "
+            "COMMUNICATION STYLE: Professional, organized, and attentive to student needs. "
+            "AVOIDS: Losing context between sessions, misrouting questions, providing disjointed learning experiences. "
+            "DELEGATION: Knows exactly which specialist to engage for each type of question or need."
+        )
+    ),
+
+    # Conversation Agent - Handles casual conversation and simple interactions
+    "conversation_agent": dict(
+        role="Friendly Conversation Handler",
+        goal="Engage in natural, friendly conversation with students, handle greetings, thanks, and casual chat without technical explanations",
+        backstory="""You are a friendly, approachable AI assistant who specializes in natural conversation. 
     You understand that learning can be stressful, so you provide warm, encouraging responses to make students 
     feel comfortable. You're great at casual chat, acknowledging thanks, and keeping the conversation flowing 
     naturally without getting into technical details unless asked.""",
-    tools=[],
-    verbose=True,
-    max_iter=2,  # Reduced iterations for faster responses
-    llm=llm,
-    allow_delegation=False,
-    description=(
-        "SPECIALIZES IN: Natural language conversation, greetings, thanks, and casual chat. "
-        "CONVERSATION STYLE: Warm, friendly, and encouraging. Keeps responses brief and natural. "
-        "TONE: Approachable and supportive, like a friendly tutor. "
-        "AVOIDS: Technical explanations, code reviews, or in-depth teaching during casual conversation. "
-        "HANDLING FOLLOW-UPS: If a student says 'yes' or 'tell me more', gently guide them to ask a specific question. "
-        "EXAMPLES: 'Hello!', 'You're welcome!', 'How are you today?', 'Glad to help!', 'What specific aspect would you like to know about?'"
-    )
-)
\ No newline at end of file
+        tools=[],
+        verbose=True,
+        max_iter=2,  # Reduced iterations for faster responses
+        allow_delegation=False,
+        description=(
+            "SPECIALIZES IN: Natural language conversation, greetings, thanks, and casual chat. "
+            "CONVERSATION STYLE: Warm, friendly, and encouraging. Keeps responses brief and natural. "
+            "TONE: Approachable and supportive, like a friendly tutor. "
+            "AVOIDS: Technical explanations, code reviews, or in-depth teaching during casual conversation. "
+            "HANDLING FOLLOW-UPS: If a student says 'yes' or 'tell me more', gently guide them to ask a specific question. "
+            "EXAMPLES: 'Hello!', 'You're welcome!', 'How are you today?', 'Glad to help!', 'What specific aspect would you like to know about?'"
+        )
+    ),
+}
+
+AGENT_NAMES = tuple(AGENT_CONFIGS)
+
+# Compact profile: the same roles with one-line goals and backstories. These are
+# sent as the system prompt on every call, so they cost tokens on every request.
+COMPACT_AGENT_PROMPTS = {
+    "teaching_expert": dict(
+        goal="Explain Python concepts clearly at the student's level, with examples and analogies",
+        backstory="You are a patient, experienced Python teacher who defines every term and builds from simple to deep.",
+    ),
+    "code_reviewer": dict(
+        goal="Find every issue in the student's Python code and explain each fix",
+        backstory="You are a senior Python engineer who gives specific, constructive, PEP 8-minded reviews.",
+    ),
+    "curriculum_planner": dict(
+        goal="Design realistic Python learning paths that fit the student's goals, level and time",
+        backstory="You are an instructional designer who scaffolds programming topics into achievable milestones.",
+    ),
+    "quiz_master": dict(
+        goal="Write quizzes that test understanding of Python concepts and explain every answer",
+        backstory="You are an assessment specialist who writes fair questions with plausible distractors.",
+    ),
+    "project_coordinator": dict(
+        goal="Route the student to the right specialists and keep their learning continuous",
+        backstory="You are an experienced learning coordinator who knows which Python specialist fits each need.",
+    ),
+    "conversation_agent": dict(
+        goal="Chat warmly and briefly with students without technical explanations",
+        backstory="You are a friendly tutor who keeps casual chat short and steers back to learning Python.",
+    ),
+}
+
+
+def agent_config(name, profile=None):
+    """Keyword arguments for building agent ``name`` under a prompt profile (default PROMPT_PROFILE)."""
+    if name not in AGENT_CONFIGS:
+        raise KeyError(f"Unknown agent: {name}")
+    config = dict(AGENT_CONFIGS[name])
+    if (profile or PROMPT_PROFILE) == "compact":
+        config.update(COMPACT_AGENT_PROMPTS[name])
+    return config
+
+
+def build_agent(name, profile=None, llm=None):
+    """Build a new (unshared) agent; ``get_agent`` is the cached version."""
+    from crewai import Agent
+
+    config = agent_config(name, profile)
+    config["tools"] = _resolve_tools(config.get("tools", []))
+    return Agent(llm=llm or agent_llm(name), **config)
+
+
+def get_agent(name):
+    """Return the shared agent called ``name``, building it on first use."""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+    if name not in AGENT_CONFIGS:
+        raise KeyError(f"Unknown agent: {name}")
+    with _registry_lock:
+        agent = _agents.get(name)
+        if agent is None:
+            agent = build_agent(name)
+            _agents[name] = agent
+    return agent
+
+
+def __getattr__(name):
+    # Keep module-level access (TutorAgents.teaching_expert, TutorAgents.llm) working, lazily
+    if name in AGENT_CONFIGS:
+        return get_agent(name)
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
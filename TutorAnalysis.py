@@ -0,0 +1,566 @@
+"""
+Local static analysis of student code, run before the code_reviewer agent.
+
+``analyze_code`` checks a snippet in-process, in milliseconds:
+
+- ``ast.parse`` and ``compile`` for syntax errors (including the ones only
+  the compiler reports, like ``return`` outside a function)
+- a pycodestyle-style pass over lines and tokens (line length, whitespace,
+  indentation, ``None``/``True`` comparisons, bare ``except``...)
+- name checks: unused imports and locals, undefined names, shadowed
+  builtins, mutable default arguments and expressions whose value is thrown
+  away (``x * 2`` where ``return x * 2`` was meant)
+
+The findings go into the review prompt so the agent explains them instead
+of searching for them. The syntax errors beginners hit most (missing colon,
+``print "x"``, ``=`` for ``==``, an unclosed bracket or string, indentation)
+are fixed mechanically; if the fixed code then compiles, ``render_syntax_fix``
+answers without an LLM call.
+"""
+import ast
+import builtins
+import io
+import re
+import textwrap
+import time
+import tokenize
+import warnings
+from collections import Counter, namedtuple
+
+MAX_LINE_LENGTH = 79
+MAX_FINDINGS = 50
+MAX_FIX_ROUNDS = 5
+# Style notes of one kind listed before the rest are only counted
+MAX_PER_STYLE_CODE = 3
+
+FILENAME = "<student code>"
+# compile() warns about things like "x is 5"; they are reported as findings, not on stderr.
+# A filter scoped to this filename, installed once, because catch_warnings isn't thread-safe
+warnings.filterwarnings("ignore", category=SyntaxWarning, module=re.escape(FILENAME))
+
+SEVERITY_ORDER = {"error": 0, "warning": 1, "style": 2}
+
+Finding = namedtuple("Finding", "line col code message severity")
+
+
+class Analysis(namedtuple("Analysis", "findings syntax_error fixes fixed_code elapsed")):
+    """
+    ``findings`` sorted by line; ``syntax_error`` is the first one the parser
+    reports (or None); ``fixes`` lists (Finding, explanation) for each
+    mechanical fix applied, and ``fixed_code`` is the result if it compiles.
+    """
+
+    __slots__ = ()
+
+    @property
+    def trivial(self):
+        """A syntax error that was fixed mechanically: no need to ask the model."""
+        return self.syntax_error is not None and self.fixed_code is not None
+
+
+BUILTIN_NAMES = frozenset(name for name in dir(builtins) if not name.startswith("_"))
+# Builtins students most often overwrite by accident; the rest are reported too
+COMMON_SHADOWED = frozenset(("list", "dict", "str", "int", "float", "set", "tuple", "input", "sum", "max", "min",
+                             "len", "type", "id", "print", "range", "open", "file", "map", "filter", "next", "iter",
+                             "object", "format", "all", "any", "sorted", "hash", "bytes", "vars", "dir", "help"))
+
+# Plain-language explanations for the syntax errors fixed mechanically
+EXPLAIN = {
+    "colon": "Lines that start a block (`if`, `elif`, `else`, `for`, `while`, `def`, `class`, `try`, `except`, "
+             "`with`) must end with a colon `:`.",
+    "print": "In Python 3 `print` is a function, so what you print goes inside parentheses: `print(\"hello\")`.",
+    "equals": "`=` assigns a value; to compare two values use `==`.",
+    "bracket": "Every opening bracket needs a matching closing one on the same statement.",
+    "string": "A string has to end with the same kind of quote it started with, on the same line.",
+    "indent_block": "The line after a block header (a line ending in `:`) must be indented, usually by 4 spaces.",
+    "unexpected_indent": "This line is indented more than the code around it, but it doesn't start a new block.",
+    "unindent": "When a block ends, the next line has to line up exactly with an earlier indentation level.",
+    "unmatched": "There is a closing bracket here with no opening bracket to match it.",
+    "tabs": "The indentation mixes tabs and spaces; Python needs it to be consistent (use 4 spaces).",
+}
+
+_CLOSERS = {"(": ")", "[": "]", "{": "}"}
+_BARE_EQUALS = re.compile(r"(?<![=!<>:+\-*/%&|^@])=(?!=)")
+_PY2_PRINT = re.compile(r"^(\s*)print\s+(.*?)\s*$")
+_SNAKE_CASE = re.compile(r"^_{0,2}[a-z][a-z0-9_]*_{0,2}$")
+_CAP_WORDS = re.compile(r"^_?[A-Z][A-Za-z0-9]*$")
+
+
+def _indent(line):
+    return len(line) - len(line.lstrip(" \t"))
+
+
+def _split_comment(line):
+    """(code, comment) for a line, when the "#" isn't inside a string."""
+    at = line.find("#")
+    if at >= 0 and line[:at].count("'") % 2 == 0 and line[:at].count('"') % 2 == 0:
+        return line[:at].rstrip(), "  " + line[at:]
+    return line.rstrip(), ""
+
+
+def _open_brackets(code):
+    """The brackets ``code`` leaves open, innermost last (quoted text is skipped)."""
+    stack = []
+    quote = None
+    for ch in code:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in _CLOSERS:
+            stack.append(ch)
+        elif stack and ch == _CLOSERS[stack[-1]]:
+            stack.pop()
+    return stack
+
+
+# ---- Syntax ----
+def _syntax_error(source):
+    """(tree, None) when ``source`` compiles, else (tree or None, SyntaxError)."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return None, e if isinstance(e, SyntaxError) else SyntaxError(str(e))
+    try:
+        compile(tree, FILENAME, "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        return tree, e if isinstance(e, SyntaxError) else SyntaxError(str(e))
+    return tree, None
+
+
+def _error_finding(error):
+    kind = type(error).__name__
+    return Finding(error.lineno or 1, error.offset or 0, "E999", f"{kind}: {error.msg}", "error")
+
+
+def _fix(lines, error):
+    """(fixed lines, explanation key) for a syntax error that has an obvious mechanical fix, else None."""
+    msg = error.msg or ""
+    i = (error.lineno or 0) - 1
+    if isinstance(error, TabError) or "inconsistent use of tabs" in msg:
+        return [line.expandtabs(4) for line in lines], "tabs"
+    if not 0 <= i < len(lines):
+        return None
+    line = lines[i]
+    fixed = list(lines)
+
+    if msg == "expected ':'":
+        code, comment = _split_comment(line)
+        fixed[i] = code + ":" + comment
+        return fixed, "colon"
+    if msg.startswith("Missing parentheses in call to 'print'"):
+        match = _PY2_PRINT.match(line)
+        if match:
+            fixed[i] = f"{match.group(1)}print({match.group(2).rstrip(',')})"
+            return fixed, "print"
+    if "instead of '='" in msg:
+        found = _BARE_EQUALS.search(line, max(0, (error.offset or 1) - 1))
+        if found:
+            fixed[i] = line[:found.start()] + "==" + line[found.end():]
+            return fixed, "equals"
+    if msg.endswith("was never closed") and len(msg) > 2 and msg[1] in _CLOSERS:
+        # The bracket closes after the last line it continues onto (the lines indented deeper
+        # than where it opened), so print("a",\n    "b" becomes print("a",\n    "b")
+        last = i
+        for j in range(i + 1, len(lines)):
+            if lines[j].strip():
+                if _indent(lines[j]) <= _indent(line):
+                    break
+                last = j
+        code, comment = _split_comment(lines[last])
+        if last == i and code.endswith((",", msg[1])):
+            # The rest of the call is missing, not just its bracket; only the student knows it
+            return None
+        fixed[last] = code + _CLOSERS[msg[1]] + comment
+        return fixed, "bracket"
+    if msg.startswith("unterminated string literal"):
+        start = (error.offset or 1) - 1
+        quote = line[start:start + 1]
+        if quote in ("'", '"'):
+            # The quote goes before whatever closes the brackets opened ahead of the string
+            # (and before a comment), so print("hi) becomes print("hi") and not print("hi)")
+            body, comment = line[start + 1:].rstrip(), ""
+            at = body.find(" #")
+            if at >= 0:
+                body, comment = body[:at].rstrip(), "  " + body[at:].strip()
+            opened = _open_brackets(line[:start])
+            closers = ""
+            for k in range(len(opened), 0, -1):
+                # The k innermost brackets, closed innermost first
+                candidate = "".join(_CLOSERS[opener] for opener in reversed(opened[-k:]))
+                if body.endswith(candidate):
+                    body, closers = body[:-k].rstrip(), candidate
+                    break
+            fixed[i] = line[:start + 1] + body + quote + closers + comment
+            return fixed, "string"
+    if msg.startswith("expected an indented block"):
+        header = next((lines[j] for j in range(i - 1, -1, -1) if lines[j].strip()), "")
+        fixed[i] = " " * (_indent(header) + 4) + line.lstrip()
+        return fixed, "indent_block"
+    if msg == "unexpected indent":
+        previous = next((lines[j] for j in range(i - 1, -1, -1) if lines[j].strip()), "")
+        fixed[i] = " " * _indent(previous) + line.lstrip()
+        return fixed, "unexpected_indent"
+    if msg.startswith("unindent does not match"):
+        levels = sorted({_indent(lines[j]) for j in range(i) if lines[j].strip()})
+        current = _indent(line)
+        outer = max((level for level in levels if level < current), default=0)
+        fixed[i] = " " * outer + line.lstrip()
+        return fixed, "unindent"
+    if msg.startswith("unmatched '"):
+        at = (error.offset or 1) - 1
+        if line[at:at + 1] in _CLOSERS.values():
+            fixed[i] = line[:at] + line[at + 1:]
+            return fixed, "unmatched"
+    return None
+
+
+def _fix_syntax(source, error):
+    """Apply mechanical fixes until the code compiles: ([(Finding, explanation)], fixed source or None)."""
+    lines = source.splitlines()
+    fixes = []
+    for _ in range(MAX_FIX_ROUNDS):
+        result = _fix(lines, error)
+        if result is None:
+            return fixes, None
+        lines, key = result
+        fixes.append((_error_finding(error), EXPLAIN[key]))
+        _, error = _syntax_error("\n".join(lines))
+        if error is None:
+            return fixes, "\n".join(lines)
+    return fixes, None
+
+
+# ---- Style ----
+def _line_checks(lines, statement_lines=()):
+    """Per-line checks; indentation is only judged on ``statement_lines``, where a statement starts."""
+    findings = []
+    indents = set()
+    for number, line in enumerate(lines, 1):
+        stripped = line.rstrip("\r\n")
+        if len(stripped) > MAX_LINE_LENGTH:
+            findings.append(Finding(number, MAX_LINE_LENGTH + 1, "E501",
+                                    f"line too long ({len(stripped)} > {MAX_LINE_LENGTH} characters)", "style"))
+        if stripped != stripped.rstrip():
+            code, message = ("W293", "whitespace on a blank line") if not stripped.strip() else \
+                ("W291", "trailing whitespace")
+            findings.append(Finding(number, len(stripped.rstrip()) + 1, code, message, "style"))
+        leading = stripped[:_indent(stripped)]
+        if stripped.strip():
+            if "\t" in leading:
+                indents.add("tab")
+                findings.append(Finding(number, 1, "W191", "indentation contains tabs", "style"))
+            elif leading:
+                indents.add("space")
+                if len(leading) % 4 and number in statement_lines:
+                    findings.append(Finding(number, 1, "E111", "indentation is not a multiple of four", "style"))
+    if len(indents) > 1:
+        findings.append(Finding(1, 1, "E101", "indentation mixes tabs and spaces", "style"))
+    return findings
+
+
+_SPACED_OPERATORS = frozenset(("==", "!=", "<=", ">=", "<", ">", "+=", "-=", "*=", "/=", "//=", "%=", "**="))
+
+
+def _token_checks(source):
+    findings = []
+    depth = 0
+    previous = None
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return findings
+    for index, token in enumerate(tokens):
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if token.type == tokenize.OP:
+            if token.string in "([{":
+                depth += 1
+            elif token.string in ")]}":
+                depth = max(0, depth - 1)
+            elif token.string == "," and following is not None and following.start == token.end \
+                    and following.string not in ")]}" and following.type not in (tokenize.NEWLINE, tokenize.NL):
+                findings.append(Finding(token.start[0], token.end[1] + 1, "E231", "missing whitespace after ','",
+                                        "style"))
+            elif token.string == ";":
+                findings.append(Finding(token.start[0], token.start[1] + 1, "E702",
+                                        "multiple statements on one line (semicolon)", "style"))
+            elif (token.string in _SPACED_OPERATORS or (token.string == "=" and depth == 0)) and \
+                    previous is not None and following is not None and \
+                    (previous.end == token.start or following.start == token.end):
+                findings.append(Finding(token.start[0], token.start[1] + 1, "E225",
+                                        f"missing whitespace around operator '{token.string}'", "style"))
+        if token.type not in (tokenize.NL, tokenize.COMMENT):
+            previous = token
+    return findings
+
+
+# ---- Names and common mistakes ----
+class _Scope:
+    def __init__(self, node=None):
+        self.node = node
+        self.assigned = {}  # name -> first line it was assigned (plain assignment targets only)
+        self.used = set()
+
+
+class _NameChecker(ast.NodeVisitor):
+    """One walk over the tree collecting bindings, uses and the per-node checks."""
+
+    def __init__(self):
+        self.findings = []
+        self.bound = set()
+        self.loaded = []  # (name, line, col)
+        self.imports = []  # (name, line, col, what was imported)
+        self.shadowed = set()
+        self.star_import = False
+        self.scopes = [_Scope()]
+
+    def report(self, node, code, message, severity="warning"):
+        self.findings.append(Finding(node.lineno, node.col_offset + 1, code, message, severity))
+
+    def bind(self, name, node):
+        self.bound.add(name)
+        if name in BUILTIN_NAMES and name not in self.shadowed:
+            self.shadowed.add(name)
+            hint = " (a very common one to overwrite by accident)" if name in COMMON_SHADOWED else ""
+            self.report(node, "A001", f"'{name}' shadows the builtin of the same name{hint}")
+
+    # Bindings
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split(".")[0]
+            self.bind(name, node)
+            self.imports.append((name, node.lineno, node.col_offset + 1, alias.name))
+        if len(node.names) > 1:
+            self.report(node, "E401", "multiple imports on one line", "style")
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_import = True
+                continue
+            name = alias.asname or alias.name
+            self.bind(name, node)
+            self.imports.append((name, node.lineno, node.col_offset + 1, f"{node.module or '.'}.{alias.name}"))
+
+    def _function(self, node):
+        self.bind(node.name, node)
+        if not _SNAKE_CASE.match(node.name):
+            self.report(node, "N802", f"function name '{node.name}' should be lowercase_with_underscores", "style")
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None:
+                self.bind(arg.arg, arg)
+        for default in args.defaults + [d for d in args.kw_defaults if d is not None]:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set)) or (
+                    isinstance(default, ast.Call) and isinstance(default.func, ast.Name)
+                    and default.func.id in ("list", "dict", "set")):
+                self.report(default, "B006", "mutable default argument: it is shared between calls; "
+                                             "default to None and create it inside the function")
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None and arg.annotation is not None:
+                self.visit(arg.annotation)
+        for expression in node.decorator_list + args.defaults + [d for d in args.kw_defaults if d is not None]:
+            self.visit(expression)
+        if node.returns is not None:
+            self.visit(node.returns)
+        self.scopes.append(_Scope(node))
+        for statement in node.body:
+            self.visit(statement)
+        self._close_scope()
+
+    visit_FunctionDef = visit_AsyncFunctionDef = _function
+
+    def visit_Lambda(self, node):
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
+            self.bound.add(arg.arg)
+        for name in (node.args.vararg, node.args.kwarg):
+            if name is not None:
+                self.bound.add(name.arg)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node):
+        self.bind(node.name, node)
+        if not _CAP_WORDS.match(node.name):
+            self.report(node, "N801", f"class name '{node.name}' should use CapWords", "style")
+        for expression in node.decorator_list + node.bases + [keyword.value for keyword in node.keywords]:
+            self.visit(expression)
+        # Class attributes aren't locals of an enclosing function
+        self.scopes.append(_Scope())
+        for statement in node.body:
+            self.visit(statement)
+        self.scopes.pop()
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+    visit_MatchStar = visit_MatchAs
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.loaded.append((node.id, node.lineno, node.col_offset + 1))
+            for scope in self.scopes:
+                scope.used.add(node.id)
+        else:
+            self.bind(node.id, node)
+            if isinstance(node.ctx, ast.Store) and len(node.id) == 1 and node.id in "lOI":
+                self.report(node, "E741", f"ambiguous variable name '{node.id}'", "style")
+
+    def visit_Assign(self, node):
+        scope = self.scopes[-1]
+        if scope.node is not None:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    scope.assigned.setdefault(target.id, target)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        # "count += 1" reads count too
+        if isinstance(node.target, ast.Name):
+            for scope in self.scopes:
+                scope.used.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        scope = self.scopes[-1]
+        if scope.node is not None and node.value is not None and isinstance(node.target, ast.Name):
+            scope.assigned.setdefault(node.target.id, node.target)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.bound.update(node.names)
+        for scope in self.scopes:
+            scope.used.update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def visit_ExceptHandler(self, node):
+        if node.type is None:
+            self.report(node, "E722", "bare 'except:' also catches KeyboardInterrupt and typos; "
+                                      "name the exception you expect")
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+    # Expressions
+    def visit_Compare(self, node):
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(right, ast.Constant):
+                if isinstance(op, (ast.Eq, ast.NotEq)) and right.value is None:
+                    self.report(node, "E711", "comparison to None should be 'is None' / 'is not None'", "style")
+                elif isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right.value, bool):
+                    self.report(node, "E712", f"comparison to {right.value}: use 'if x:' or 'if not x:'", "style")
+                elif isinstance(op, (ast.Is, ast.IsNot)) and right.value is not None \
+                        and not isinstance(right.value, bool) and right.value is not Ellipsis:
+                    self.report(node, "F632", "'is' compares identity, not value; use '==' with literals")
+        self.generic_visit(node)
+
+    def visit_Expr(self, node):
+        value = node.value
+        if isinstance(value, ast.Compare) and len(value.ops) == 1 and isinstance(value.ops[0], ast.Eq):
+            self.report(node, "B015", "comparison result is thrown away; did you mean '=' to assign?")
+        elif isinstance(value, (ast.BinOp, ast.BoolOp, ast.Name, ast.Attribute, ast.Subscript)):
+            self.report(node, "B018", "expression value is thrown away; did you mean to return, print "
+                                      "or assign it?")
+        self.generic_visit(node)
+
+    def _close_scope(self):
+        scope = self.scopes.pop()
+        for name, target in scope.assigned.items():
+            if name not in scope.used and not name.startswith("_"):
+                self.report(target, "F841", f"local variable '{name}' is assigned but never used")
+
+
+def _name_checks(tree):
+    checker = _NameChecker()
+    checker.visit(tree)
+    findings = checker.findings
+    loaded = {name for name, _, _ in checker.loaded}
+    exported = set()
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            exported.update(elt.value for elt in getattr(node.value, "elts", ())
+                            if isinstance(elt, ast.Constant) and isinstance(elt.value, str))
+    for name, line, col, what in checker.imports:
+        if name not in loaded and name not in exported:
+            findings.append(Finding(line, col, "F401", f"'{what}' is imported but never used", "warning"))
+    if not checker.star_import:
+        reported = set()
+        for name, line, col in checker.loaded:
+            if name not in checker.bound and name not in BUILTIN_NAMES and name not in reported \
+                    and not (name.startswith("__") and name.endswith("__")):
+                reported.add(name)
+                # Snippets are often excerpts, so this is a warning: the name may come from code not shown
+                findings.append(Finding(line, col, "F821", f"undefined name '{name}' (not defined in this snippet; "
+                                        "a NameError unless it comes from code not shown)", "warning"))
+    return findings
+
+
+# ---- Entry points ----
+def analyze_code(code):
+    """Run every check over ``code`` (see module docstring) and return an ``Analysis``."""
+    start = time.perf_counter()
+    # Dedented so a snippet pasted with a uniform indent parses; line numbers don't change
+    source = textwrap.dedent(code.replace("\r\n", "\n"))
+    tree, error = _syntax_error(source)
+    statement_lines = {node.lineno for node in ast.walk(tree) if isinstance(node, ast.stmt)} if tree else ()
+    findings = _line_checks(source.splitlines(), statement_lines)
+    syntax_error = None
+    fixes, fixed = [], None
+    if error is not None:
+        syntax_error = _error_finding(error)
+        findings.append(syntax_error)
+        fixes, fixed = _fix_syntax(source, error)
+    else:
+        findings.extend(_token_checks(source))
+        findings.extend(_name_checks(tree))
+    # Keep the most severe when there are too many, then present them in line order
+    findings = sorted(findings, key=lambda f: (SEVERITY_ORDER[f.severity], f.line, f.col))[:MAX_FINDINGS]
+    findings.sort(key=lambda f: (f.line, f.col, f.code))
+    return Analysis(findings, syntax_error, fixes, fixed, time.perf_counter() - start)
+
+
+def format_findings(analysis, limit=25):
+    """The findings as prompt lines, most severe first ("" when there are none)."""
+    ranked = sorted(analysis.findings, key=lambda f: (SEVERITY_ORDER[f.severity], f.line, f.col))
+    lines = []
+    per_code = Counter()
+    for finding in ranked:
+        per_code[finding.code] += 1
+        if finding.severity == "style" and per_code[finding.code] > MAX_PER_STYLE_CODE:
+            continue
+        lines.append(f"- line {finding.line}: [{finding.severity}] {finding.code} {finding.message}")
+    extra = len(lines) - limit
+    lines = lines[:limit]
+    repeated = {code: n - MAX_PER_STYLE_CODE for code, n in per_code.items() if n > MAX_PER_STYLE_CODE}
+    if repeated:
+        lines.append("- the same style notes repeat: " + ", ".join(f"{code} on {n} more lines"
+                                                                  for code, n in sorted(repeated.items())))
+    if extra > 0:
+        lines.append(f"- ... and {extra} more notes")
+    return "\n".join(lines)
+
+
+def render_syntax_fix(analysis):
+    """Markdown reply for a trivially fixable syntax error (``analysis.trivial``), written without an LLM."""
+    parts = ["## Code review: syntax error\n"]
+    if len(analysis.fixes) == 1:
+        parts.append("Python couldn't run this code because of one syntax error. Here's what it is and how to fix it.\n")
+    else:
+        parts.append(f"Python couldn't run this code because of {len(analysis.fixes)} syntax errors; "
+                     "it stops at the first one, so here they are in the order it finds them.\n")
+    for finding, explanation in analysis.fixes:
+        parts.append(f"**Line {finding.line}:** `{finding.message}`\n\n{explanation}\n")
+    parts.append("### Corrected code\n")
+    parts.append(f"```python\n{analysis.fixed_code}\n```\n")
+    remaining = analyze_code(analysis.fixed_code)
+    notes = [f for f in remaining.findings if f.severity != "style"][:5]
+    if notes:
+        parts.append("### Other things to check\n")
+        parts.extend(f"- Line {f.line}: {f.message}" for f in notes)
+        parts.append("")
+    parts.append("Run the corrected version. If it still doesn't do what you expect, send it back and "
+                 "I'll go through the logic with you.")
+    return "\n".join(parts)
@@ -0,0 +1,241 @@
+"""
+Persistent response cache for specialist generations (lessons, quizzes).
+
+Entries live in a small SQLite database keyed on (agent, normalized topic,
+skill level). Reads refresh an entry's last-used time so eviction is LRU;
+entries also expire after a TTL, and the table is trimmed to both an entry
+count and a total byte budget. The cache is shared by every session in the
+process through ``get_response_cache()``.
+
+On an exact miss, ``get_similar`` consults a local TF-IDF index
+(TutorSemanticIndex) over the stored queries of the same agent and skill
+level and serves the closest answer above a similarity threshold.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from TutorSemanticIndex import SemanticIndex
+
+BASE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_CACHE_PATH = BASE_DIR / "response_cache.sqlite3"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SEMANTIC_THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r"[^a-z0-9_+#]+")
+
+
+def normalize_topic(topic):
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share a key."""
+    return " ".join(_NON_WORD.sub(" ", str(topic).lower()).split())
+
+
+def _namespace(agent, skill_level):
+    return f"{agent}\x1f{str(skill_level).lower().strip()}"
+
+
+def cache_key(agent, topic, skill_level):
+    raw = "\x1f".join([agent, normalize_topic(topic), str(skill_level).lower().strip()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache with TTL, entry and size caps, and hit/miss counters."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 semantic_threshold=DEFAULT_SEMANTIC_THRESHOLD):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.semantic_threshold = semantic_threshold
+        self.hits = 0
+        self.misses = 0
+        self.semantic_hits = 0
+        self.evictions = 0
+        self._semantic = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                skill_level TEXT NOT NULL,
+                query TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+
+    def get(self, agent, topic, skill_level):
+        """Return the cached response text, or None on a miss or expired entry."""
+        key = cache_key(agent, topic, skill_level)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.evictions += 1
+                    if self._semantic is not None:
+                        self._semantic.remove(key)
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_used = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (now, key),
+            )
+            self.hits += 1
+            return row[0]
+
+    def put(self, agent, topic, skill_level, response, query=None):
+        """Store a response and trim the cache back under its limits."""
+        if not response or not response.strip():
+            return
+        key = cache_key(agent, topic, skill_level)
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, agent, topic, skill_level, query, response, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, agent, normalize_topic(topic), str(skill_level).lower().strip(),
+                 query if query is not None else str(topic), response, size, now, now),
+            )
+            if self._semantic is not None:
+                self._semantic.add(key, _namespace(agent, skill_level),
+                                   query if query is not None else str(topic))
+            self._evict(now)
+
+    def _semantic_index(self):
+        """Build the similarity index from stored queries on first use (caller holds the lock)."""
+        if self._semantic is None:
+            index = SemanticIndex()
+            rows = self._conn.execute("SELECT key, agent, skill_level, query FROM responses")
+            for key, agent, skill_level, query in rows:
+                index.add(key, _namespace(agent, skill_level), query)
+            self._semantic = index
+        return self._semantic
+
+    def get_similar(self, agent, query, skill_level, threshold=None):
+        """
+        Return the stored response for the most similar earlier query of the
+        same agent and skill level, or None if nothing clears the threshold.
+        """
+        threshold = self.semantic_threshold if threshold is None else threshold
+        if threshold > 1:
+            return None
+        now = time.time()
+        with self._lock:
+            index = self._semantic_index()
+            match = index.search(_namespace(agent, skill_level), query, threshold)
+            if match is None:
+                return None
+            key = match[0]
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                # Entry was evicted or expired since it was indexed
+                index.remove(key)
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_used = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (now, key),
+            )
+            self.semantic_hits += 1
+            return row[0]
+
+    def _evict(self, now):
+        expired = self._conn.execute(
+            "SELECT key FROM responses WHERE created_at < ?", (now - self.ttl,)
+        ).fetchall()
+        if expired:
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", expired)
+            self.evictions += len(expired)
+            if self._semantic is not None:
+                for (key,) in expired:
+                    self._semantic.remove(key)
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from least recently used until both limits are satisfied
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+        if self._semantic is not None:
+            for (key,) in doomed:
+                self._semantic.remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._semantic = None
+
+    def stats(self):
+        """Counters for dashboards/logging: hits, misses, semantic_hits, hit_rate, entries, bytes, evictions."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "semantic_hits": self.semantic_hits,
+            "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+            "evictions": self.evictions,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache configured from PYTHONAUT_CACHE_* env vars; None when disabled."""
+    global _cache
+    if os.getenv("PYTHONAUT_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    path=os.getenv("PYTHONAUT_CACHE_PATH", str(DEFAULT_CACHE_PATH)),
+                    ttl=float(os.getenv("PYTHONAUT_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                    max_entries=int(os.getenv("PYTHONAUT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                    max_bytes=int(float(os.getenv("PYTHONAUT_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2 ** 20)) * 2 ** 20),
+                    semantic_threshold=float(os.getenv("PYTHONAUT_SEMANTIC_THRESHOLD", DEFAULT_SEMANTIC_THRESHOLD)),
+                )
+    return _cache
@@ -0,0 +1,274 @@
+"""
+Local intent classifier: hashed n-gram features and a linear softmax model.
+
+Predicts which specialist a student message is for (conversation, teaching,
+code_review, curriculum, quiz or coordination) and how confident it is, in
+well under a millisecond and without a network call. Trained offline from a
+labeled JSONL set (one ``{"text": ..., "intent": ...}`` per line):
+
+    python TutorClassifier.py train data/intents.jsonl --model data/intent_model.json
+    python TutorClassifier.py predict "what is wrong with this code"
+
+Features are word unigrams and bigrams, character trigrams, the first word
+and a few shape markers, each hashed into a fixed number of buckets with
+crc32 (stable across processes, unlike ``hash``). Pasted code is reduced to
+markers: what the code says matters less than the fact that there is code.
+The model file stores only the buckets that were seen in training.
+
+Rows whose text hashes into the held-out fifth (``is_heldout``) are left out
+of training so ``benchmarks/intent_eval.py`` can score the model on them.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_DATA_PATH = BASE_DIR / "data" / "intents.jsonl"
+DEFAULT_MODEL_PATH = BASE_DIR / "data" / "intent_model.json"
+DEFAULT_MIN_CONFIDENCE = 0.45
+MODEL_VERSION = 1
+
+INTENTS = ["conversation", "teaching", "code_review", "curriculum", "quiz", "coordination"]
+
+_WORD = re.compile(r"[a-z0-9_']+")
+_FENCED = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+_CODE_LINE = re.compile(
+    r"^\s*(?:def |class |import |from \S+ import |return\b|print\s*\(|(?:for|while|if|elif|else|with|try|except)\b.*:\s*$"
+    r"|[A-Za-z_][\w.\[\]\"']*\s*[-+*/]?=[^=]|[A-Za-z_][\w.]*\(.*\)\s*$)"
+)
+_ERROR_NAME = re.compile(r"\b[A-Z]\w*(?:Error|Exception)\b|\bTraceback\b")
+# Prose beyond this is unlikely to change the intent and would only cost time
+MAX_PROSE_CHARS = 2000
+
+
+# ---- Features ----
+def _length_bucket(n):
+    for limit in (1, 2, 3, 5, 8, 13, 21):
+        if n <= limit:
+            return limit
+    return "more"
+
+
+def features(text):
+    """Feature strings for one message (before hashing)."""
+    feats = []
+    fenced = _FENCED.findall(text)
+    if fenced:
+        feats.append("__codeblock__")
+        text = _FENCED.sub("\n", text)
+    prose = []
+    code_lines = 0
+    for line in text.splitlines():
+        if _CODE_LINE.match(line):
+            code_lines += 1
+        else:
+            prose.append(line)
+    if code_lines:
+        feats.append("__codeline__")
+        if code_lines > 1:
+            feats.append("__codelines__")
+    prose = " ".join(prose)[:MAX_PROSE_CHARS]
+    if _ERROR_NAME.search(prose):
+        feats.append("__errorname__")
+    if "?" in prose:
+        feats.append("__question__")
+
+    words = _WORD.findall(prose.lower())
+    feats.append(f"len:{_length_bucket(len(words))}")
+    if words:
+        feats.append(f"first:{words[0]}")
+    previous = "<s>"
+    for word in words:
+        feats.append(f"w:{word}")
+        feats.append(f"b:{previous} {word}")
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            feats.append(f"c:{padded[i:i + 3]}")
+        previous = word
+    return feats
+
+
+def hashed(text, dim):
+    """Bucket -> value for ``text``, L2-normalized so long messages don't dominate."""
+    counts = {}
+    mask = dim - 1
+    for feat in features(text):
+        bucket = zlib.crc32(feat.encode("utf-8")) & mask
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {bucket: v / norm for bucket, v in counts.items()}
+
+
+def _softmax(scores):
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+# ---- Model ----
+class IntentClassifier:
+    """Linear softmax model over hashed features; ``predict`` returns (intent, confidence)."""
+
+    def __init__(self, labels, dim, weights, bias, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        self.labels = list(labels)
+        self.dim = dim
+        self.weights = weights  # bucket -> [weight per label]; buckets never seen in training are absent
+        self.bias = list(bias)
+        self.min_confidence = min_confidence
+
+    def probabilities(self, text):
+        scores = list(self.bias)
+        n = len(scores)
+        for bucket, value in hashed(text, self.dim).items():
+            row = self.weights.get(bucket)
+            if row is not None:
+                for i in range(n):
+                    scores[i] += row[i] * value
+        return _softmax(scores)
+
+    def predict(self, text):
+        probs = self.probabilities(text)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+    @classmethod
+    def train(cls, rows, dim=2 ** 18, epochs=40, learning_rate=1.0, l2=1e-3, seed=0):
+        """Fit on ``[(text, intent), ...]`` with plain SGD on the cross-entropy loss."""
+        labels = [label for label in INTENTS if any(intent == label for _, intent in rows)]
+        labels += sorted({intent for _, intent in rows} - set(labels))
+        index = {label: i for i, label in enumerate(labels)}
+        n = len(labels)
+        examples = [(hashed(text, dim), index[intent]) for text, intent in rows]
+        weights = {}
+        bias = [0.0] * n
+        order = list(range(len(examples)))
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for j in order:
+                x, y = examples[j]
+                scores = list(bias)
+                for bucket, value in x.items():
+                    row = weights.get(bucket)
+                    if row is not None:
+                        for i in range(n):
+                            scores[i] += row[i] * value
+                probs = _softmax(scores)
+                probs[y] -= 1.0  # gradient of the loss w.r.t. the scores
+                for i in range(n):
+                    bias[i] -= rate * probs[i]
+                for bucket, value in x.items():
+                    row = weights.setdefault(bucket, [0.0] * n)
+                    for i in range(n):
+                        row[i] -= rate * (probs[i] * value + l2 * row[i])
+        return cls(labels, dim, weights, bias)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": MODEL_VERSION,
+            "labels": self.labels,
+            "dim": self.dim,
+            "bias": [round(b, 5) for b in self.bias],
+            "weights": {str(bucket): [round(w, 5) for w in row] for bucket, row in sorted(self.weights.items())},
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        if payload.get("version") != MODEL_VERSION:
+            raise ValueError(f"unsupported intent model version {payload.get('version')!r}")
+        weights = {int(bucket): row for bucket, row in payload["weights"].items()}
+        return cls(payload["labels"], payload["dim"], weights, payload["bias"], min_confidence)
+
+
+# ---- Data ----
+def load_rows(path=DEFAULT_DATA_PATH):
+    """``[(text, intent), ...]`` from a JSONL file."""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                rows.append((row["text"], row["intent"]))
+    return rows
+
+
+def is_heldout(text):
+    """Deterministic 1-in-5 evaluation split, stable as rows are added or reordered."""
+    return zlib.crc32(text.encode("utf-8")) % 5 == 0
+
+
+_classifier = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier():
+    """
+    Shared classifier from PYTHONAUT_INTENT_MODEL (data/intent_model.json by
+    default), or None when it is missing or set to "off" (keyword routing only).
+    """
+    global _classifier, _classifier_loaded
+    if not _classifier_loaded:
+        with _classifier_lock:
+            if not _classifier_loaded:
+                path = os.getenv("PYTHONAUT_INTENT_MODEL", str(DEFAULT_MODEL_PATH))
+                if path.lower() not in ("off", "none", "") and Path(path).exists():
+                    try:
+                        _classifier = IntentClassifier.load(
+                            path, float(os.getenv("PYTHONAUT_INTENT_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE)))
+                    except Exception as e:
+                        print("Failed loading intent model:", e)
+                _classifier_loaded = True
+    return _classifier
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or try the local intent classifier.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit a model on a labeled JSONL set (held-out rows excluded)")
+    train.add_argument("data", nargs="?", default=str(DEFAULT_DATA_PATH))
+    train.add_argument("--model", default=str(DEFAULT_MODEL_PATH))
+    train.add_argument("--dim", type=int, default=2 ** 18, help="hash buckets (a power of two)")
+    train.add_argument("--epochs", type=int, default=40)
+    train.add_argument("--all", action="store_true", help="train on the held-out rows too")
+    predict = sub.add_parser("predict", help="classify one message")
+    predict.add_argument("text")
+    predict.add_argument("--model", default=str(DEFAULT_MODEL_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        if args.dim & (args.dim - 1):
+            sys.exit("--dim must be a power of two")
+        rows = [row for row in load_rows(args.data) if args.all or not is_heldout(row[0])]
+        start = time.perf_counter()
+        model = IntentClassifier.train(rows, dim=args.dim, epochs=args.epochs)
+        model.save(args.model)
+        print(f"Trained on {len(rows)} messages ({len(model.weights)} buckets used) "
+              f"in {time.perf_counter() - start:.2f}s -> {args.model}")
+    else:
+        model = IntentClassifier.load(args.model)
+        start = time.perf_counter()
+        intent, confidence = model.predict(args.text)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{intent} ({confidence:.2f}) in {elapsed:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Process-wide coalescing of identical in-flight generations ("singleflight").
+
+When several sessions ask for exactly the same rendered task at the same
+time, only the first caller (the leader) runs it; the rest block until the
+leader finishes and receive the same result (or the same exception).
+"""
+import hashlib
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run ``fn()`` once per key at a time; concurrent callers share its outcome."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+            waiting = sum(call.waiters for call in self._calls.values())
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+            "waiting": waiting,
+        }
+
+
+def flight_key(agent_role, task_description):
+    """Key for a generation: the agent role plus the fully rendered task description."""
+    raw = f"{agent_role}\x1f{task_description}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+inflight_generations = SingleFlight()
@@ -0,0 +1,259 @@
+"""
+Find the Python code in a student message: code, prose, or a mix of both.
+
+Fenced blocks (```...```) are code by definition. Outside them every line
+is run through ``tokenize`` on its own and judged by token shape rather
+than by substrings: a statement keyword leading a well-formed line, an
+assignment, a call or subscript glued to its name, a decorator or a REPL
+prompt all count as code, while a run of three or more plain names in a row
+("what does this do") or a stray apostrophe ("don't") marks English. Open
+brackets and triple-quoted strings carry a code line on to the lines that
+continue it. Consecutive code lines, with the blank and comment lines
+between them, become one span; ``ast`` then confirms borderline one-line
+spans. Each line is looked at a fixed number of times, so a 5,000-line
+paste stays linear.
+"""
+import ast
+import io
+import keyword
+import re
+import textwrap
+import tokenize
+from collections import namedtuple
+
+CodeSpan = namedtuple("CodeSpan", "start end text fenced")  # 1-based, inclusive line numbers
+
+
+class Detection(namedtuple("Detection", "kind spans prose")):
+    """``kind`` is "code", "prose" or "mixed"; ``prose`` is the message without its code lines."""
+
+    __slots__ = ()
+
+    @property
+    def code(self):
+        """The code spans joined, ready to review; empty for prose."""
+        return "\n\n".join(span.text for span in self.spans)
+
+
+# Keywords that start a statement; the compound ones normally end their line with ":"
+SIMPLE_STATEMENTS = frozenset(("import", "from", "return", "raise", "assert", "pass", "break", "continue",
+                               "del", "global", "nonlocal", "yield", "await", "lambda"))
+COMPOUND_STATEMENTS = frozenset(("def", "class", "if", "elif", "else", "for", "while", "try", "except",
+                                 "finally", "with", "async"))
+STATEMENT_KEYWORDS = SIMPLE_STATEMENTS | COMPOUND_STATEMENTS
+
+ASSIGN_OPS = frozenset(("=", "+=", "-=", "*=", "/=", "//=", "%=", "**=", "|=", "&=", "^=", ">>=", "<<=", "@=", ":="))
+OPENING = {"(": 1, "[": 1, "{": 1, ")": -1, "]": -1, "}": -1}
+
+# Characters without which a line (not starting with a statement keyword) can't be code
+_CODE_CHARS = re.compile(r"[=(\[{:.@'\"]")
+_FIRST_WORD = re.compile(r"[A-Za-z_]+")
+_LEADING_WORDS = re.compile(r"([A-Za-z_]\w*)[ \t]+([A-Za-z_]\w*)[ \t]+([A-Za-z_]\w*)\b")
+_FENCE = "```"
+_PROMPT = re.compile(r"^\s*(?:>>>|\.\.\.)(?: |$)")
+_TRIPLE_QUOTE = re.compile(r"'''|\"\"\"")
+
+CODE, PROSE, NEUTRAL, FENCE = "code", "prose", "neutral", "fence"
+
+
+SKIPPED_TOKENS = frozenset((tokenize.NEWLINE, tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT,
+                            tokenize.ENDMARKER))
+
+
+def _tokens(line):
+    """
+    Tokens of one line, lazily. Stops quietly where a line is left open (bracket,
+    string), and yields None for a stray character Python can't tokenize.
+    """
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(line + "\n").readline):
+            if token.type == tokenize.ERRORTOKEN and not token.string.isspace():
+                yield None
+                return
+            if token.type not in SKIPPED_TOKENS:
+                yield token
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+
+
+def _classify(line):
+    """(CODE, PROSE or NEUTRAL, bracket depth change) for one line outside a fence."""
+    stripped = line.strip()
+    if not stripped or stripped.startswith("#"):
+        return NEUTRAL, 0
+    prompt = _PROMPT.match(line)
+    if prompt:
+        stripped = line[prompt.end():].strip()
+        if not stripped:
+            return CODE, 0
+    first = _FIRST_WORD.match(stripped)
+    first = first.group() if first else ""
+    if not prompt and first not in STATEMENT_KEYWORDS and not _CODE_CHARS.search(stripped):
+        return PROSE, 0
+    words = _LEADING_WORDS.match(stripped)
+    if words and not any(keyword.iskeyword(word) for word in words.groups()):
+        # Three plain names in a row, as below, without starting the tokenizer
+        return PROSE, 0
+
+    depth = 0
+    run = 0
+    signal = bool(prompt) or stripped.startswith("@")
+    tokens = []
+    previous = None
+    # Lazily, so English is usually rejected a few words in
+    for token in _tokens(stripped):
+        if token is None:
+            return PROSE, 0
+        tokens.append(token)
+        if token.type == tokenize.NAME and not keyword.iskeyword(token.string):
+            run += 1
+            if run >= 3:
+                # "what does this do", "I want to learn": English, whatever else is on the line
+                return PROSE, 0
+        else:
+            run = 0
+        if token.type == tokenize.OP:
+            depth += OPENING.get(token.string, 0)
+            if previous is not None:
+                glued = previous.end == token.start
+                if token.string in ASSIGN_OPS and previous.string not in ("(", ","):
+                    signal = True
+                elif glued and token.string in "([" and (previous.type == tokenize.NAME or previous.string in ")]"):
+                    signal = True
+        elif (token.type == tokenize.NAME and previous is not None and previous.string == "."
+              and previous.end == token.start and len(token.string) > 1):
+            signal = True  # attribute access: os.path, self.name
+        previous = token
+    if not tokens:
+        return NEUTRAL, 0
+
+    head = tokens[0].string
+    if head in COMPOUND_STATEMENTS:
+        signal = signal or stripped.endswith(":")
+    elif head in SIMPLE_STATEMENTS:
+        signal = True
+    elif (head in ("print", "exec") and len(tokens) > 1
+          and tokens[1].type in (tokenize.STRING, tokenize.NUMBER)):
+        signal = True  # Python 2 print statement, a classic beginner paste
+    return (CODE if signal else PROSE), depth
+
+
+def _confirmed(lines):
+    """Whether a one-line span is code: it parses, or leads with a statement keyword (broken code counts)."""
+    text = textwrap.dedent("\n".join(lines))
+    stripped = _PROMPT.sub("", text).strip()
+    first = _FIRST_WORD.match(stripped)
+    if first and (first.group() in STATEMENT_KEYWORDS or first.group() in ("print", "exec")):
+        return True
+    try:
+        ast.parse(stripped)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def detect_code(text):
+    """Classify ``text`` and extract its code spans (see module docstring)."""
+    lines = text.splitlines()
+    spans = []
+    prose = {}  # line index -> the part of that line that isn't code
+    labels = [None] * len(lines)
+
+    # ---- Fenced blocks ----
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        fence = line.find(_FENCE)
+        if fence < 0:
+            i += 1
+            continue
+        labels[i] = FENCE
+        prose[i] = line[:fence]
+        after = line[fence + len(_FENCE):]
+        closing = after.find(_FENCE)
+        if closing >= 0:
+            # ```x = 1``` on one line
+            if after[:closing].strip():
+                spans.append(CodeSpan(i + 1, i + 1, after[:closing].strip(), True))
+            prose[i] += " " + after[closing + len(_FENCE):]
+            i += 1
+            continue
+        # Whatever follows the opening fence on its line is the language tag (```python)
+        j = i + 1
+        while j < len(lines) and _FENCE not in lines[j]:
+            labels[j] = FENCE
+            j += 1
+        body = lines[i + 1:j]
+        if j < len(lines):
+            labels[j] = FENCE
+            close = lines[j].find(_FENCE)
+            if lines[j][:close].strip():
+                body.append(lines[j][:close])
+            prose[j] = lines[j][close + len(_FENCE):]
+        if any(line.strip() for line in body):
+            spans.append(CodeSpan(i + 2, i + 1 + len(body), "\n".join(body), True))
+        i = j + 1
+
+    # ---- Unfenced lines ----
+    depth = 0
+    quote = None
+    last = None  # label of the nearest line above that isn't blank or a comment
+    for i, line in enumerate(lines):
+        if labels[i] == FENCE:
+            depth, quote, last = 0, None, None
+            continue
+        if quote is not None:
+            # Inside a triple-quoted string opened by a code line
+            label = CODE
+            if line.count(quote) % 2:
+                quote = None
+        elif depth > 0 and last == CODE:
+            # Continuation of an open bracket
+            label = CODE
+            depth = max(0, depth + sum(OPENING.get(ch, 0) for ch in line))
+        else:
+            label, change = _classify(line)
+            if label == PROSE and last == CODE and line[:1].isspace() and not _looks_like_words(line):
+                # An indented line under code is part of its block unless it reads as English
+                label = CODE
+            opened = _TRIPLE_QUOTE.findall(line)
+            if len(opened) % 2 and (CODE in (label, last) or line.lstrip().startswith(opened[0])):
+                # Opens a triple-quoted string (a docstring, or a string being assigned)
+                label = CODE
+                quote = opened[-1]
+            depth = max(0, change) if label == CODE else 0
+        labels[i] = label
+        if label != NEUTRAL:
+            last = label
+
+    # ---- Spans ----
+    start = None
+    for i in range(len(lines) + 1):
+        label = labels[i] if i < len(lines) else FENCE
+        if label == CODE:
+            if start is None:
+                start = i
+                # Comments directly above the code belong to it
+                while start > 0 and labels[start - 1] == NEUTRAL and lines[start - 1].strip().startswith("#"):
+                    start -= 1
+            end = i
+        elif label in (PROSE, FENCE):
+            if start is not None:
+                block = lines[start:end + 1]
+                if end > start or _confirmed(block):
+                    spans.append(CodeSpan(start + 1, end + 1, "\n".join(block), False))
+                else:
+                    prose.update((j, lines[j]) for j in range(start, end + 1))
+                start = None
+            if label == PROSE:
+                prose[i] = lines[i]
+    spans.sort(key=lambda span: span.start)
+
+    prose = "\n".join(prose[i] for i in sorted(prose) if prose[i].strip())
+    kind = "mixed" if spans and prose else "code" if spans else "prose"
+    return Detection(kind, spans, prose)
+
+
+def _looks_like_words(line):
+    words = line.split()
+    return len(words) >= 3 and all(word.isalpha() for word in words[:3])
@@ -0,0 +1,241 @@
+"""
+Bounded conversation context for task prompts.
+
+Every task gets one fixed-size context block. It holds a compact running
+summary of the older turns, plus as many recent turns, trimmed, as fit in
+the budget. The summary is built locally, without an LLM call, and kept per
+session, so each request only summarizes the turns that just left the
+recent window.
+
+Tokens are counted with litellm's tokenizer estimate for the agents' model
+when litellm is installed, and at about 4 characters per token otherwise.
+``prompt_metrics`` records the rendered prompt size of every agent request;
+``gauges`` flattens it for the /metrics endpoint.
+"""
+import importlib.util
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from TutorAgents import LLM_MODEL
+
+CODE_FENCE_RE = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+HEADING_RE = re.compile(r"^\s*#+\s*(.+)$", re.MULTILINE)
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+SUMMARY_HEADER = "Summary of earlier conversation:\n"
+RECENT_HEADER = "\n\nRecent messages:\n"
+_NON_METRIC = re.compile(r"[^a-z0-9]+")
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def _approx_tokens(text):
+    return (len(text) + 3) // 4
+
+
+def count_tokens(text):
+    """Token estimate for ``text`` under the agents' model."""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                counter = _approx_tokens
+                if importlib.util.find_spec("litellm") is not None:
+                    try:
+                        from litellm import token_counter
+
+                        token_counter(model=LLM_MODEL, text="warm up")
+                        counter = lambda t: token_counter(model=LLM_MODEL, text=t)  # noqa: E731
+                    except Exception as e:
+                        print("Falling back to approximate token counts:", e)
+                _counter = counter
+    return _counter(text) if text else 0
+
+
+def _clip(text, max_tokens):
+    """Trim text to roughly ``max_tokens``, on a word boundary."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    clipped = text[:max_tokens * 4].rsplit(" ", 1)[0]
+    while clipped and count_tokens(clipped + " ...") > max_tokens:
+        clipped = clipped[:int(len(clipped) * 0.8)].rsplit(" ", 1)[0]
+    return clipped + " ..."
+
+
+def _plain(text):
+    return " ".join(CODE_FENCE_RE.sub(" [code] ", text).split())
+
+
+def summarize_message(message, max_words=16):
+    """One summary line for a message: its first heading or first sentence."""
+    content = message.get("content") or ""
+    heading = HEADING_RE.search(content) if message.get("role") == "assistant" else None
+    gist = heading.group(1) if heading else SENTENCE_END_RE.split(_plain(content), 1)[0]
+    words = gist.replace("*", "").split()
+    gist = " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+    who = "Student asked" if message.get("role") == "user" else "Tutor replied"
+    return f"- {who}: {gist}"
+
+
+class ConversationContext:
+    """
+    Render history into a context block of at most ``budget_tokens``.
+
+    ``summary_tokens`` of the budget is reserved for the running summary.
+    Each recent turn is clipped to ``turn_tokens`` so one long lesson can't
+    push every other turn out of the window.
+    """
+
+    def __init__(self, budget_tokens=600, summary_tokens=180, turn_tokens=150, max_sessions=1024):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.turn_tokens = turn_tokens
+        self.max_sessions = max_sessions
+        self._summaries = OrderedDict()   # session_id -> {"upto": int, "lines": list, "last": dict}
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.context_tokens = 0
+        self.max_context_tokens = 0
+
+    def render(self, session_id, history):
+        """Return (context_text, tokens) for the messages before the current one."""
+        # Tutor messages before the student's first one are the canned greeting, not conversation;
+        # a first question then renders no context and stays cacheable
+        first = next((i for i, message in enumerate(history) if message.get("role") == "user"), len(history))
+        history = history[first:]
+        if not history:
+            return "", 0
+
+        # Newest turns first, until the recent share of the budget is used up
+        recent_budget = self.budget_tokens - self.summary_tokens - count_tokens(SUMMARY_HEADER + RECENT_HEADER)
+        recent = []
+        used = 0
+        start = len(history)
+        for message in reversed(history):
+            line = f"{'student' if message.get('role') == 'user' else 'tutor'}: " \
+                   f"{_clip(_plain(message.get('content') or ''), self.turn_tokens)}"
+            tokens = count_tokens(line)
+            if used + tokens > recent_budget:
+                break
+            recent.append(line)
+            used += tokens
+            start -= 1
+        recent.reverse()
+
+        summary = self._summary(session_id, history, start)
+        parts = []
+        if summary:
+            parts.append(SUMMARY_HEADER + summary)
+        if recent:
+            parts.append(RECENT_HEADER + "\n".join(recent))
+        text = "".join(parts).strip()
+        tokens = count_tokens(text)
+        with self._lock:
+            self.renders += 1
+            self.context_tokens += tokens
+            self.max_context_tokens = max(self.max_context_tokens, tokens)
+        return text, tokens
+
+    def stats(self):
+        with self._lock:
+            return {
+                "renders": self.renders,
+                "avg_context_tokens": self.context_tokens / self.renders if self.renders else 0.0,
+                "max_context_tokens": self.max_context_tokens,
+                "sessions": len(self._summaries),
+            }
+
+    def _summary(self, session_id, history, upto):
+        """Running summary of history[:upto], extended incrementally per session."""
+        with self._lock:
+            state = self._summaries.get(session_id)
+            if state is None or state["upto"] > upto or (
+                    state["upto"] and history[state["upto"] - 1] != state["last"]):
+                # New session, or the history was reset: start over
+                state = {"upto": 0, "lines": [], "last": None}
+            self._summaries[session_id] = state
+            self._summaries.move_to_end(session_id)
+            while len(self._summaries) > self.max_sessions:
+                self._summaries.popitem(last=False)
+
+            for message in history[state["upto"]:upto]:
+                state["lines"].append(summarize_message(message))
+            state["upto"] = max(state["upto"], upto)
+            # Remember the last summarized message to notice a reset later
+            state["last"] = history[state["upto"] - 1] if state["upto"] else None
+
+            # Keep the newest summary lines that fit; older ones fall off
+            lines = []
+            used = 0
+            for line in reversed(state["lines"]):
+                tokens = count_tokens(line)
+                if used + tokens > self.summary_tokens:
+                    break
+                lines.append(line)
+                used += tokens
+            del state["lines"][:len(state["lines"]) - len(lines)]
+            return "\n".join(reversed(lines))
+
+
+class PromptMetrics:
+    """
+    Prompt token counts for recent requests, per agent and task type.
+    ``system_tokens`` is the agent's role/goal/backstory (sent on every call),
+    ``task_tokens`` the rendered task description and expected output.
+    """
+
+    def __init__(self, keep=1000):
+        self._records = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def record(self, agent, task_type, system_tokens, task_tokens):
+        with self._lock:
+            self._records.append((time.time(), agent, task_type, system_tokens, task_tokens))
+
+    def stats(self):
+        """{"<agent> / <task type>": {requests, avg_system_tokens, avg_task_tokens, avg_prompt_tokens, max_prompt_tokens}}"""
+        with self._lock:
+            records = list(self._records)
+        grouped = {}
+        for _, agent, task_type, system_tokens, task_tokens in records:
+            entry = grouped.setdefault(f"{agent} / {task_type}", {"requests": 0, "system": 0, "task": 0,
+                                                                  "max_prompt_tokens": 0})
+            entry["requests"] += 1
+            entry["system"] += system_tokens
+            entry["task"] += task_tokens
+            entry["max_prompt_tokens"] = max(entry["max_prompt_tokens"], system_tokens + task_tokens)
+        for entry in grouped.values():
+            requests = entry["requests"]
+            entry["avg_system_tokens"] = entry.pop("system") / requests
+            entry["avg_task_tokens"] = entry.pop("task") / requests
+            entry["avg_prompt_tokens"] = entry["avg_system_tokens"] + entry["avg_task_tokens"]
+        return grouped
+
+    def gauges(self):
+        """``stats()`` as flat numeric values named <agent>_<task type>_<stat>, for a metrics collector."""
+        flat = {}
+        for group, entry in self.stats().items():
+            name = _NON_METRIC.sub("_", group.lower()).strip("_")
+            for stat, value in entry.items():
+                flat[f"{name}_{stat}"] = value
+        return flat
+
+
+prompt_metrics = PromptMetrics()
+
+_context = None
+_context_lock = threading.Lock()
+
+
+def get_conversation_context():
+    """Process-wide ConversationContext (sized by PYTHONAUT_CONTEXT_TOKENS)."""
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                budget = int(os.getenv("PYTHONAUT_CONTEXT_TOKENS", "600"))
+                _context = ConversationContext(budget_tokens=budget, summary_tokens=budget * 3 // 10)
+    return _context
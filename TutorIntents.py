@@ -0,0 +1,185 @@
+"""
+Intent phrase tables and the compiled matcher that scans a message for them.
+
+Every phrase of every table is compiled once, at import, into one regex
+shaped like a trie (phrases sharing a prefix share a branch), wrapped in a
+lookahead so a single ``finditer`` pass reports the longest phrase starting
+at each position. Shorter phrases that are prefixes of it are added from a
+table built at compile time, so ``scan`` returns every occurrence of every
+phrase with its position. Phrases match whole words only ("hi" doesn't match
+"this", "on" doesn't match "python"); an edge that is punctuation or a space,
+like the "(" in "print(", needs no boundary.
+"""
+import re
+from collections import namedtuple
+
+# ---- Phrase tables ----
+TEACHING_PHRASES = [
+    "teach me", "explain", "what is", "how to", "learn python",
+    "step by step", "from start", "beginner guide", "tutorial",
+    "concept", "lesson", "course", "understand", "help me learn",
+    "what are", "how do i", "can you show me", "demonstrate",
+    "tell me about", "i want to learn", "show me how",
+    # Forms the old substring match caught implicitly
+    "explaining", "tutorials", "concepts", "lessons", "courses", "understanding"
+]
+
+CODE_REVIEW_PHRASES = [
+    "review my code", "check this code", "debug", "code review",
+    "what's wrong", "whats wrong", "error", "fix this",
+    "why isn't this working", "can you tell me whats wrong",
+    "what is wrong with this", "help with this code",
+    "why is this not working", "this code doesn't work",
+    "fix my code", "bug in my code", "help me fix",
+    "syntax error", "runtime error", "logic error",
+    "debugging", "errors"
+]
+
+QUIZ_PHRASES = [
+    "quiz", "test me", "question", "exam", "assessment",
+    "challenge me", "test my knowledge", "practice questions",
+    "multiple choice", "trivia", "pop quiz",
+    "questions", "quizzes", "exams"
+]
+
+CURRICULUM_PHRASES = [
+    "curriculum", "learning path", "syllabus", "study plan",
+    "roadmap", "learning journey", "what should i learn",
+    "where to start", "how to learn python", "study guide",
+    "learning schedule", "course outline"
+]
+
+# Signs that a message containing code is asking something about it
+QUESTION_CUES = ["?", "what", "why", "how", "help"]
+
+# Small-talk categories, in priority order (the first category found wins)
+CONVERSATIONAL_PHRASES = {
+    # Greetings
+    "greeting": ["hi", "hello", "hey", "hola", "greetings", "good morning", "good afternoon", "good evening"],
+    # Thanks
+    "thanks": ["thank", "thanks", "appreciate", "grateful", "cheers", "thx"],
+    # Goodbyes
+    "goodbye": ["bye", "goodbye", "see you", "farewell", "cya", "see ya"],
+    # How are you
+    "how_are_you": ["how are you", "how's it going", "what's up", "how do you do"],
+    # Positive feedback
+    "positive": ["great", "awesome", "amazing", "wonderful", "perfect", "excellent", "good", "nice", "cool"],
+    # Negative feedback
+    "negative": ["bad", "terrible", "awful", "horrible", "not good", "sucks"],
+    # Confusion
+    "confusion": ["confused", "don't understand", "not clear", "help me", "what does this mean"],
+    # Agreement
+    "agreement": ["yes", "yeah", "yep", "sure", "okay", "ok", "alright", "of course"],
+    # Disagreement
+    "disagreement": ["no", "nope", "nah", "not really", "disagree"],
+    # Encouragement
+    "encouragement": ["wow", "impressive", "brilliant", "fantastic", "well done"],
+    # Apologies
+    "apology": ["sorry", "apologize", "my bad", "oops", "whoops"]
+}
+
+INTENT_TABLES = dict(
+    teaching=TEACHING_PHRASES,
+    code_review=CODE_REVIEW_PHRASES,
+    quiz=QUIZ_PHRASES,
+    curriculum=CURRICULUM_PHRASES,
+    question=QUESTION_CUES,
+    **CONVERSATIONAL_PHRASES,
+)
+
+
+# ---- Matcher ----
+Match = namedtuple("Match", "intent phrase start end")
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _trie_pattern(node):
+    # node: {char: child, "": tail} where "" marks the end of a phrase and holds its tail guard
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if "" in node:
+        # Listed last so the longest phrase wins; the guard keeps word-final phrases from ending mid-word
+        branches.append(node[""])
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+class PhraseMatcher:
+    """Finds every phrase of ``{intent: [phrases]}`` in a text in one regex pass."""
+
+    def __init__(self, tables):
+        self._intents = {}
+        for intent, phrases in tables.items():
+            for phrase in phrases:
+                owners = self._intents.setdefault(phrase.lower(), [])
+                if intent not in owners:
+                    owners.append(intent)
+
+        root = {}
+        for phrase in self._intents:
+            node = root
+            for ch in phrase:
+                node = node.setdefault(ch, {})
+            node[""] = r"(?!\w)" if _is_word(phrase[-1]) else ""
+        word_first = {ch: child for ch, child in root.items() if _is_word(ch)}
+        other_first = {ch: child for ch, child in root.items() if not _is_word(ch)}
+        alternatives = []
+        if word_first:
+            alternatives.append(r"(?<!\w)" + _trie_pattern(word_first))
+        if other_first:
+            alternatives.append(_trie_pattern(other_first))
+        source = "(?=(" + "|".join(alternatives) + "))"
+        # Scanning lowercased text is about twice as fast as IGNORECASE, which is kept
+        # for the rare text whose length changes when lowercased
+        self.pattern = re.compile(source)
+        self._pattern_ignorecase = re.compile(source, re.IGNORECASE)
+
+        # Everything reported when ``phrase`` is the longest match at a position: it and its
+        # whole-word prefixes, each once per intent, as (intent, phrase, length)
+        self._expansions = {}
+        for phrase in self._intents:
+            prefixes = [other for other in self._intents
+                        if len(other) < len(phrase) and phrase.startswith(other)
+                        and not (_is_word(other[-1]) and _is_word(phrase[len(other)]))]
+            self._expansions[phrase] = [(intent, hit, len(hit)) for hit in [phrase] + prefixes
+                                        for intent in self._intents[hit]]
+
+    def scan(self, text, skip=None):
+        """
+        Every phrase occurrence in ``text`` as ``Match`` tuples, in order of
+        position. Regions matched by the compiled regex ``skip`` (e.g. code
+        blocks) are not scanned.
+        """
+        lower = text.lower()
+        if len(lower) == len(text):
+            pattern, text = self.pattern, lower
+        else:
+            pattern = self._pattern_ignorecase
+        matches = []
+        start = 0
+        for region in (skip.finditer(text) if skip is not None else ()):
+            self._scan_range(pattern, text, start, region.start(), matches)
+            start = region.end()
+        self._scan_range(pattern, text, start, len(text), matches)
+        return matches
+
+    def _scan_range(self, pattern, text, pos, endpos, matches):
+        expansions = self._expansions
+        for found in pattern.finditer(text, pos, endpos):
+            start = found.start()
+            # Empty for case-insensitive matches that don't lower() back to a phrase (e.g. the Kelvin sign)
+            for intent, phrase, length in expansions.get(found.group(1).lower(), ()):
+                matches.append(Match(intent, phrase, start, start + length))
+
+    def intents(self, text, skip=None):
+        """``{intent: [Match, ...]}`` for the intents found in ``text``, in order of first occurrence."""
+        found = {}
+        for match in self.scan(text, skip):
+            found.setdefault(match.intent, []).append(match)
+        return found
+
+
+INTENT_MATCHER = PhraseMatcher(INTENT_TABLES)
@@ -0,0 +1,212 @@
+"""
+Process-wide background job queue for agent generations.
+
+``JobQueue.submit`` hands a generation to a shared worker pool and returns a
+``Job`` handle straight away, so the Streamlit script thread never blocks on
+``crew.kickoff()``. The UI polls the handle for streamed partial text and
+the final result. Each owner (browser session) has its own concurrency
+limit. Jobs can be cancelled, and they time out after ``timeout`` seconds.
+
+Python threads can't be killed. A job cancelled or timed out while it is
+running is therefore only *abandoned*: its handle is final at once and its
+owner's slot is freed, but the worker finishes the LLM call and throws the
+result away. A job still waiting in the queue never starts.
+"""
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+FINISHED = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+class JobLimitError(RuntimeError):
+    """Raised by ``submit`` when the owner already has too many active jobs."""
+
+
+class Job:
+    """Handle for one submitted generation."""
+
+    def __init__(self, job_id, owner, timeout, clock=time.monotonic):
+        self.id = job_id
+        self.owner = owner
+        self.timeout = timeout
+        self.clock = clock
+        self.submitted_at = clock()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._status = QUEUED
+        self._text = ""
+        self._restarts = 0
+        self._future = None
+        self._lock = threading.Lock()
+
+    # ---- Worker side ----
+    def emit(self, delta, restarted=False):
+        """Stream sink: append visible answer text (``restarted`` clears what was there)."""
+        with self._lock:
+            if self._status in FINISHED:
+                return
+            if restarted:
+                self._text = delta
+                self._restarts += 1
+            else:
+                self._text += delta
+
+    def _start(self):
+        with self._lock:
+            self._expire()
+            if self._status != QUEUED:
+                return False
+            self._status = RUNNING
+            self.started_at = self.clock()
+            return True
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self._expire()
+            if self._status in FINISHED:
+                return
+            self.result = result
+            self.error = error
+            self._status = FAILED if error is not None else DONE
+            self.finished_at = self.clock()
+
+    def _expire(self):
+        # Callers hold self._lock
+        if self._status not in FINISHED and self.timeout and self.clock() - self.submitted_at > self.timeout:
+            self._status = TIMED_OUT
+            self.finished_at = self.clock()
+
+    # ---- UI side ----
+    @property
+    def status(self):
+        with self._lock:
+            self._expire()
+            return self._status
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    @property
+    def text(self):
+        """Answer text streamed so far."""
+        with self._lock:
+            return self._text
+
+    def snapshot(self):
+        """
+        (restarts, text): the text streamed so far and how many times it started
+        over. While ``restarts`` is unchanged, a later ``text`` extends this one.
+        """
+        with self._lock:
+            return self._restarts, self._text
+
+    def cancel(self):
+        """Stop waiting for this job; returns False if it had already finished."""
+        with self._lock:
+            self._expire()
+            if self._status in FINISHED:
+                return False
+            self._status = CANCELLED
+            self.finished_at = self.clock()
+        if self._future is not None:
+            # Only succeeds while the job is still queued
+            self._future.cancel()
+        return True
+
+
+class JobQueue:
+    """Shared worker pool with per-owner concurrency limits, cancellation and timeouts."""
+
+    def __init__(self, max_workers=8, per_owner_limit=1, timeout=180.0, keep_finished=600.0):
+        self.max_workers = max_workers
+        self.per_owner_limit = per_owner_limit
+        self.timeout = timeout
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pythonaut-job")
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+
+    def submit(self, owner, fn, timeout=None):
+        """
+        Queue ``fn(job)`` and return its ``Job``. ``fn`` may call ``job.emit``
+        to publish partial text; its return value becomes ``job.result``.
+        """
+        with self._lock:
+            self._prune()
+            active = sum(1 for job in self._jobs.values() if job.owner == owner and not job.finished)
+            if active >= self.per_owner_limit:
+                self.rejected += 1
+                raise JobLimitError(f"{owner} already has {active} job(s) running")
+            job = Job(f"job-{next(self._ids)}", owner, self.timeout if timeout is None else timeout)
+            self._jobs[job.id] = job
+            self.submitted += 1
+        job._future = self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        if not job._start():
+            return
+        try:
+            result = fn(job)
+        except Exception as e:
+            job._finish(error=e)
+        else:
+            job._finish(result=result)
+
+    def get(self, job_id, owner=None):
+        """Look a job up by id; returns None if unknown, pruned or owned by someone else."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def _prune(self):
+        # Callers hold self._lock; forget finished jobs nobody collected
+        now = time.monotonic()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished_at > self.keep_finished]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        counts = {status: statuses.count(status) for status in (QUEUED, RUNNING) + FINISHED}
+        counts.update(submitted=self.submitted, rejected=self.rejected, workers=self.max_workers)
+        return counts
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Process-wide JobQueue configured by PYTHONAUT_JOB_WORKERS,
+    PYTHONAUT_JOBS_PER_USER and PYTHONAUT_JOB_TIMEOUT (seconds, 0 = none).
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(
+                    max_workers=int(os.getenv("PYTHONAUT_JOB_WORKERS", "8")),
+                    per_owner_limit=int(os.getenv("PYTHONAUT_JOBS_PER_USER", "1")),
+                    timeout=float(os.getenv("PYTHONAUT_JOB_TIMEOUT", "180")),
+                )
+    return _queue
@@ -0,0 +1,432 @@
+"""
+Process-wide gate in front of the model provider.
+
+``LLMPool`` bounds how many model calls run at once, in total and per model,
+so a burst of sessions queues here instead of turning into a burst of 429s
+at OpenRouter. Calls that fail with a rate limit, a 5xx or a connection
+error are retried with jittered exponential backoff (honouring Retry-After)
+and give up their slot while they wait. ``build_pooled_llm`` returns a
+CrewAI ``LLM`` whose calls go through the pool over one keep-alive HTTP
+client shared by the whole process.
+
+``ModelRouter`` picks the model and ``max_tokens`` for each call from a
+per-agent, per-intent route (see ``MODEL_ROUTES`` in TutorAgents). It keeps
+a rolling window of latency and errors per model and moves to the next
+candidate while the preferred one breaches the route's p95 SLO or error
+budget. Once its bad samples age out of the window, the preferred model is
+tried again. ``build_routed_llm`` gives an agent an LLM that asks the router
+on every call.
+
+A retried or failed-over call streams its answer again from the start, so
+before each new attempt the stream sink is told to clear what the failed one
+showed (``TutorStreaming.restart_stream``).
+"""
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from TutorStreaming import restart_stream
+from TutorTracing import current_intent, current_span, metrics, span
+
+# Worth another try: timeouts, conflicts, rate limits and server-side failures
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# litellm/openai exception names for failures that carry no status code
+RETRYABLE_ERRORS = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError", "Timeout",
+    "ServiceUnavailableError", "InternalServerError", "BadGatewayError",
+}
+
+
+def _status_of(error):
+    for obj in (error, getattr(error, "response", None)):
+        status = getattr(obj, "status_code", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_retryable(error):
+    status = _status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait (Retry-After header), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class LLMPool:
+    """Global and per-model concurrency limits plus retries with backoff for model calls."""
+
+    def __init__(self, max_concurrency=16, per_model_limit=None, retries=4, backoff_base=0.5, backoff_max=20.0):
+        self.max_concurrency = max_concurrency
+        self.per_model_limit = per_model_limit or max_concurrency
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._global = threading.BoundedSemaphore(max_concurrency)
+        self._models = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.waiting_peak = 0
+        self.calls = 0
+        self.retried = 0
+        self.failures = 0
+
+    def _model_semaphore(self, model):
+        with self._lock:
+            semaphore = self._models.get(model)
+            if semaphore is None:
+                semaphore = self._models[model] = threading.BoundedSemaphore(self.per_model_limit)
+            return semaphore
+
+    @contextmanager
+    def slot(self, model):
+        """Hold one global and one per-model slot for the duration of a call."""
+        model_semaphore = self._model_semaphore(model)
+        with self._lock:
+            self.waiting += 1
+            self.waiting_peak = max(self.waiting_peak, self.waiting)
+        try:
+            with span("llm_queue", model=model):
+                # Model slot first, so a call stuck behind its model's limit doesn't hold a global slot
+                model_semaphore.acquire()
+                try:
+                    self._global.acquire()
+                except BaseException:
+                    model_semaphore.release()
+                    raise
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        # Only a call that got both slots is in flight; an interrupted wait never was
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            self._global.release()
+            model_semaphore.release()
+            with self._lock:
+                self.in_flight -= 1
+
+    def backoff(self, attempt, error=None):
+        """Delay before retry number ``attempt`` (0-based): Retry-After if given, else equal-jitter exponential."""
+        delay = retry_after(error)
+        if delay is None:
+            ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        return min(delay, self.backoff_max)
+
+    def call(self, model, fn):
+        """Run ``fn()`` inside a slot for ``model``, retrying transient provider failures."""
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                with self.slot(model):
+                    return fn()
+            except Exception as e:
+                if attempt >= self.retries or not is_retryable(e):
+                    with self._lock:
+                        self.failures += 1
+                    metrics.inc("llm_failures", model=model, error=type(e).__name__)
+                    raise
+                delay = self.backoff(attempt, e)
+                with self._lock:
+                    self.retried += 1
+                metrics.inc("llm_retries", model=model, reason=_status_of(e) or type(e).__name__)
+                # Whatever the failed attempt streamed is about to be streamed again
+                restart_stream()
+                time.sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "waiting_peak": self.waiting_peak,
+                "calls": self.calls,
+                "retries": self.retried,
+                "failures": self.failures,
+                "max_concurrency": self.max_concurrency,
+                "per_model_limit": self.per_model_limit,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool():
+    """
+    Process-wide LLMPool configured by PYTHONAUT_LLM_MAX_CONCURRENCY,
+    PYTHONAUT_LLM_MAX_PER_MODEL, PYTHONAUT_LLM_RETRIES, PYTHONAUT_LLM_BACKOFF
+    and PYTHONAUT_LLM_BACKOFF_MAX (seconds).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                per_model = int(os.getenv("PYTHONAUT_LLM_MAX_PER_MODEL", "0"))
+                _pool = LLMPool(
+                    max_concurrency=int(os.getenv("PYTHONAUT_LLM_MAX_CONCURRENCY", "16")),
+                    per_model_limit=per_model or None,
+                    retries=int(os.getenv("PYTHONAUT_LLM_RETRIES", "4")),
+                    backoff_base=float(os.getenv("PYTHONAUT_LLM_BACKOFF", "0.5")),
+                    backoff_max=float(os.getenv("PYTHONAUT_LLM_BACKOFF_MAX", "20")),
+                )
+    return _pool
+
+
+def install_http_client(max_connections, timeout=120.0):
+    """Give litellm one pooled keep-alive HTTP client for the process (first caller wins)."""
+    import httpx
+    import litellm
+
+    with _pool_lock:
+        if getattr(litellm, "client_session", None) is None:
+            litellm.client_session = httpx.Client(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                    keepalive_expiry=60.0),
+                timeout=httpx.Timeout(timeout, connect=10.0),
+            )
+    return litellm.client_session
+
+
+_pooled_class = None
+
+
+def _pooled_llm_class():
+    global _pooled_class
+    if _pooled_class is None:
+        from crewai import LLM
+
+        class PooledLLM(LLM):
+            """CrewAI LLM whose calls wait for a pool slot and retry transient failures."""
+
+            def call(self, *args, **kwargs):
+                parent = super()
+                return get_llm_pool().call(self.model, lambda: parent.call(*args, **kwargs))
+
+        _pooled_class = PooledLLM
+    return _pooled_class
+
+
+def build_pooled_llm(**kwargs):
+    """``crewai.LLM(**kwargs)`` with its calls routed through the process-wide pool."""
+    pool = get_llm_pool()
+    try:
+        install_http_client(pool.max_concurrency)
+    except Exception as e:
+        # litellm falls back to its own per-call clients
+        print("Failed installing pooled HTTP client:", e)
+    return _pooled_llm_class()(**kwargs)
+
+
+# ---- Model routing ----
+class ModelHealth:
+    """Rolling latency and outcome samples for one model serving one agent."""
+
+    def __init__(self, window=300.0, max_samples=200):
+        self.window = window
+        self._samples = deque(maxlen=max_samples)   # (monotonic time, seconds, ok)
+
+    def record(self, seconds, ok):
+        self._samples.append((time.monotonic(), seconds, ok))
+
+    def recent(self):
+        cutoff = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def p95(self):
+        latencies = sorted(seconds for _, seconds, ok in self.recent() if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+
+
+class ModelRouter:
+    """
+    Resolve (agent, intent) to a route and order its candidate models by health.
+
+    ``routes`` maps agent name -> intent -> settings (``models``, ``max_tokens``,
+    ``p95_slo`` in seconds); "*" is the fallback at either level. Entries
+    override key by key, with an intent's settings beating an agent's defaults. ``make_llm(model,
+    max_tokens, stop)`` builds the LLM for a candidate; one is kept per model, token limit and
+    stop words, so callers never need to change a shared LLM.
+    """
+
+    def __init__(self, routes, make_llm, window=300.0, min_samples=5, max_error_rate=0.2):
+        self.routes = routes
+        self.make_llm = make_llm
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._health = {}
+        self._llms = {}
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+    def route(self, agent, intent=""):
+        route = {}
+        # Defaults, then the agent's defaults, then the intent's, then the agent's for this intent
+        for agent_key, intent_key in (("*", "*"), (agent, "*"), ("*", intent), (agent, intent)):
+            route.update(self.routes.get(agent_key, {}).get(intent_key, {}))
+        return route
+
+    def llm(self, model, max_tokens=None, stop=None):
+        stop = tuple(stop or ())
+        key = (model, max_tokens, stop)
+        with self._lock:
+            llm = self._llms.get(key)
+        if llm is None:
+            built = self.make_llm(model, max_tokens, list(stop) or None)
+            with self._lock:
+                llm = self._llms.setdefault(key, built)
+        return llm
+
+    def _health_of(self, model, agent):
+        with self._lock:
+            health = self._health.get((model, agent))
+            if health is None:
+                health = self._health[(model, agent)] = ModelHealth(self.window)
+            return health
+
+    def record(self, model, agent, seconds, ok):
+        health = self._health_of(model, agent)
+        with self._lock:
+            health.record(seconds, ok)
+
+    def error_rate(self, model):
+        """Share of failed calls to ``model`` across all agents in the window (None without data)."""
+        with self._lock:
+            samples = [sample for (name, _), health in self._health.items() if name == model
+                       for sample in health.recent()]
+        if len(samples) < self.min_samples:
+            return None
+        return sum(1 for _, _, ok in samples if not ok) / len(samples)
+
+    def healthy(self, model, agent, route):
+        """True while ``model`` meets the route's SLO and error budget (or there's too little data to tell)."""
+        health = self._health_of(model, agent)
+        with self._lock:
+            recent = health.recent()
+            p95 = health.p95()
+        error_rate = self.error_rate(model)
+        if error_rate is not None and error_rate > self.max_error_rate:
+            return False
+        slo = route.get("p95_slo")
+        return not (slo and p95 is not None and len(recent) >= self.min_samples and p95 > slo)
+
+    def candidates(self, agent, route):
+        """The route's models, healthy ones first in preference order, then the rest fastest first."""
+        models = list(route.get("models") or [])
+        healthy = [model for model in models if self.healthy(model, agent, route)]
+        rest = [model for model in models if model not in healthy]
+        rest.sort(key=lambda model: self._health_of(model, agent).p95() or float("inf"))
+        ordered = healthy + rest
+        if ordered and models and ordered[0] != models[0]:
+            with self._lock:
+                self.failovers += 1
+            metrics.inc("llm_failovers", agent=agent, model=ordered[0])
+        return ordered
+
+    def stats(self):
+        with self._lock:
+            keys = list(self._health)
+            stats = {"failovers": self.failovers}
+        for model, agent in keys:
+            health = self._health_of(model, agent)
+            with self._lock:
+                p95 = health.p95()
+                calls = len(health.recent())
+            name = re.sub(r"\W+", "_", f"{agent}_{model.rsplit('/', 1)[-1]}").strip("_").lower()
+            stats[f"calls_{name}"] = calls
+            if p95 is not None:
+                stats[f"p95_seconds_{name}"] = round(p95, 3)
+        return stats
+
+
+_routed_class = None
+
+
+def _routed_llm_class():
+    global _routed_class
+    if _routed_class is None:
+        try:
+            from crewai import BaseLLM
+        except ImportError:
+            from crewai.llms.base_llm import BaseLLM
+
+        class RoutedLLM(BaseLLM):
+            """An agent's LLM: each call goes to the model its router picks for the current intent."""
+
+            def __init__(self, agent_name, router):
+                self.agent_name = agent_name
+                self.router = router
+                route = router.route(agent_name)
+                super().__init__(model=(route.get("models") or ["unrouted"])[0])
+
+            def _primary(self):
+                route = self.router.route(self.agent_name, current_intent())
+                return self.router.llm(route["models"][0], route.get("max_tokens"), self.stop)
+
+            def call(self, messages, *args, **kwargs):
+                route = self.router.route(self.agent_name, current_intent())
+                error = None
+                for model in self.router.candidates(self.agent_name, route):
+                    # CrewAI sets its ReAct stop words on the agent's LLM; the router keys its LLMs on
+                    # them instead of having us set them on one shared across agents and threads
+                    llm = self.router.llm(model, route.get("max_tokens"), self.stop)
+                    running = current_span()
+                    if running is not None:
+                        running.set(model=model)
+                    start = time.monotonic()
+                    try:
+                        result = llm.call(messages, *args, **kwargs)
+                    except Exception as e:
+                        self.router.record(model, self.agent_name, time.monotonic() - start, ok=False)
+                        if not is_retryable(e):
+                            # A bad request fails the same way on every model
+                            raise
+                        error = e
+                        restart_stream()
+                        continue
+                    self.router.record(model, self.agent_name, time.monotonic() - start, ok=True)
+                    return result
+                if error is None:
+                    raise ValueError(f"No models routed for agent {self.agent_name}")
+                raise error
+
+            def supports_function_calling(self):
+                return self._primary().supports_function_calling()
+
+            def supports_stop_words(self):
+                return self._primary().supports_stop_words()
+
+            def get_context_window_size(self):
+                return self._primary().get_context_window_size()
+
+        _routed_class = RoutedLLM
+    return _routed_class
+
+
+def build_routed_llm(agent_name, router):
+    """CrewAI LLM for ``agent_name`` whose calls are routed by ``router``."""
+    return _routed_llm_class()(agent_name, router)
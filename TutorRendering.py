@@ -0,0 +1,164 @@
+"""
+HTML rendering for assistant chat bubbles.
+
+``format_code_blocks`` turns fenced code into styled blocks for a finished
+message, and ``message_html`` memoizes the full bubble for history reruns. ``IncrementalRenderer`` does the same for a reply that is still
+streaming: prose is passed through as it arrives, each code block is
+formatted exactly once when its closing fence shows up, and repaints are
+throttled to word/chunk boundaries so total work stays linear in the reply
+length instead of re-formatting the whole prefix for every character.
+``LiveBubble`` keeps one renderer per streaming job and feeds it only what
+the job added since the UI's previous poll.
+"""
+import re
+import time
+from functools import lru_cache
+
+FENCE = "```"
+CODE_BLOCK_RE = re.compile(r'```(?:python)?\s*(.*?)\s*```', re.DOTALL)
+OPEN_CODE_RE = re.compile(r'```(?:python)?\s*(.*)', re.DOTALL)
+
+
+def _code_block_html(code):
+    # Replace HTML entities with actual characters in code blocks
+    unescaped_code = code.replace('&quot;', '"').replace('&#x27;', "'")
+    return f'<div class="code-block">{unescaped_code}</div>'
+
+
+def format_code_blocks(text):
+    """Format code blocks in text with proper HTML and preserve quotes."""
+    return CODE_BLOCK_RE.sub(lambda m: _code_block_html(m.group(1)), text)
+
+
+def ai_bubble_html(formatted):
+    """Wrap already-formatted HTML in the assistant bubble markup."""
+    return f'<div class="chat-row"><div class="bubble ai">{formatted}</div></div>'
+
+
+@lru_cache(maxsize=2048)
+def message_html(role, content):
+    """
+    Bubble HTML for a finished chat message. Memoized on (role, content), and
+    shared by every session, so history reruns don't re-run the code-block regex.
+    """
+    if role == "user":
+        return f'<div class="chat-row user"><div class="bubble user">{content}</div></div>'
+    return ai_bubble_html(format_code_blocks(content))
+
+
+class IncrementalRenderer:
+    """
+    Build bubble HTML for a streaming reply from text deltas.
+
+    ``feed(delta)`` returns True when a repaint is due. A repaint is due once
+    the reply has grown by at least ``min_chunk`` characters *and* by
+    ``growth`` times what was already painted, ending on a word boundary, or
+    when ``max_interval`` seconds have passed since the last repaint. The
+    geometric growth bound keeps the total bytes pushed to the browser linear
+    in the reply length; the interval keeps long replies visibly moving.
+    """
+
+    def __init__(self, min_chunk=24, growth=0.1, max_interval=0.25, clock=time.monotonic):
+        self.min_chunk = min_chunk
+        self.growth = growth
+        self.max_interval = max_interval
+        self.clock = clock
+        self._closed = []       # finalized HTML fragments, never re-formatted
+        self._open = ""         # unfinished code block or dangling backticks
+        self._in_code = False
+        self._length = 0
+        self._painted_length = 0
+        self._last_paint = clock()
+        self.repaints = 0
+
+    def feed(self, delta):
+        if not delta:
+            return False
+        self._length += len(delta)
+        self._consume(delta)
+        return self._repaint_due(delta)
+
+    def _consume(self, delta):
+        text = self._open + delta
+        # Part of an open code block that was already searched for a closing fence
+        scanned = max(len(FENCE), len(self._open) - len(FENCE) + 1) if self._in_code else 0
+        self._open = ""
+        pos = 0
+        while True:
+            if self._in_code:
+                # Closing fence must come after the opening one at text[pos:pos + 3]
+                close = text.find(FENCE, max(pos + len(FENCE), pos + scanned))
+                scanned = 0
+                if close == -1:
+                    self._open = text[pos:]
+                    return
+                end = close + len(FENCE)
+                self._closed.append(format_code_blocks(text[pos:end]))
+                self._in_code = False
+                pos = end
+            else:
+                start = text.find(FENCE, pos)
+                if start == -1:
+                    # Hold back trailing backticks that may begin a fence
+                    tail = text[pos:]
+                    stop = len(tail.rstrip("`"))
+                    if stop:
+                        self._closed.append(tail[:stop])
+                    self._open = tail[stop:]
+                    return
+                if start > pos:
+                    self._closed.append(text[pos:start])
+                self._in_code = True
+                pos = start
+
+    def _repaint_due(self, delta):
+        grown = self._length - self._painted_length
+        if grown >= self.min_chunk and grown >= self.growth * self._painted_length:
+            at_boundary = delta[-1].isspace() or not delta[-1].isalnum()
+            if at_boundary:
+                return True
+        return self.clock() - self._last_paint >= self.max_interval
+
+    def html(self):
+        """Return bubble HTML for everything fed so far and mark it painted."""
+        self._painted_length = self._length
+        self._last_paint = self.clock()
+        self.repaints += 1
+        body = "".join(self._closed)
+        if self._open:
+            if self._in_code:
+                match = OPEN_CODE_RE.match(self._open)
+                body += _code_block_html(match.group(1) if match else "")
+            else:
+                body += self._open
+        return ai_bubble_html(body)
+
+
+class LiveBubble:
+    """
+    Paint a job's streaming reply through an ``IncrementalRenderer``.
+
+    ``paint(placeholder, restarts, text)`` takes a ``Job.snapshot()`` on each
+    UI poll and feeds the renderer only the text added since the previous
+    one. A changed ``restarts`` means the visible answer began again (e.g.
+    the agent reached its "Final Answer:" after some un-prefixed text), so
+    the renderer starts over. The placeholder is passed every time because a
+    fragment rerun creates a new one, which must be painted even when no new
+    text arrived.
+    """
+
+    def __init__(self, job_id=None, **renderer_options):
+        self.job_id = job_id
+        self.renderer_options = renderer_options
+        self.renderer = IncrementalRenderer(**renderer_options)
+        self.restarts = 0
+        self.fed = 0
+
+    def paint(self, placeholder, restarts, text):
+        if restarts != self.restarts:
+            self.renderer = IncrementalRenderer(**self.renderer_options)
+            self.restarts = restarts
+            self.fed = 0
+        self.renderer.feed(text[self.fed:])
+        self.fed = len(text)
+        placeholder.markdown(self.renderer.html(), unsafe_allow_html=True)
@@ -0,0 +1,439 @@
+"""
+Intent routing: pick the task and agent for a student message and run it.
+
+Nothing here touches ``st.session_state``; the caller passes the student's
+details in, so a message can be processed on a TutorJobs worker thread.
+"""
+import asyncio
+import json
+import re
+
+# crewai, the task factories and the agents are imported on first use so
+# they stay off the first paint
+from TutorAgents import get_agent
+from TutorAnalysis import analyze_code, format_findings, render_syntax_fix
+from TutorCache import get_response_cache
+from TutorClassifier import get_intent_classifier
+from TutorCoalescing import inflight_generations, flight_key
+from TutorCodeDetect import detect_code
+from TutorContext import count_tokens, get_conversation_context, prompt_metrics
+from TutorIntents import (
+    CODE_REVIEW_PHRASES,
+    CONVERSATIONAL_PHRASES,
+    INTENT_MATCHER,
+    QUIZ_PHRASES,
+    TEACHING_PHRASES,
+)
+from TutorSmallTalk import quick_reply
+from TutorStorage import get_artifact_store
+from TutorStreaming import stream_answer
+from TutorTracing import trace_request, span, kickoff_span, routed, annotate_request
+
+
+# Check for code blocks with backticks
+CODE_BLOCK_RE = re.compile(r"```(?:python)?\s*(.*?)\s*```", re.DOTALL | re.IGNORECASE)
+
+# Where a quiz topic starts: after "about", else after "on" (whole words)
+QUIZ_TOPIC_CUES = [re.compile(rf"\b{cue}\b", re.IGNORECASE) for cue in ("about", "on")]
+
+
+def extract_code(text, detection=None):
+    """
+    The code spans of a message, without the prose around them, or the entire
+    input if no code is found. ``detection`` is ``detect_code(text)``, when already computed.
+    """
+    detection = detection or detect_code(text)
+    return detection.code or text
+
+
+def analyze_pasted_code(code):
+    """``analyze_code`` under a trace span, or None if the analysis itself fails (the review runs without it)."""
+    with span("static_analysis") as analysis_span:
+        try:
+            analysis = analyze_code(code)
+        except Exception as e:
+            print("Failed analyzing code:", e)
+            return None
+        analysis_span.set(findings=len(analysis.findings), syntax_error=analysis.syntax_error is not None)
+    return analysis
+
+
+def quiz_topic(text):
+    """Topic after "about"/"on" in a quiz request, defaulting to Python basics."""
+    topic = "Python basics"
+    for cue in QUIZ_TOPIC_CUES:
+        found = cue.search(text)
+        if found:
+            topic = text[found.end():].strip(" :?") or topic
+            break
+    return topic
+
+
+
+# ---- Multi-intent planning ----
+# Specialists that can be fanned out together, and their section titles in the merged reply
+FANOUT_TITLES = {"code_review": "Code review", "teaching": "Lesson", "quiz": "Quiz"}
+
+
+def _clause_split_re():
+    # "and" only separates requests when another request follows it ("... and quiz me on ...")
+    starts = sorted({p.split()[0] for p in TEACHING_PHRASES + QUIZ_PHRASES + CODE_REVIEW_PHRASES}, key=len, reverse=True)
+    return re.compile(
+        r"[;\n]+|[.!?]+(?=\s)|,?\s+(?:and then|then|and also|also|after that|afterwards|plus)\s+"
+        r"|,?\s+and\s+(?=(?:" + "|".join(re.escape(w) for w in starts) + r")\b)",
+        re.IGNORECASE,
+    )
+
+
+CLAUSE_SPLIT_RE = _clause_split_re()
+
+
+def _clause_intent(clause, has_code):
+    found = INTENT_MATCHER.intents(clause)
+    if "quiz" in found:
+        return "quiz"
+    if has_code and "code_review" in found:
+        return "code_review"
+    if "teaching" in found:
+        return "teaching"
+    return None
+
+
+def plan_intents(user_input, detection=None):
+    """
+    Split a message into clauses and return [(intent, clause), ...] for the
+    specialist intents it asks for, in the order asked (first clause per
+    intent wins). Returns [] unless at least two different intents are found,
+    in which case the single-intent cascade handles the message.
+    Only the prose is split; ``detection`` is ``detect_code(user_input)``, when already computed.
+    """
+    detection = detection or detect_code(user_input)
+    has_code = bool(detection.spans)
+    plan = []
+    seen = set()
+    for clause in CLAUSE_SPLIT_RE.split(detection.prose):
+        clause = clause.strip(" ,:")
+        if not clause:
+            continue
+        intent = _clause_intent(clause, has_code)
+        if intent is not None and intent not in seen:
+            seen.add(intent)
+            plan.append((intent, clause))
+    return plan if len(plan) > 1 else []
+
+
+def run_fanout(plan, user_input, user_info, session_id=None, on_delta=None, context="", detection=None):
+    """
+    Run the specialist task for every step of ``plan`` concurrently and merge
+    the replies in plan order, so latency tracks the slowest branch rather
+    than the sum. ``on_delta`` receives the merged text each time a branch
+    finishes (as a restart, since an earlier section may fill in later).
+    ``detection`` is ``detect_code(user_input)``, when already computed.
+    """
+    from TutorTasks import teaching_task, code_review_task, quiz_task
+
+    skill = user_info.get("level", "beginner")
+    detection = detection or detect_code(user_input)
+
+    def run_step(intent, clause):
+        if intent == "code_review":
+            code = extract_code(user_input, detection)
+            analysis = analyze_pasted_code(code) if detection.spans else None
+            findings = format_findings(analysis) if analysis else ""
+            base_task = code_review_task(code, skill, specific_concerns=clause, context=context, findings=findings)
+            return run_agent_task(get_agent("code_reviewer"), base_task, session_id)
+        if intent == "teaching":
+            base_task = teaching_task(clause, skill, student_background="", context=context)
+            return run_cached_agent_task(get_agent("teaching_expert"), base_task, clause, skill, session_id, query=clause,
+                                         context=context)
+        topic = quiz_topic(clause)
+        base_task = quiz_task(topic, skill, context=context)
+        return run_cached_agent_task(get_agent("quiz_master"), base_task, topic, skill, session_id, query=clause,
+                                     context=context)
+
+    sections = [None] * len(plan)
+
+    def merged():
+        return "\n\n---\n\n".join(f"### {FANOUT_TITLES[intent]}\n\n{text}"
+                                     for (intent, _), text in zip(plan, sections) if text is not None)
+
+    async def branch(i, intent, clause):
+        # Same as Crew.kickoff_async: the blocking kickoff runs on a thread of its own
+        try:
+            sections[i] = await asyncio.to_thread(run_step, intent, clause)
+        except Exception as e:
+            sections[i] = f"Sorry, this part failed: {e}"
+        if on_delta is not None:
+            on_delta(merged(), True)
+
+    async def run_all():
+        await asyncio.gather(*(branch(i, intent, clause) for i, (intent, clause) in enumerate(plan)))
+
+    with span("fanout", branches=[intent for intent, _ in plan]):
+        asyncio.run(run_all())
+    return merged()
+
+def safe_extract_text(result_obj):
+    """Best-effort textual extraction from Crew kickoff result."""
+    if result_obj is None:
+        return "No response (result was None)."
+    # Common Crew result attributes
+    for attr in ("raw", "output", "final_output", "result", "text"):
+        if hasattr(result_obj, attr):
+            val = getattr(result_obj, attr)
+            if isinstance(val, str) and val.strip():
+                return val
+            # sometimes raw is an object/dict; convert to string
+            try:
+                return json.dumps(val, indent=2, ensure_ascii=False)
+            except Exception:
+                return str(val)
+    # If it's a string directly
+    if isinstance(result_obj, str):
+        return result_obj
+    # fallback
+    try:
+        return str(result_obj)
+    except Exception:
+        return "(No textual output available)"
+
+
+def run_agent_task(agent, base_task, session_id=None, on_delta=None):
+    """
+    Assign base_task to agent, run a one-task Crew and return its text.
+    When on_delta is given, answer text is passed to it as LLM tokens stream in.
+    Identical requests already in flight in another session are joined instead of re-run.
+    The task's report file is written into this session's directory in the background.
+    """
+    from crewai import Crew, Task, Process
+    from TutorTasks import task_to_strings, task_type
+
+    desc, expected = task_to_strings(base_task)
+    kind = task_type(base_task)
+    system_tokens = count_tokens(f"{agent.role}\n{agent.goal}\n{agent.backstory}")
+    task_tokens = count_tokens(desc) + count_tokens(expected)
+    prompt_metrics.record(agent.role, kind, system_tokens, task_tokens)
+
+    def kickoff():
+        with span("crew_build", agent=agent.role):
+            assigned_task = Task(
+                description=desc,
+                expected_output=expected or base_task.expected_output,
+                agent=agent,
+                # CrewAI would write a shared file synchronously; ArtifactStore handles reports instead
+                output_file=None,
+                config={},
+            )
+            crew = Crew(agents=[agent], tasks=[assigned_task], process=Process.sequential, verbose=False)
+        task_id = getattr(assigned_task, "id", None)
+        with kickoff_span(agent.role, task_id=task_id, max_iter=getattr(agent, "max_iter", None)):
+            if on_delta is None:
+                result = crew.kickoff()
+            else:
+                result = stream_answer(crew.kickoff, on_delta, task_id=task_id)
+        return safe_extract_text(result)
+
+    with span("agent_task", agent=agent.role, task_type=kind, system_tokens=system_tokens,
+              task_tokens=task_tokens) as task_span:
+        # Stays True when this request joins another session's identical generation
+        task_span.set(coalesced=True)
+
+        def lead():
+            task_span.set(coalesced=False)
+            return kickoff()
+
+        text = inflight_generations.do(flight_key(agent.role, desc), lead)
+    get_artifact_store().write_output(session_id, getattr(base_task, "output_file", None), text)
+    return text
+
+
+def run_cached_agent_task(agent, base_task, topic, skill, session_id=None, on_delta=None, query=None, context=""):
+    """
+    Serve a specialist generation from the shared response cache when possible
+    (exact topic match first, then a similar earlier query),
+    otherwise run it and store the result keyed on (agent, topic, skill).
+
+    ``context`` is the conversation context rendered into ``base_task``. The
+    cache is shared by every session and keyed without it, so a prompt that
+    carries one ("explain that example again") bypasses the cache both ways.
+    """
+    cache = get_response_cache() if not context else None
+    if cache is not None:
+        with span("cache_lookup", agent=agent.role) as lookup:
+            cached = cache.get(agent.role, topic, skill)
+            if cached is None:
+                # Near-duplicate phrasing of a question we already answered
+                cached = cache.get_similar(agent.role, query or topic, skill)
+            lookup.set(hit=cached is not None)
+        if cached is not None:
+            return cached
+    text = run_agent_task(agent, base_task, session_id, on_delta)
+    if cache is not None:
+        cache.put(agent.role, topic, skill, text, query=query)
+    return text
+
+
+def pick_intent(user_input, detection, classifier):
+    """
+    The intent to route ``user_input`` to: the classifier's when one is
+    installed (``rule_intent`` otherwise), except that a message of nothing
+    but code is always a code review.
+    """
+    if detection.kind == "code":
+        # No prose to classify: the words the model sees are the code's, and an unfenced
+        # paste reads like small talk to it ("x = [1,2,3]" -> conversation)
+        annotate_request(pasted_code=True)
+        return "code_review"
+    if classifier is None:
+        return rule_intent(user_input, detection)
+    # The learned model weighs all the words at once instead of stopping at the first
+    # phrase table that matches; when it isn't sure, the coordinator works it out
+    intent, confidence = classifier.predict(user_input)
+    annotate_request(predicted=intent, confidence=round(confidence, 3))
+    if confidence < classifier.min_confidence:
+        return "coordination"
+    return intent
+
+
+def rule_intent(user_input, detection=None):
+    """
+    The keyword cascade: the first intent whose phrases appear in the message,
+    checked in a fixed order. Used when no intent model is installed.
+    ``detection`` is ``detect_code(user_input)``, when already computed.
+    """
+    # One pass over the message finds every intent phrase (see TutorIntents); words inside
+    # pasted code ("bad", "error", "ok") say nothing about what the student wants
+    detection = detection or detect_code(user_input)
+    found = INTENT_MATCHER.intents(detection.prose)
+    # Conversational phrases, or a very short message (likely conversational)
+    if any(intent in found for intent in CONVERSATIONAL_PHRASES) or len(user_input.split()) <= 3:
+        return "conversation"
+    if "teaching" in found:
+        return "teaching"
+    # Asking for a review, or Python code with a question
+    if "code_review" in found or ("question" in found and detection.spans):
+        return "code_review"
+    if "curriculum" in found:
+        return "curriculum"
+    if "quiz" in found:
+        return "quiz"
+    return "coordination"
+
+
+def process_user_input(user_input: str, user_info: dict, session_id=None, previous_reply=None, on_delta=None,
+                       history=None) -> str:
+    """
+    Decide which task to create and which agent should run it,
+    assign the Task.agent properly and run Crew.kickoff() for that one task.
+    Returns the textual result, streaming it to on_delta if one is given.
+    Takes the student's details explicitly so it can run on a worker thread;
+    history (the messages before this one) becomes the tasks' conversation context.
+    Each call is traced as one request (see TutorTracing).
+    """
+    with trace_request(session_id, skill=user_info.get("level", "beginner")):
+        return _route_and_run(user_input, user_info, session_id, previous_reply, on_delta, history)
+
+
+def _route_and_run(user_input, user_info, session_id, previous_reply, on_delta, history):
+    from TutorTasks import (
+        teaching_task,
+        code_review_task,
+        curriculum_task,
+        quiz_task,
+        coordination_task,
+        conversation_task
+    )
+
+    skill = user_info.get("level", "beginner")
+    goals = user_info.get("goals", "")
+
+    # Check for empty or very short messages
+    if not user_input or len(user_input.strip()) < 2:
+        routed("empty")
+        return "I'm here to help you learn Python! What would you like to know about?"
+
+    def conversation_context():
+        # Only built once an agent is about to run; template replies never need it
+        with span("context") as context_span:
+            text, tokens = get_conversation_context().render(session_id, history or [])
+            context_span.set(tokens=tokens)
+        return text
+
+    # Which lines are code, so the clause splitter and the reviewer only see what they should
+    with span("detect_code") as detect_span:
+        detection = detect_code(user_input)
+        detect_span.set(kind=detection.kind, spans=len(detection.spans))
+
+    # ===== SEVERAL REQUESTS IN ONE MESSAGE =====
+    # e.g. "explain this error and then quiz me on exceptions": run the specialists side by side
+    plan = plan_intents(user_input, detection)
+    if plan:
+        routed("multi")
+        return run_fanout(plan, user_input, user_info, session_id, on_delta, context=conversation_context(),
+                          detection=detection)
+
+    # ===== PICK THE INTENT =====
+    intent = pick_intent(user_input, detection, get_intent_classifier())
+
+    # ===== CONVERSATIONAL MESSAGES =====
+    if intent == "conversation":
+        # Greetings, thanks, goodbyes etc. get an instant template reply; no LLM round trip
+        reply = quick_reply(user_input, CONVERSATIONAL_PHRASES, user_info, previous_reply)
+        if reply is not None:
+            routed("small_talk")
+            return reply
+
+        # Use conversation agent for open-ended casual chat
+        routed("conversation")
+        base_task = conversation_task(user_input, context=conversation_context())
+        return run_agent_task(get_agent("conversation_agent"), base_task, session_id, on_delta)
+
+    # ===== TEACHING INTENT =====
+    if intent == "teaching":
+        routed("teaching")
+        # Use the user's phrase as topic when appropriate, else generic "Getting started"
+        topic = user_input if len(user_input.split()) < 30 else "Python programming from beginner to advanced"
+        context = conversation_context()
+        base_task = teaching_task(topic, skill, student_background="", context=context)
+        return run_cached_agent_task(get_agent("teaching_expert"), base_task, topic, skill, session_id, on_delta,
+                                     query=user_input, context=context)
+
+    # ===== CODE REVIEW INTENT =====
+    if intent == "code_review":
+        # Only the code goes in the review's code block; the student's own words are their concerns
+        code = extract_code(user_input, detection)
+        concerns = detection.prose if detection.spans else ""
+
+        # Parser and style checks run locally first: their findings go into the prompt, and a
+        # plain syntax slip in a single snippet is answered with the fix, no LLM round trip
+        analysis = analyze_pasted_code(code) if detection.spans else None
+        if analysis is not None and analysis.trivial and len(detection.spans) == 1:
+            routed("syntax_fix")
+            return render_syntax_fix(analysis)
+        routed("code_review")
+        base_task = code_review_task(code, skill, specific_concerns=concerns, context=conversation_context(),
+                                     findings=format_findings(analysis) if analysis else "")
+        return run_agent_task(get_agent("code_reviewer"), base_task, session_id, on_delta)
+
+    # ===== CURRICULUM INTENT =====
+    if intent == "curriculum":
+        routed("curriculum")
+        base_task = curriculum_task(goals, skill, time_availability="regular",
+                                    specific_interests=user_info.get("interests", ""),
+                                    context=conversation_context())
+        return run_agent_task(get_agent("curriculum_planner"), base_task, session_id, on_delta)
+
+    # ===== QUIZ INTENT =====
+    if intent == "quiz":
+        routed("quiz")
+        topic = quiz_topic(user_input)
+        context = conversation_context()
+        base_task = quiz_task(topic, skill, context=context)
+        return run_cached_agent_task(get_agent("quiz_master"), base_task, topic, skill, session_id, on_delta,
+                                     query=user_input, context=context)
+
+    # ===== DEFAULT: COORDINATOR =====
+    # For everything else, use the coordinator to figure out the best approach
+    routed("coordination")
+    base_task = coordination_task([conversation_context(), f"user: {user_input}"], user_input, skill, goals)
+    return run_agent_task(get_agent("project_coordinator"), base_task, session_id, on_delta)
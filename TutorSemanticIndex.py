@@ -0,0 +1,153 @@
+"""
+Local TF-IDF similarity index over previously answered queries.
+
+Used by the response cache to serve near-duplicate questions ("what are
+python decorators" / "explain decorators in python") without a network
+embedding model. Queries are reduced to content words (intent verbs and
+stopwords removed, light plural stemming) and compared by TF-IDF cosine.
+A Python keyword that is also a stopword counts as a content word when it
+names syntax ("the in operator", "for loops").
+
+Lookups stay sublinear in the index size: candidates are gathered only from
+the posting lists of the query's rarest terms, with a hard cap on how many
+documents get scored.
+"""
+import builtins
+import keyword
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from itertools import islice
+
+_WORD = re.compile(r"[a-z0-9_+#]+")
+
+STOPWORDS = frozenset("""
+a an the is are was were be been being am to of in on at for with by from into about as and or but
+if then than so that this these those it its it's what whats what's how why when where which who whom
+can could would should will shall may might must do does did doing done i me my mine we us our you your
+please explain explaining explanation tell show teach teaching learn learning understand help describe
+give let lets let's want need know quiz test exam question questions some any more very just really like
+""".split())
+
+# Stopwords that are also Python keywords or builtins ("if", "in", "or", "with", "any") ...
+PYTHON_WORDS = STOPWORDS & frozenset(word.lower() for word in keyword.kwlist + keyword.softkwlist + dir(builtins))
+# ... are the topic when they name syntax: "the if statement" must not match "the with statement"
+SYNTAX_NOUNS = frozenset("statement operator keyword clause block loop expression function builtin".split())
+
+
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def terms(text):
+    """Content-word term frequencies for a query."""
+    words = _WORD.findall(str(text).lower())
+    tf = Counter()
+    for i, word in enumerate(words):
+        if word not in STOPWORDS or (
+                word in PYTHON_WORDS and i + 1 < len(words) and _stem(words[i + 1]) in SYNTAX_NOUNS):
+            tf[_stem(word)] += 1
+    return tf
+
+
+class SemanticIndex:
+    """
+    Inverted TF-IDF index partitioned by namespace (e.g. agent + skill level).
+
+    ``add``/``remove`` maintain documents by id; ``search`` returns the best
+    ``(doc_id, score)`` at or above the threshold, or None.
+    """
+
+    def __init__(self, max_query_terms=6, max_candidates=256):
+        self.max_query_terms = max_query_terms
+        self.max_candidates = max_candidates
+        self._lock = threading.Lock()
+        self._docs = {}                   # doc_id -> (namespace, Counter)
+        self._postings = defaultdict(set)  # (namespace, term) -> {doc_id}
+        self._namespace_sizes = Counter()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, namespace, text):
+        tf = terms(text)
+        with self._lock:
+            self._remove(doc_id)
+            if not tf:
+                return
+            self._docs[doc_id] = (namespace, tf)
+            self._namespace_sizes[namespace] += 1
+            for term in tf:
+                self._postings[(namespace, term)].add(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        namespace, tf = entry
+        self._namespace_sizes[namespace] -= 1
+        for term in tf:
+            posting = self._postings.get((namespace, term))
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[(namespace, term)]
+
+    def _idf(self, namespace, term, size):
+        df = len(self._postings.get((namespace, term), ()))
+        return math.log((size + 1) / (df + 1)) + 1.0
+
+    def search(self, namespace, text, threshold=0.8):
+        query = terms(text)
+        if not query:
+            return None
+        with self._lock:
+            size = self._namespace_sizes[namespace]
+            if not size:
+                return None
+            known = [t for t in query if (namespace, t) in self._postings]
+            if not known:
+                return None
+            # Rarest terms first: they are the most selective and have the shortest postings
+            known.sort(key=lambda t: len(self._postings[(namespace, t)]))
+            candidates = set()
+            for term in known[:self.max_query_terms]:
+                room = self.max_candidates - len(candidates)
+                if room <= 0:
+                    break
+                candidates.update(islice(self._postings[(namespace, term)], room))
+
+            idf = {}
+
+            def weight(term):
+                if term not in idf:
+                    idf[term] = self._idf(namespace, term, size)
+                return idf[term]
+
+            q_vec = {t: c * weight(t) for t, c in query.items()}
+            q_norm = math.sqrt(sum(v * v for v in q_vec.values()))
+            best = None
+            for doc_id in candidates:
+                tf = self._docs[doc_id][1]
+                dot = 0.0
+                d_norm_sq = 0.0
+                for term, count in tf.items():
+                    w = count * weight(term)
+                    d_norm_sq += w * w
+                    if term in q_vec:
+                        dot += w * q_vec[term]
+                score = dot / (q_norm * math.sqrt(d_norm_sq)) if d_norm_sq else 0.0
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (doc_id, score)
+            return best
@@ -0,0 +1,141 @@
+"""
+Template replies for common conversational messages, answered without an LLM.
+
+``quick_reply`` handles messages made up only of a conversational phrase
+("hi", "thanks so much!", "ok", "sorry my bad") plus filler words, picking a
+reply from a small variety pool personalized with the student's level and
+goals. Anything with real content ("hi, what's a decorator?", open-ended
+small talk) returns None so the caller can fall back to conversation_agent.
+"""
+import random
+import re
+import threading
+
+_WORD = re.compile(r"[a-z']+")
+
+# Words that may accompany a conversational phrase without changing its meaning
+FILLER = frozenset("""
+a all again and are be been for friend friends guys help helped helpful i is it it's just lot man me much my
+oh pythonaut really so that that's the there this thx too tutor very was well you your yours
+""".split())
+
+REPLIES = {
+    "greeting": [
+        "Hi there! 👋 What would you like to work on in Python today?",
+        "Hello! Ready to learn some Python? Ask me to explain a concept, review code, or quiz you.",
+        "Hey! Great to see you. What Python topic is on your mind{goal_hint}?",
+    ],
+    "thanks": [
+        "You're welcome! Let me know what you'd like to tackle next.",
+        "Happy to help! 🐍 Anything else you'd like to explore?",
+        "Anytime! Keep up the great work{level_hint}.",
+    ],
+    "goodbye": [
+        "Goodbye! Keep practicing and come back anytime. 🐍",
+        "See you soon! Happy coding{goal_hint}.",
+        "Bye for now! Your next Python lesson will be waiting.",
+    ],
+    "how_are_you": [
+        "I'm doing great, thanks for asking! How's your Python learning going?",
+        "All good here and ready to code! What would you like to learn today?",
+    ],
+    "positive": [
+        "Glad that helped! Want to go a step further or try a quick quiz?",
+        "Awesome! 🎉 What should we look at next{goal_hint}?",
+    ],
+    "encouragement": [
+        "Thank you! You're making great progress{level_hint}. What's next?",
+        "That means a lot! Ready for the next challenge?",
+    ],
+    "negative": [
+        "Sorry that wasn't helpful. Tell me which part missed the mark and I'll try a different approach.",
+        "Thanks for telling me. What would make it clearer — a simpler explanation or more examples?",
+    ],
+    "confusion": [
+        "No worries, that's part of learning! Which part is confusing? Paste the code or name the concept.",
+        "Let's untangle it together. Tell me the exact step or line that doesn't make sense.",
+    ],
+    "agreement": [
+        "Great! Ask me about a specific Python topic and I'll dive in.",
+        "Sounds good! What would you like to learn or practice next?",
+    ],
+    "disagreement": [
+        "No problem! Is there another Python topic you'd like to look at instead?",
+        "That's okay. What would be more useful for you right now?",
+    ],
+    "apology": [
+        "No need to apologize! Let's keep going — what would you like to do next?",
+        "All good! Mistakes are how we learn. What can I help with?",
+    ],
+}
+
+_stats_lock = threading.Lock()
+_stats = {"llm_calls_avoided": 0, "fallbacks": 0}
+
+
+def _words(text):
+    return _WORD.findall(text.lower().replace("’", "'"))
+
+
+def _phrase_hits(words, phrases):
+    """Indices of words covered by any of the phrases, matched on whole words."""
+    covered = set()
+    for phrase in phrases:
+        target = phrase.split()
+        size = len(target)
+        for i in range(len(words) - size + 1):
+            if words[i:i + size] == target:
+                covered.update(range(i, i + size))
+    return covered
+
+
+def detect_closed_intent(text, intent_phrases):
+    """
+    Return the conversational intent when the message is nothing but that
+    intent's phrases plus filler, otherwise None.
+    """
+    words = _words(text)
+    if not words or len(words) > 8:
+        return None
+    best = None
+    covered_all = set()
+    for intent, phrases in intent_phrases.items():
+        if intent not in REPLIES:
+            continue
+        covered = _phrase_hits(words, phrases)
+        if covered and (best is None or len(covered) > best[1]):
+            best = (intent, len(covered))
+        covered_all |= covered
+    if best is None:
+        return None
+    leftover = [w for i, w in enumerate(words) if i not in covered_all and w not in FILLER]
+    return None if leftover else best[0]
+
+
+def quick_reply(text, intent_phrases, user_info=None, previous=None):
+    """Template reply for a closed conversational message, or None to fall back to the agent."""
+    intent = detect_closed_intent(text, intent_phrases)
+    if intent is None:
+        with _stats_lock:
+            _stats["fallbacks"] += 1
+        return None
+
+    user_info = user_info or {}
+    level = (user_info.get("level") or "").strip()
+    goals = (user_info.get("goals") or "").strip()
+    hints = {
+        "level_hint": f" as a {level} Pythonista" if level else "",
+        "goal_hint": f" for your {goals} goals" if goals else "",
+    }
+    options = [template.format(**hints) for template in REPLIES[intent]]
+    # Don't say exactly the same thing twice in a row
+    reply = random.choice([r for r in options if r != previous] or options)
+    with _stats_lock:
+        _stats["llm_calls_avoided"] += 1
+    return reply
+
+
+def stats():
+    """How many conversational LLM calls were answered locally vs. sent to the agent."""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,307 @@
+"""
+Chat history persistence.
+
+``ChatJournal`` keeps history as an append-only JSONL file: each new message
+is one appended line, a reset is a single "clear" record, and the file is
+compacted (rewritten to just the live messages) once ``compact_every``
+records are dead (superseded by a clear). Write cost no longer grows with the length of the conversation.
+
+``LocalStorageSync`` mirrors history into browser local storage in fixed-size
+pages, so each new message only re-sends the last page instead of the whole
+history.
+
+``ArtifactStore`` scopes journals and task reports to a session directory
+and performs the writes on a background thread.
+"""
+import json
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_DATA_DIR = BASE_DIR / "sessions"
+
+LOCAL_STORAGE_PREFIX = "pythonaut_chat"
+LEGACY_LOCAL_STORAGE_KEY = "pythonaut_chat_history"
+LOCAL_PAGE_SIZE = 50
+
+
+class ChatJournal:
+    """Append-only JSONL chat history with periodic compaction."""
+
+    def __init__(self, path, compact_every=500, legacy_path=None):
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.compact_every = compact_every
+        self._records = None   # lines in the file; counted on first use when load() didn't
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Replay the journal into a message list (migrating a legacy JSON file if present)."""
+        with self._lock:
+            if not self.path.exists():
+                messages = self._load_legacy()
+                if messages:
+                    self._rewrite(messages)
+                return messages
+            messages = []
+            records = 0
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write; skip it
+                        continue
+                    records += 1
+                    if record.get("op") == "clear":
+                        messages = []
+                    elif "message" in record:
+                        messages.append(record["message"])
+            self._records = records
+            return messages
+
+    def _load_legacy(self):
+        if self.legacy_path is None or not self.legacy_path.exists():
+            return []
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                messages = json.load(f)
+            return messages if isinstance(messages, list) else []
+        except (OSError, ValueError):
+            return []
+
+    def append(self, message, messages=None):
+        """
+        Append one message. ``messages`` (the full current history) is only
+        used when the journal is due for compaction.
+        """
+        line = json.dumps({"op": "add", "message": message}, ensure_ascii=False)
+        with self._lock:
+            self._write_line(line)
+            if messages is not None and self._records - len(messages) >= self.compact_every:
+                self._rewrite(messages)
+
+    def clear(self):
+        with self._lock:
+            self._write_line(json.dumps({"op": "clear"}))
+
+    def compact(self, messages):
+        with self._lock:
+            self._rewrite(messages)
+
+    def _write_line(self, line):
+        if self._records is None:
+            # Opened without load() (history came from local storage): the file may already be long
+            self._records = self._count()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        self._records += 1
+
+    def _count(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return sum(1 for line in f if line.strip())
+        except OSError:
+            return 0
+
+    def _rewrite(self, messages):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps({"op": "add", "message": message}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._records = len(messages)
+
+
+def _local_value(item):
+    # streamlit_local_storage has returned both raw values and objects with .value
+    return getattr(item, "value", item)
+
+
+class LocalStorageSync:
+    """Mirror chat history into browser local storage one page at a time."""
+
+    def __init__(self, local_storage, page_size=LOCAL_PAGE_SIZE, prefix=LOCAL_STORAGE_PREFIX):
+        self.local_storage = local_storage
+        self.page_size = page_size
+        self.prefix = prefix
+
+    def session_id(self):
+        """Stable id for this browser, so a reload keeps using the same session directory."""
+        try:
+            stored = _local_value(self.local_storage.getItem(f"{self.prefix}_session_id"))
+        except Exception:
+            stored = None
+        if stored:
+            return str(stored)
+        session_id = uuid.uuid4().hex
+        self.local_storage.setItem(f"{self.prefix}_session_id", session_id, key=f"{self.prefix}_session_id")
+        return session_id
+
+    def _page_key(self, page):
+        return f"{self.prefix}_page_{page}"
+
+    def load(self):
+        """Return the stored history, or None if nothing was stored."""
+        try:
+            pages = _local_value(self.local_storage.getItem(f"{self.prefix}_pages"))
+            if pages:
+                messages = []
+                for page in range(int(pages)):
+                    raw = _local_value(self.local_storage.getItem(self._page_key(page)))
+                    messages.extend(json.loads(raw) if isinstance(raw, str) else raw or [])
+                return messages
+            legacy = _local_value(self.local_storage.getItem(LEGACY_LOCAL_STORAGE_KEY))
+            if legacy:
+                return json.loads(legacy) if isinstance(legacy, str) else legacy
+        except Exception:
+            pass
+        return None
+
+    def append(self, messages):
+        """Push the page holding the newest message (and the page count if it changed)."""
+        if not messages:
+            return
+        index = len(messages) - 1
+        page = index // self.page_size
+        start = page * self.page_size
+        self.local_storage.setItem(self._page_key(page), json.dumps(messages[start:start + self.page_size]),
+                                   key=f"{self._page_key(page)}_{index}")
+        if index % self.page_size == 0:
+            self.local_storage.setItem(f"{self.prefix}_pages", str(page + 1), key=f"{self.prefix}_pages_{page}")
+
+    def clear(self, message_count):
+        pages = (message_count + self.page_size - 1) // self.page_size
+        keys = [self._page_key(page) for page in range(pages)]
+        keys += [f"{self.prefix}_pages", LEGACY_LOCAL_STORAGE_KEY]
+        for item_key in keys:
+            # Each call is a component instance and needs its own widget key
+            self.local_storage.deleteItem(item_key, key=f"delete_{item_key}")
+
+
+class ArtifactStore:
+    """
+    Session-scoped files: each session gets ``<root>/<session_id>/`` holding its
+    chat journal and task reports, so concurrent users never share a file.
+    Writes go through one background thread, off the Streamlit request path.
+
+    ``file_output`` is "on" (history and task reports), "history" (chat
+    journal only) or "off" (nothing touches disk).
+    """
+
+    def __init__(self, root, file_output="on", max_open_journals=1024):
+        self.root = Path(root)
+        self.file_output = file_output
+        self.max_open_journals = max_open_journals
+        self._journals = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+
+    @property
+    def history_enabled(self):
+        return self.file_output in ("on", "history")
+
+    @property
+    def outputs_enabled(self):
+        return self.file_output == "on"
+
+    def session_dir(self, session_id):
+        # Session ids are generated by us, but never let one escape the root
+        safe_id = "".join(ch for ch in str(session_id) if ch.isalnum() or ch in "-_") or "anonymous"
+        return self.root / safe_id
+
+    def journal(self, session_id):
+        with self._lock:
+            journal = self._journals.get(session_id)
+            if journal is None:
+                journal = ChatJournal(self.session_dir(session_id) / "chat_history.jsonl")
+                self._journals[session_id] = journal
+                while len(self._journals) > self.max_open_journals:
+                    self._journals.popitem(last=False)
+            else:
+                self._journals.move_to_end(session_id)
+            return journal
+
+    def load_history(self, session_id):
+        if not self.history_enabled:
+            return []
+        return self.journal(session_id).load()
+
+    def append_message(self, session_id, message, messages):
+        if not self.history_enabled:
+            return
+        # Only the first `count` messages belong to this write; the list may keep growing
+        count = len(messages)
+        journal = self.journal(session_id)
+        self._submit(lambda: journal.append(message, messages[:count]))
+
+    def clear_history(self, session_id):
+        if self.history_enabled:
+            self._submit(self.journal(session_id).clear)
+
+    def write_output(self, session_id, filename, text):
+        """Write a task report (e.g. quiz.md) into the session's directory."""
+        if not self.outputs_enabled or not filename:
+            return
+        path = self.session_dir(session_id) / Path(filename).name
+
+        def write():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+
+        self._submit(write)
+
+    def _submit(self, fn):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._drain, name="pythonaut-writer", daemon=True)
+                    self._writer.start()
+        self._queue.put(fn)
+
+    def _drain(self):
+        while True:
+            fn = self._queue.get()
+            try:
+                fn()
+            except Exception as e:
+                # don't crash the writer if one write fails; log in console
+                print("Failed writing session artifact:", e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued write has hit the disk."""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            open_journals = len(self._journals)
+        return {"pending_writes": self._queue.qsize(), "open_journals": open_journals}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """Process-wide ArtifactStore configured by PYTHONAUT_DATA_DIR and PYTHONAUT_FILE_OUTPUT."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArtifactStore(
+                    os.getenv("PYTHONAUT_DATA_DIR", str(DEFAULT_DATA_DIR)),
+                    file_output=os.getenv("PYTHONAUT_FILE_OUTPUT", "on").lower(),
+                )
+    return _store
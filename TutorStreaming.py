@@ -0,0 +1,178 @@
+"""
+Live token streaming from CrewAI's LLM events into the chat bubble.
+
+The LLM in TutorAgents is created with ``stream=True``; litellm then emits an
+``LLMStreamChunkEvent`` on CrewAI's event bus for every delta it receives.
+A single process-wide handler routes each chunk to whichever sink registered
+for the task (or thread) that produced it, so concurrent sessions never see
+each other's tokens.
+"""
+import threading
+from contextlib import contextmanager
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+_sinks_lock = threading.Lock()
+_thread_sinks = {}
+_task_sinks = {}
+_handler_installed = False
+
+
+def _load_event_bus():
+    """Import CrewAI's event bus lazily; its location moved between releases."""
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        try:
+            from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+        except ImportError:
+            return None, None
+    return crewai_event_bus, LLMStreamChunkEvent
+
+
+def _dispatch_chunk(source, event):
+    chunk = getattr(event, "chunk", None)
+    if not chunk:
+        return
+    task_id = getattr(event, "task_id", None)
+    with _sinks_lock:
+        sink = _task_sinks.get(str(task_id)) if task_id else None
+        if sink is None:
+            sink = _thread_sinks.get(threading.get_ident())
+    if sink is not None:
+        sink(chunk)
+
+
+def install_stream_handler():
+    """Register the chunk handler on CrewAI's event bus once per process."""
+    global _handler_installed
+    if _handler_installed:
+        return True
+    bus, chunk_event = _load_event_bus()
+    if bus is None:
+        return False
+    with _sinks_lock:
+        if not _handler_installed:
+            bus.on(chunk_event)(_dispatch_chunk)
+            _handler_installed = True
+    return True
+
+
+def restart_stream():
+    """
+    Tell the sink streaming this thread's LLM output that the answer starts
+    over: the call that produced the chunks so far failed and is being retried
+    (see TutorLLM). Without it the retry's text would be appended to theirs.
+    """
+    with _sinks_lock:
+        sink = _thread_sinks.get(threading.get_ident())
+    restart = getattr(sink, "restart", None)
+    if restart is not None:
+        restart()
+
+
+@contextmanager
+def stream_to(sink, task_id=None):
+    """Send LLM chunks produced by the current thread (or ``task_id``) to ``sink``."""
+    install_stream_handler()
+    ident = threading.get_ident()
+    with _sinks_lock:
+        _thread_sinks[ident] = sink
+        if task_id:
+            _task_sinks[str(task_id)] = sink
+    try:
+        yield
+    finally:
+        with _sinks_lock:
+            _thread_sinks.pop(ident, None)
+            if task_id:
+                _task_sinks.pop(str(task_id), None)
+
+
+class FinalAnswerFilter:
+    """
+    Turn streamed chunks into deltas of the student-facing answer.
+
+    CrewAI agents reason in a ReAct format ("Thought: ... Final Answer: ...").
+    Everything before the last "Final Answer:" marker is hidden; replies that
+    don't start with "Thought" are passed through as they arrive. ``feed``
+    returns the newly visible text; ``restarted`` is set when the visible
+    answer starts over because a marker appeared after text already shown.
+    """
+
+    def __init__(self):
+        self._undecided = ""
+        self._hidden = True
+        self._decided = False
+        self._window = ""
+        self._strip_leading = False
+        self.restarted = False
+
+    def feed(self, chunk):
+        self.restarted = False
+        if not self._decided:
+            self._undecided += chunk
+            stripped = self._undecided.lstrip()
+            if len(stripped) < len("Thought"):
+                return ""
+            self._decided = True
+            self._hidden = stripped.startswith("Thought")
+            chunk = stripped
+
+        # Watch a sliding window so a marker split across chunks is still found
+        scan = self._window + chunk
+        idx = scan.rfind(FINAL_ANSWER_MARKER)
+        self._window = scan[-(len(FINAL_ANSWER_MARKER) - 1):]
+        if idx != -1:
+            self.restarted = not self._hidden
+            self._hidden = False
+            self._strip_leading = True
+            visible = scan[idx + len(FINAL_ANSWER_MARKER):]
+        elif self._hidden:
+            return ""
+        else:
+            visible = chunk
+
+        if self._strip_leading:
+            visible = visible.lstrip()
+            if visible:
+                self._strip_leading = False
+        return visible
+
+
+class _AnswerSink:
+    """``stream_answer``'s sink: chunks through a FinalAnswerFilter to ``on_delta``."""
+
+    def __init__(self, on_delta):
+        self.on_delta = on_delta
+        self.answer = FinalAnswerFilter()
+        self.shown = False
+        # Chunks may be dispatched from the event bus's own threads
+        self.lock = threading.Lock()
+
+    def __call__(self, chunk):
+        with self.lock:
+            visible = self.answer.feed(chunk)
+            if visible or self.answer.restarted:
+                self.on_delta(visible, self.answer.restarted)
+                self.shown = True
+
+    def restart(self):
+        """A retried call streams its answer from the start: clear what was shown, filter afresh."""
+        with self.lock:
+            self.answer = FinalAnswerFilter()
+            if self.shown:
+                self.on_delta("", True)
+                self.shown = False
+
+
+def stream_answer(fn, on_delta, task_id=None):
+    """
+    Run ``fn`` in the current thread, passing answer deltas to ``on_delta``.
+
+    Called on a job worker thread (see TutorJobs) with ``Job.emit`` as
+    ``on_delta``; the UI paints the job's text from its own polls.
+    """
+    with stream_to(_AnswerSink(on_delta), task_id):
+        return fn()
+
@@ -1,4 +1,46 @@
 from crewai import Task
+from TutorAgents import PROMPT_PROFILE
+
+# output_file identifies the kind of task (used for per-task-type prompt metrics)
+TASK_TYPES = {
+    "teaching_report.md": "teaching",
+    "code_review.md": "code_review",
+    "learning_plan.md": "curriculum",
+    "quiz.md": "quiz",
+    "coordination_plan.md": "coordination",
+    "conversation_log.md": "conversation",
+}
+
+
+def task_type(task):
+    return TASK_TYPES.get(getattr(task, "output_file", None) or "", "other")
+
+
+def _compact(profile):
+    return (profile or PROMPT_PROFILE) == "compact"
+
+
+def context_section(context):
+    """Conversation context block for a task description (empty when there is no history)."""
+    if not context:
+        return ""
+    return (
+        "CONVERSATION CONTEXT (use it to resolve references like \"it\" or \"that example\"; "
+        "your answer must still stand on its own):\n"
+        f"{context}\n"
+    )
+
+
+def analysis_section(findings):
+    """Static-analysis block for a code review description (empty when nothing was found)."""
+    if not findings:
+        return ""
+    return (
+        "STATIC ANALYSIS (already found by the Python parser and a style checker; explain and fix these "
+        "rather than re-checking for them, then focus on logic, edge cases and design):\n"
+        f"{findings}\n"
+    )
+
 
 def task_to_strings(task: Task):
     """Convert a Task object into (task, context) strings for DelegateWorkTool."""
@@ -11,7 +53,21 @@ def task_to_strings(task: Task):
 # -----------------------------
 #  Teaching Task
 # -----------------------------
-def teaching_task(topic, skill_level, student_background=""):
+def teaching_task(topic, skill_level, student_background="", context="", profile=None):
+    if _compact(profile):
+        return Task(
+            description=f"""
+            Teach the Python topic '{topic}' to a {skill_level} student (background: {student_background or 'not provided'}).
+            {context_section(context)}
+            Give a complete, standalone lesson: a plain definition, an everyday analogy, 3-5 progressively harder
+            code examples, common mistakes, real-world uses, practice exercises with solutions and memory tips.
+            Define any jargon. Don't use search tools or point to external resources.
+            """,
+            expected_output="A thorough Markdown lesson with a title and a section for each of those parts, ending with a summary and next steps.",
+            agent=None,
+            output_file='teaching_report.md',
+            config={},
+        )
     return Task(
         description=f"""
         You are responsible for teaching the Python topic **'{topic}'** to a {skill_level} student.
@@ -20,6 +76,7 @@ def teaching_task(topic, skill_level, student_background=""):
         - Skill Level: {skill_level}
         - Background: {student_background if student_background else 'Not provided'}
         - Specific Request: "{topic}"
+        {context_section(context)}
 
         REQUIREMENTS:
         1. Provide a COMPREHENSIVE explanation, not just an introduction
@@ -64,7 +121,24 @@ def teaching_task(topic, skill_level, student_background=""):
 # -----------------------------
 #  Code Review Task
 # -----------------------------
-def code_review_task(code_snippet, skill_level, specific_concerns=""):
+def code_review_task(code_snippet, skill_level, specific_concerns="", context="", profile=None, findings=""):
+    if _compact(profile):
+        return Task(
+            description=f"""
+            Review this Python code for a {skill_level} student. Concerns: {specific_concerns or 'none'}.
+            ```python
+            {code_snippet}
+            ```
+            {analysis_section(findings)}
+            {context_section(context)}
+            Check syntax, logic, efficiency, PEP 8, error handling and edge cases. Most important issues first;
+            for each, say why it's a problem and show the fix. Be encouraging.
+            """,
+            expected_output="A Markdown review: overall assessment, issues with explanations and corrected snippets, then the full corrected code.",
+            agent=None,
+            output_file='code_review.md',
+            config={},
+        )
     return Task(
         description=f"""
         You are reviewing the following Python code for a **{skill_level}** level student:
@@ -75,6 +149,8 @@ def code_review_task(code_snippet, skill_level, specific_concerns=""):
         ```
 
         Specific Concerns: {specific_concerns if specific_concerns else 'None provided'}
+        {analysis_section(findings)}
+        {context_section(context)}
 
         REQUIREMENTS:
         1. Check **syntax and structure** for correctness.
@@ -112,7 +188,21 @@ def code_review_task(code_snippet, skill_level, specific_concerns=""):
 # -----------------------------
 #  Curriculum Design Task
 # -----------------------------
-def curriculum_task(student_goals, current_level, time_availability, specific_interests=""):
+def curriculum_task(student_goals, current_level, time_availability, specific_interests="", context="", profile=None):
+    if _compact(profile):
+        return Task(
+            description=f"""
+            Design a Python learning plan. Level: {current_level}. Goals: {student_goals}.
+            Time: {time_availability}. Interests: {specific_interests or 'not provided'}.
+            {context_section(context)}
+            Realistic weekly or monthly milestones, with topics, resources, a practice project per milestone,
+            progress checkpoints and tips for learning plateaus.
+            """,
+            expected_output="A Markdown learning plan: overview, timeline with topics and resources, projects, checkpoints, motivation tips.",
+            agent=None,
+            output_file='learning_plan.md',
+            config={},
+        )
     return Task(
         description=f"""
         Design a personalized **Python learning curriculum**.
@@ -122,6 +212,7 @@ def curriculum_task(student_goals, current_level, time_availability, specific_in
         - Goals: {student_goals}
         - Time Availability: {time_availability}
         - Specific Interests: {specific_interests if specific_interests else 'Not provided'}
+        {context_section(context)}
 
         REQUIREMENTS:
         1. Provide an **overall learning roadmap** with milestones.
@@ -157,14 +248,27 @@ def curriculum_task(student_goals, current_level, time_availability, specific_in
 # -----------------------------
 #  Quiz Creation Task
 # -----------------------------
-def quiz_task(topic, skill_level, quiz_type="mixed"):
+def quiz_task(topic, skill_level, quiz_type="mixed", context="", profile=None):
+    if _compact(profile):
+        return Task(
+            description=f"""
+            Write a {quiz_type} quiz on '{topic}' for a {skill_level} student.
+            {context_section(context)}
+            5-8 clear questions of varying difficulty: multiple choice with plausible distractors, output
+            prediction and bug spotting. Test understanding, not trivia.
+            """,
+            expected_output="A Markdown quiz: instructions, questions, an answer key explaining right and wrong answers, scoring guide.",
+            agent=None,
+            output_file='quiz.md',
+            config={},
+        )
     return Task(
         description=f"""
         Create a **{quiz_type} quiz** on the topic **'{topic}'**.
 
         STUDENT PROFILE:
         - Skill Level: {skill_level}
-
+        {context_section(context)}
         REQUIREMENTS:
         1. Include **5–8 questions** of varying difficulty.
         2. Use a mix of question types:
@@ -201,13 +305,29 @@ def quiz_task(topic, skill_level, quiz_type="mixed"):
 # -----------------------------
 #  Coordination Task
 # -----------------------------
-def coordination_task(context, student_query, student_level, student_goals):
+def coordination_task(context, student_query, student_level, student_goals, profile=None):
     # Make sure context is always turned into a readable string
     if isinstance(context, list):
         context_str = "\n".join(context)
     else:
         context_str = str(context)
 
+    if _compact(profile):
+        return Task(
+            description=f"""
+            Student query: {student_query}
+            Level: {student_level}. Goals: {student_goals or 'not provided'}.
+            Conversation so far:
+            {context_str}
+
+            Decide which specialist(s) should handle this, what each should do, and how it continues
+            the student's learning. Delegate if needed and combine the results.
+            """,
+            expected_output="A short coordination plan: needs analysis, specialists and their tasks, and next learning steps.",
+            agent=None,
+            output_file="coordination_plan.md",
+            config={},
+        )
     return Task(
         description=f"""
         Coordinate the learning experience for a student with these characteristics:
@@ -244,7 +364,21 @@ def coordination_task(context, student_query, student_level, student_goals):
 # -----------------------------
 #  Conversation Task
 # -----------------------------
-def conversation_task(user_input, context=""):
+def conversation_task(user_input, context="", profile=None):
+    if _compact(profile):
+        return Task(
+            description=f"""
+            Reply to this casual message from a Python student: "{user_input}"
+            Context from previous messages: {context}
+
+            1-2 friendly, natural sentences matching their tone. No technical explanations; if they want more,
+            invite a specific Python question.
+            """,
+            expected_output="A brief, friendly reply (1-2 sentences)",
+            agent=None,
+            output_file='conversation_log.md',
+            config={},
+        )
     return Task(
         description=f"""
         Handle this casual conversation message from the student: "{user_input}"
@@ -0,0 +1,455 @@
+"""
+Lightweight per-request tracing and Prometheus-text metrics.
+
+``trace_request`` opens the root span of a request. ``span`` opens nested
+spans under it. Spans carry the session id, intent and agent. Nesting
+follows contextvars, so spans opened on ``asyncio.to_thread`` branches
+attach to the right request. When the root span ends, the whole trace is
+written to a rotating JSONL file (PYTHONAUT_TRACE_FILE, "off" to disable).
+
+Span durations also feed histograms labelled by span name and intent. LLM
+calls and tool calls are picked up from CrewAI's event bus and recorded as
+children of the running ``kickoff`` span. Metrics are served in Prometheus
+text format on PYTHONAUT_METRICS_PORT when that is set
+(``start_metrics_server``). A span opened outside any request (e.g. a
+render) only feeds the histograms.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_TRACE_FILE = BASE_DIR / "traces" / "trace.jsonl"
+
+# Seconds; Prometheus "le" bounds for every histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_current = contextvars.ContextVar("pythonaut_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "start", "end", "_t0")
+
+    def __init__(self, trace, name, parent_id=None, attrs=None, start=None):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.start = time.time() if start is None else start
+        self._t0 = time.perf_counter()
+        self.end = None
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        self.end = self.start + (time.perf_counter() - self._t0)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace.trace_id if self.trace else None,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+        }
+
+
+class Trace:
+    """All spans of one request."""
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self.root = None
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+
+# ---- Metrics ----
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Metrics:
+    """Span histograms, counters and registered gauge collectors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}   # (span, intent) -> Histogram
+        self._counters = {}     # (name, labels tuple) -> value
+        self._collectors = {}   # prefix -> callable returning {name: number}
+
+    def observe(self, span_name, intent, seconds):
+        with self._lock:
+            key = (span_name, intent or "")
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, prefix, fn):
+        """Export ``fn()``'s numeric values as gauges named pythonaut_<prefix>_<key>."""
+        with self._lock:
+            self._collectors[prefix] = fn
+
+    def render(self):
+        """Everything in Prometheus text exposition format."""
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+            collectors = dict(self._collectors)
+
+        lines = [
+            "# HELP pythonaut_span_duration_seconds Duration of traced spans by span name and intent.",
+            "# TYPE pythonaut_span_duration_seconds histogram",
+        ]
+        for (span_name, intent), (counts, total, count) in sorted(histograms.items()):
+            labels = f'span="{_escape(span_name)}",intent="{_escape(intent)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'pythonaut_span_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'pythonaut_span_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"pythonaut_span_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"pythonaut_span_duration_seconds_count{{{labels}}} {count}")
+
+        typed = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"pythonaut_{name}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+
+        for prefix, fn in sorted(collectors.items()):
+            try:
+                values = fn()
+            except Exception as e:
+                print("Failed collecting metrics:", prefix, e)
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"pythonaut_{prefix}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+# ---- Trace output ----
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _trace_logger():
+    """Logger writing one JSON span per line to a rotating file, or None when disabled."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                path = os.getenv("PYTHONAUT_TRACE_FILE", str(DEFAULT_TRACE_FILE))
+                logger = logging.getLogger("pythonaut.trace")
+                logger.propagate = False
+                logger.setLevel(logging.INFO)
+                if path.lower() != "off":
+                    Path(path).parent.mkdir(parents=True, exist_ok=True)
+                    handler = logging.handlers.RotatingFileHandler(
+                        path,
+                        maxBytes=int(float(os.getenv("PYTHONAUT_TRACE_MAX_MB", "20")) * 1024 * 1024),
+                        backupCount=int(os.getenv("PYTHONAUT_TRACE_BACKUPS", "5")),
+                        encoding="utf-8",
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    logger.addHandler(handler)
+                    _writer = logger
+                else:
+                    _writer = False
+    return _writer or None
+
+
+def _write_trace(trace):
+    logger = _trace_logger()
+    if logger is None:
+        return
+    try:
+        for span in sorted(trace.spans, key=lambda s: s.start):
+            logger.info(json.dumps(span.to_dict(), ensure_ascii=False, default=str))
+    except Exception as e:
+        # don't fail the request because a trace couldn't be written; log in console
+        print("Failed writing trace:", e)
+
+
+# ---- Spans ----
+def current_span():
+    return _current.get()
+
+
+def _intent_of(span):
+    if span is None:
+        return ""
+    root = span.trace.root if span.trace else span
+    return span.attrs.get("intent") or (root.attrs.get("intent") if root else "") or ""
+
+
+def current_intent():
+    """Intent the running request was routed to ("" outside a request or before routing)."""
+    return _intent_of(_current.get())
+
+
+def _close(span):
+    span.finish()
+    metrics.observe(span.name, _intent_of(span), span.duration)
+
+
+@contextmanager
+def trace_request(session_id=None, **attrs):
+    """Root span of one request; the trace is written out when it ends."""
+    trace = Trace()
+    root = Span(trace, "request", attrs=dict(attrs, session_id=session_id))
+    trace.root = root
+    trace.add(root)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.set(error=repr(e))
+        raise
+    finally:
+        _current.reset(token)
+        _close(root)
+        _write_trace(trace)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Child span of the current span (or a metrics-only span outside any request)."""
+    parent = _current.get()
+    trace = parent.trace if parent is not None else None
+    child = Span(trace, name, parent_id=parent.span_id if parent else None, attrs=attrs)
+    if trace is not None:
+        trace.add(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set(error=repr(e))
+        raise
+    finally:
+        _current.reset(token)
+        _close(child)
+
+
+def annotate_request(**attrs):
+    """Set attributes (intent, agent, ...) on the current request's root span."""
+    current = _current.get()
+    if current is not None and current.trace is not None:
+        current.trace.root.set(**attrs)
+
+
+def routed(intent):
+    """Tag the request with its intent and record routing time (request start until now)."""
+    current = _current.get()
+    if current is None or current.trace is None:
+        return
+    root = current.trace.root
+    root.set(intent=intent)
+    route = Span(current.trace, "route", parent_id=root.span_id, attrs={"intent": intent}, start=root.start)
+    route.end = time.time()
+    current.trace.add(route)
+    metrics.observe("route", intent, route.duration)
+
+
+# ---- CrewAI events: LLM and tool calls inside a kickoff ----
+_kickoffs_lock = threading.Lock()
+_kickoffs_by_thread = {}
+_kickoffs_by_task = {}
+_open_calls = {}            # (span_id, kind) -> list of (start, name)
+_hooks_installed = False
+
+
+def _load_crewai_events():
+    try:
+        import crewai.events as events
+    except ImportError:
+        try:
+            import crewai.utilities.events as events
+        except ImportError:
+            return None
+    return events
+
+
+def _kickoff_for(event):
+    task_id = getattr(event, "task_id", None)
+    with _kickoffs_lock:
+        found = _kickoffs_by_task.get(str(task_id)) if task_id else None
+        return found or _kickoffs_by_thread.get(threading.get_ident())
+
+
+def _call_started(kind):
+    def handler(source, event):
+        kickoff = _kickoff_for(event)
+        if kickoff is None:
+            return
+        name = getattr(event, "tool_name", None) or getattr(event, "model", None) or kind
+        with _kickoffs_lock:
+            _open_calls.setdefault((kickoff.span_id, kind), []).append((time.time(), name))
+    return handler
+
+
+def _call_finished(kind, failed=False):
+    def handler(source, event):
+        kickoff = _kickoff_for(event)
+        if kickoff is None:
+            return
+        with _kickoffs_lock:
+            pending = _open_calls.get((kickoff.span_id, kind))
+            if not pending:
+                return
+            start, name = pending.pop(0)
+        call = Span(kickoff.trace, kind, parent_id=kickoff.span_id, start=start,
+                    attrs={"name": name, "agent": kickoff.attrs.get("agent")})
+        call.end = time.time()
+        if failed:
+            call.set(error=str(getattr(event, "error", "failed")))
+        if kickoff.trace is not None:
+            kickoff.trace.add(call)
+        metrics.observe(kind, _intent_of(kickoff), call.duration)
+        if kind == "llm_call":
+            kickoff.set(llm_calls=kickoff.attrs.get("llm_calls", 0) + 1)
+            metrics.inc("llm_calls", agent=kickoff.attrs.get("agent") or "")
+        else:
+            kickoff.set(tool_calls=kickoff.attrs.get("tool_calls", 0) + 1)
+            metrics.inc("tool_calls", tool=name)
+    return handler
+
+
+def install_crewai_hooks():
+    """Register LLM/tool call handlers on CrewAI's event bus once per process."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    events = _load_crewai_events()
+    if events is None:
+        return
+    with _kickoffs_lock:
+        if _hooks_installed:
+            return
+        bus = events.crewai_event_bus
+        pairs = [
+            ("LLMCallStartedEvent", _call_started("llm_call")),
+            ("LLMCallCompletedEvent", _call_finished("llm_call")),
+            ("LLMCallFailedEvent", _call_finished("llm_call", failed=True)),
+            ("ToolUsageStartedEvent", _call_started("tool_call")),
+            ("ToolUsageFinishedEvent", _call_finished("tool_call")),
+            ("ToolUsageErrorEvent", _call_finished("tool_call", failed=True)),
+        ]
+        for event_name, handler in pairs:
+            event_type = getattr(events, event_name, None)
+            if event_type is not None:
+                bus.on(event_type)(handler)
+        _hooks_installed = True
+
+
+@contextmanager
+def kickoff_span(agent, task_id=None, **attrs):
+    """Span around crew.kickoff() that collects the LLM and tool calls made inside it."""
+    install_crewai_hooks()
+    with span("kickoff", agent=agent, **attrs) as kickoff:
+        ident = threading.get_ident()
+        with _kickoffs_lock:
+            _kickoffs_by_thread[ident] = kickoff
+            if task_id:
+                _kickoffs_by_task[str(task_id)] = kickoff
+        try:
+            yield kickoff
+        finally:
+            with _kickoffs_lock:
+                _kickoffs_by_thread.pop(ident, None)
+                if task_id:
+                    _kickoffs_by_task.pop(str(task_id), None)
+                for kind in ("llm_call", "tool_call"):
+                    _open_calls.pop((kickoff.span_id, kind), None)
+
+
+# ---- Metrics endpoint ----
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None):
+    """Serve /metrics on PYTHONAUT_METRICS_PORT (or ``port``) once per process; no-op when unset."""
+    global _server
+    port = port or os.getenv("PYTHONAUT_METRICS_PORT")
+    if not port or _server is not None:
+        return _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((os.getenv("PYTHONAUT_METRICS_HOST", "127.0.0.1"), int(port)), MetricsHandler)
+        except OSError as e:
+            print("Failed starting metrics server:", e)
+            return None
+        threading.Thread(target=server.serve_forever, name="pythonaut-metrics", daemon=True).start()
+        _server = server
+    return _server
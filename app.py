@@ -17,29 +17,14 @@ except ImportError:
 
 import streamlit as st
 import time
-import json
 from pathlib import Path
-from crewai import Crew, Task, Process
-from TutorTasks import (
-    teaching_task,
-    code_review_task,
-    curriculum_task,
-    quiz_task,
-    coordination_task,
-    task_to_strings,
-    conversation_task
-)
-# Your agent objects (must exist in TutorAgents.py)
-from TutorAgents import (
-    teaching_expert,
-    code_reviewer,
-    curriculum_planner,
-    quiz_master,
-    project_coordinator,
-    conversation_agent
-)
 from streamlit_local_storage import LocalStorage
-import re
+from TutorRendering import LiveBubble, message_html
+from TutorStorage import LocalStorageSync, get_artifact_store
+# Agent runs happen on the shared worker pool; crewai itself is imported there on first use
+from TutorJobs import get_job_queue, JobLimitError, DONE, FAILED, CANCELLED
+from TutorRouting import process_user_input
+from TutorTracing import span, metrics, start_metrics_server
 
 # Set BASE_DIR to the current directory
 BASE_DIR = Path(__file__).resolve().parent
@@ -254,27 +239,45 @@ window.addEventListener('load', function() {
 if "local_storage" not in st.session_state:
     st.session_state.local_storage = LocalStorage()
 
-if "messages" not in st.session_state:
-    # Try to load existing chat
-    st.session_state.messages = []
-    chat_loaded = False
+# History and task reports are kept per session (see TutorStorage.ArtifactStore)
+artifact_store = get_artifact_store()
+# Agent generations run on a process-wide worker pool (see TutorJobs)
+job_queue = get_job_queue()
+
+# Prometheus metrics on PYTHONAUT_METRICS_PORT, started once per process (see TutorTracing)
+if start_metrics_server() is not None:
+    from TutorCache import get_response_cache
+    from TutorCoalescing import inflight_generations
+    from TutorContext import get_conversation_context, prompt_metrics
+    from TutorAgents import get_model_router
+    from TutorLLM import get_llm_pool
+    from TutorSmallTalk import stats as small_talk_stats
+
+    def response_cache_stats():
+        cache = get_response_cache()
+        return cache.stats() if cache is not None else {}
+
+    metrics.register_collector("jobs", job_queue.stats)
+    metrics.register_collector("response_cache", response_cache_stats)
+    metrics.register_collector("coalescing", inflight_generations.stats)
+    metrics.register_collector("context", get_conversation_context().stats)
+    metrics.register_collector("prompt", prompt_metrics.gauges)
+    metrics.register_collector("small_talk", small_talk_stats)
+    metrics.register_collector("artifacts", artifact_store.stats)
+    metrics.register_collector("llm_pool", get_llm_pool().stats)
+    metrics.register_collector("model_router", get_model_router().stats)
+
+if "session_id" not in st.session_state:
+    st.session_state.local_sync = LocalStorageSync(st.session_state.local_storage)
+    st.session_state.session_id = st.session_state.local_sync.session_id()
 
-    # Try to load from local storage first
-    try:
-        saved_chat = st.session_state.local_storage.getItem("pythonaut_chat_history")
-        if saved_chat and saved_chat.value:
-            st.session_state.messages = json.loads(saved_chat.value)
-            chat_loaded = True
-    except:
-        pass
-
-    # Fallback to file loading
-    if not chat_loaded:
+if "messages" not in st.session_state:
+    # Try to load from local storage first, then fall back to this session's journal
+    st.session_state.messages = st.session_state.local_sync.load()
+    if st.session_state.messages is None:
         try:
-            if os.path.exists("chat_history.json"):
-                with open("chat_history.json", "r", encoding="utf-8") as f:
-                    st.session_state.messages = json.load(f)
-        except:
+            st.session_state.messages = artifact_store.load_history(st.session_state.session_id)
+        except Exception:
             st.session_state.messages = []
 
 if "chat_started" not in st.session_state:
@@ -286,97 +289,104 @@ if "user_info" not in st.session_state:
 if "processing" not in st.session_state:
     st.session_state.processing = False
 
+# Id of the background job generating the current reply, if any
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
+
+# Renderer for the reply being streamed, kept across polls (see render_live_reply)
+if "live_bubble" not in st.session_state:
+    st.session_state.live_bubble = None
+
 # Add a key for chat input reset
 if "chat_input_key" not in st.session_state:
     st.session_state.chat_input_key = 0
 
-CHAT_SAVE_FILENAME = "chat_history.json"
-
-
 # -------------------------
 # Helpers
 # -------------------------
-def save_chat(filename=CHAT_SAVE_FILENAME):
-    """Save chat history as a JSON file and to local storage."""
+def append_message(role, content):
+    """Add a message to the history and persist just that message (session journal + local storage page)."""
+    message = {"role": role, "content": content}
+    st.session_state.messages.append(message)
     try:
-        # Save to file
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(st.session_state.messages, f, indent=2, ensure_ascii=False)
-
-        # Also save to browser local storage
-        st.session_state.local_storage.setItem("pythonaut_chat_history",
-                                               json.dumps(st.session_state.messages))
+        artifact_store.append_message(st.session_state.session_id, message, st.session_state.messages)
+        st.session_state.local_sync.append(st.session_state.messages)
     except Exception as e:
         # don't crash UI if saving fails; log in console
         print("Failed saving chat:", e)
 
 
-def safe_extract_text(result_obj):
-    """Best-effort textual extraction from Crew kickoff result."""
-    if result_obj is None:
-        return "No response (result was None)."
-    # Common Crew result attributes
-    for attr in ("raw", "output", "final_output", "result", "text"):
-        if hasattr(result_obj, attr):
-            val = getattr(result_obj, attr)
-            if isinstance(val, str) and val.strip():
-                return val
-            # sometimes raw is an object/dict; convert to string
-            try:
-                return json.dumps(val, indent=2, ensure_ascii=False)
-            except Exception:
-                return str(val)
-    # If it's a string directly
-    if isinstance(result_obj, str):
-        return result_obj
-    # fallback
-    try:
-        return str(result_obj)
-    except Exception:
-        return "(No textual output available)"
-
-
-def format_code_blocks(text):
-    """Format code blocks in text with proper HTML and preserve quotes."""
-    # Find all code blocks
-    code_blocks = re.findall(r'```(?:python)?\s*(.*?)\s*```', text, re.DOTALL)
-
-    # Replace each code block with formatted HTML
-    for code in code_blocks:
-        # Replace HTML entities with actual characters in code blocks
-        unescaped_code = code.replace('&quot;', '"').replace('&#x27;', "'")
-        # Wrap in code block div
-        html_code = f'<div class="code-block">{unescaped_code}</div>'
-        text = text.replace(f'```{code}```', html_code)
-
-    return text
-
-
-def typewriter_stream(text, placeholder, delay=0.015):
-    """Stream characters into placeholder.markdown() with bubble styling."""
-    # Show typing indicator first
+def show_typing_indicator(placeholder):
+    """Show the 'thinking' dots until the first token arrives."""
     placeholder.markdown("""
     <div class="typing-indicator">
-        Pythonaut is thinking 
+        Pythonaut is thinking
         <div class="typing-dot"></div>
         <div class="typing-dot"></div>
         <div class="typing-dot"></div>
     </div>
     """, unsafe_allow_html=True)
 
-    # Add a small delay to simulate thinking
-    time.sleep(1.5)
 
-    # Now stream the text
-    out = ""
-    for ch in text:
-        out += ch
-        # Format code blocks
-        formatted_out = format_code_blocks(out)
-        placeholder.markdown(f'<div class="chat-row"><div class="bubble ai">{formatted_out}</div></div>',
-                             unsafe_allow_html=True)
-        time.sleep(delay)
-    return out
+def render_live_reply(placeholder, job, restarts, text):
+    """
+    Render the partial reply of job into placeholder with bubble styling. The
+    job's LiveBubble lives in the session, so each poll formats only the text
+    streamed since the last one instead of the whole reply again.
+    """
+    bubble = st.session_state.live_bubble
+    if bubble is None or bubble.job_id != job.id:
+        bubble = st.session_state.live_bubble = LiveBubble(job.id)
+    with span("render", chars=len(text)):
+        bubble.paint(placeholder, restarts, text)
+
+
+def start_job(user_input):
+    """Queue the reply to user_input on the worker pool; returns an error reply if the user is at their limit."""
+    # Worker threads can't read st.session_state, so hand them plain copies
+    user_info = dict(st.session_state.user_info)
+    session_id = st.session_state.session_id
+    history = list(st.session_state.messages[:-1])
+    previous_reply = next((m["content"] for m in reversed(history) if m["role"] == "assistant"), None)
+    try:
+        job = job_queue.submit(
+            session_id,
+            lambda job: process_user_input(user_input, user_info, session_id, previous_reply,
+                                           on_delta=job.emit, history=history),
+        )
+    except JobLimitError:
+        return "You already have a question in progress in another tab. Please wait for it to finish."
+    st.session_state.job_id = job.id
+    return None
+
+
+def current_job():
+    if not st.session_state.job_id:
+        return None
+    return job_queue.get(st.session_state.job_id, owner=st.session_state.session_id)
+
+
+def job_reply(job):
+    """Final assistant text for a finished job."""
+    if job.status == DONE:
+        return job.result
+    if job.status == FAILED:
+        # If Crew or Task creation throws, show the error but do not crash
+        return f"Error while running agent task: {job.error}"
+    if job.status == CANCELLED:
+        return (job.text + "\n\n_(stopped)_") if job.text else "Stopped before an answer was ready."
+    return (f"Sorry, that took longer than {job.timeout:.0f} seconds, so I stopped waiting. "
+            "Please try again, or ask about a narrower topic.")
+
+
+def finish_processing(reply):
+    """Store the assistant reply and re-enable the chat input."""
+    append_message("assistant", reply)
+    st.session_state.job_id = None
+    st.session_state.live_bubble = None
+    st.session_state.processing = False
+    # Increment the chat input key to force a reset
+    st.session_state.chat_input_key += 1
 
 
 # -------------------------
@@ -393,10 +403,15 @@ with col1:
 
 with col2:
     if st.button("Reset Chat", type="secondary"):
+        job = job_queue.get(st.session_state.job_id) if st.session_state.job_id else None
+        if job is not None:
+            job.cancel()
+        st.session_state.job_id = None
+        st.session_state.live_bubble = None
+        st.session_state.processing = False
+        st.session_state.local_sync.clear(len(st.session_state.messages))
+        artifact_store.clear_history(st.session_state.session_id)
         st.session_state.messages = []
-        st.session_state.local_storage.deleteItem("pythonaut_chat_history")
-        if os.path.exists(CHAT_SAVE_FILENAME):
-            os.remove(CHAT_SAVE_FILENAME)
         st.session_state.chat_started = False
         st.session_state.chat_input_key += 1
         st.rerun()
@@ -418,308 +433,107 @@ if not st.session_state.messages:
         "Tell me about your current experience with Python (beginner/intermediate/advanced), "
         "and what you'd like to achieve (web development, data analysis, automation, etc.)."
     )
-    st.session_state.messages.append({"role": "assistant", "content": greeting})
+    append_message("assistant", greeting)
     st.session_state.chat_started = True
-    save_chat()
 
 # -------------------------
-# Render chat history
+# Chat area: history + input, isolated so a new message only re-runs this part
 # -------------------------
-st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-for msg in st.session_state.messages:
-    if msg["role"] == "user":
-        st.markdown(f'<div class="chat-row user"><div class="bubble user">{msg["content"]}</div></div>',
-                    unsafe_allow_html=True)
-    else:
-        formatted_content = format_code_blocks(msg["content"])
-        st.markdown(f'<div class="chat-row"><div class="bubble ai">{formatted_content}</div></div>',
-                    unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
+# st.fragment needs Streamlit >= 1.37; older versions just re-run the whole script
+chat_fragment = getattr(st, "fragment", None)
+HISTORY_PAGE_SIZE = 30
+# How often a running job's partial answer is repainted
+JOB_POLL_SECONDS = 0.5
 
+if "history_window" not in st.session_state:
+    st.session_state.history_window = HISTORY_PAGE_SIZE
 
-# -------------------------
-# Process user input & assign tasks to agents correctly
-# -------------------------
-def process_user_input_and_run(user_input: str) -> str:
-    """
-    Decide which task to create and which agent should run it,
-    assign the Task.agent properly and run Crew.kickoff() for that one task.
-    Returns the textual result.
-    """
-    # Normalize input
-    lower = user_input.lower().strip()
-    skill = st.session_state.user_info.get("level", "beginner")
-    goals = st.session_state.user_info.get("goals", "")
-
-    # Check for empty or very short messages
-    if not user_input or len(user_input.strip()) < 2:
-        return "I'm here to help you learn Python! What would you like to know about?"
-
-    # ===== CONVERSATIONAL MESSAGES =====
-    conversational_phrases = {
-        # Greetings
-        "greeting": ["hi", "hello", "hey", "hola", "greetings", "good morning", "good afternoon", "good evening"],
-        # Thanks
-        "thanks": ["thank", "thanks", "appreciate", "grateful", "cheers", "thx"],
-        # Goodbyes
-        "goodbye": ["bye", "goodbye", "see you", "farewell", "cya", "see ya"],
-        # How are you
-        "how_are_you": ["how are you", "how's it going", "what's up", "how do you do"],
-        # Positive feedback
-        "positive": ["great", "awesome", "amazing", "wonderful", "perfect", "excellent", "good", "nice", "cool"],
-        # Negative feedback
-        "negative": ["bad", "terrible", "awful", "horrible", "not good", "sucks"],
-        # Confusion
-        "confusion": ["confused", "don't understand", "not clear", "help me", "what does this mean"],
-        # Agreement
-        "agreement": ["yes", "yeah", "yep", "sure", "okay", "ok", "alright", "of course"],
-        # Disagreement
-        "disagreement": ["no", "nope", "nah", "not really", "disagree"],
-        # Encouragement
-        "encouragement": ["wow", "impressive", "brilliant", "fantastic", "well done"],
-        # Apologies
-        "apology": ["sorry", "apologize", "my bad", "oops", "whoops"]
-    }
 
-    # Check for conversational intent
-    is_conversational = False
-    conversational_type = None
-
-    for intent, phrases in conversational_phrases.items():
-        if any(phrase in lower for phrase in phrases):
-            is_conversational = True
-            conversational_type = intent
-            break
-
-    # Also check if it's a very short message (likely conversational)
-    is_short_message = len(user_input.split()) <= 3
-
-    if is_conversational or is_short_message:
-        # Use conversation agent for casual chat
-        base_task = conversation_task(user_input, context="")
-        desc, expected = task_to_strings(base_task)
-        assigned_task = Task(
-            description=desc,
-            expected_output=expected or base_task.expected_output,
-            agent=conversation_agent,
-            output_file=getattr(base_task, "output_file", "conversation_log.md"),
-            config={},
-        )
-        crew = Crew(agents=[conversation_agent], tasks=[assigned_task], process=Process.sequential, verbose=False)
-        result = crew.kickoff()
-        return safe_extract_text(result)
-
-    # ===== TEACHING INTENT =====
-    teaching_phrases = [
-        "teach me", "explain", "what is", "how to", "learn python",
-        "step by step", "from start", "beginner guide", "tutorial",
-        "concept", "lesson", "course", "understand", "help me learn",
-        "what are", "how do i", "can you show me", "demonstrate",
-        "tell me about", "i want to learn", "show me how"
-    ]
-
-    teaching_requested = any(phrase in lower for phrase in teaching_phrases)
-
-    # If it's clearly a teaching request, route to teaching expert
-    if teaching_requested:
-        # Use the user's phrase as topic when appropriate, else generic "Getting started"
-        topic = user_input if len(user_input.split()) < 30 else "Python programming from beginner to advanced"
-        base_task = teaching_task(topic, skill, student_background="")
-        desc, expected = task_to_strings(base_task)
-        assigned_task = Task(
-            description=desc,
-            expected_output=expected or base_task.expected_output,
-            agent=teaching_expert,
-            output_file=getattr(base_task, "output_file", "teaching_report.md"),
-            config={},
-        )
+def rerun_chat():
+    """Re-run only the chat fragment when fragments are available."""
+    if chat_fragment is not None:
+        st.rerun(scope="fragment")
+    else:
+        st.rerun()
 
-        crew = Crew(agents=[teaching_expert], tasks=[assigned_task], process=Process.sequential, verbose=False)
-        result = crew.kickoff()
-        text = safe_extract_text(result)
-        return text
-
-    # ===== CODE REVIEW INTENT =====
-    code_review_phrases = [
-        "review my code", "check this code", "debug", "code review",
-        "what's wrong", "whats wrong", "error", "fix this",
-        "why isn't this working", "can you tell me whats wrong",
-        "what is wrong with this", "help with this code",
-        "why is this not working", "this code doesn't work",
-        "fix my code", "bug in my code", "help me fix",
-        "syntax error", "runtime error", "logic error"
-    ]
-
-    code_review_requested = any(phrase in lower for phrase in code_review_phrases)
-
-    # Enhanced Python code detection
-    has_python_code = False
-    python_indicators = [
-        "import ", "def ", "class ", "if ", "for ", "while ", "try:", "except:",
-        "print(", "input(", "float(", "int(", "str(", "range(", "len(",
-        " = ", " == ", " != ", " += ", " -= ", " *= ", " /= ",
-        " and ", " or ", " not ", " in ", " is ", " with ", " as ",
-        "from ", "return ", "yield ", "assert ", "raise ", "pass ", "break ", "continue ",
-        "def ", "lambda ", "global ", "nonlocal ", "async ", "await ", "del ",
-        "if __name__", "self.", "super(", "init(", "repr(", "str(", "len("
-    ]
-
-    for indicator in python_indicators:
-        if indicator in user_input:
-            has_python_code = True
-            break
-
-    # Also check for common Python patterns
-    if not has_python_code:
-        if (re.search(r'[a-zA-Z_][a-zA-Z0-9_]*\s*=', user_input) or  # variable assignment
-                re.search(r'[a-zA-Z_][a-zA-Z0-9_]*\s*\(', user_input) or  # function call
-                re.search(r'("""|\'\'\'|"|\').*?("""|\'\'\'|"|\')', user_input) or  # strings
-                re.search(r'#.*', user_input) or  # comments
-                re.search(r'(if|for|while|def|class|try|except|with)\s+[a-zA-Z_]', user_input)):  # control flow
-            has_python_code = True
-
-    # Check for code blocks with backticks
-    has_code_block = re.search(r"```(?:python)?\s*(.*?)\s*```", user_input, re.DOTALL | re.IGNORECASE)
-
-    # If user is asking for code review or has Python code with a question, route to code reviewer
-    if code_review_requested or (has_python_code and any(q in lower for q in ["?", "what", "why", "how", "help"])):
-        # Extract code - use the entire input if no code block is found
-        code = has_code_block.group(1) if has_code_block else user_input
-
-        base_task = code_review_task(code, skill)
-        desc, expected = task_to_strings(base_task)
-        assigned_task = Task(
-            description=desc,
-            expected_output=expected or base_task.expected_output,
-            agent=code_reviewer,
-            output_file=getattr(base_task, "output_file", "code_review.md"),
-            config={},
-        )
-        crew = Crew(agents=[code_reviewer], tasks=[assigned_task], process=Process.sequential, verbose=False)
-        result = crew.kickoff()
-        return safe_extract_text(result)
-
-    # ===== CURRICULUM INTENT =====
-    curriculum_phrases = [
-        "curriculum", "learning path", "syllabus", "study plan",
-        "roadmap", "learning journey", "what should i learn",
-        "where to start", "how to learn python", "study guide",
-        "learning schedule", "course outline"
-    ]
-
-    if any(p in lower for p in curriculum_phrases):
-        base_task = curriculum_task(goals, skill, time_availability="regular",
-                                    specific_interests=st.session_state.user_info.get("interests", ""))
-        desc, expected = task_to_strings(base_task)
-        assigned_task = Task(
-            description=desc,
-            expected_output=expected or base_task.expected_output,
-            agent=curriculum_planner,
-            output_file=getattr(base_task, "output_file", "learning_plan.md"),
-            config={},
-        )
-        crew = Crew(agents=[curriculum_planner], tasks=[assigned_task], process=Process.sequential, verbose=False)
-        result = crew.kickoff()
-        return safe_extract_text(result)
-
-    # ===== QUIZ INTENT =====
-    quiz_phrases = [
-        "quiz", "test me", "question", "exam", "assessment",
-        "challenge me", "test my knowledge", "practice questions",
-        "multiple choice", "trivia", "pop quiz"
-    ]
-
-    if any(p in lower for p in quiz_phrases):
-        topic = "Python basics"
-        for cue in ("about", "on"):
-            if cue in lower:
-                idx = lower.find(cue) + len(cue)
-                topic = user_input[idx:].strip(" :?") or topic
-                break
-        base_task = quiz_task(topic, skill)
-        desc, expected = task_to_strings(base_task)
-        assigned_task = Task(
-            description=desc,
-            expected_output=expected or base_task.expected_output,
-            agent=quiz_master,
-            output_file=getattr(base_task, "output_file", "quiz.md"),
-            config={},
-        )
-        crew = Crew(agents=[quiz_master], tasks=[assigned_task], process=Process.sequential, verbose=False)
-        result = crew.kickoff()
-        return safe_extract_text(result)
-
-    # ===== DEFAULT: COORDINATOR =====
-    # For everything else, use the coordinator to figure out the best approach
-    base_task = coordination_task([f"user: {user_input}"], user_input, skill, goals)
-    desc, expected = task_to_strings(base_task)
-    assigned_task = Task(
-        description=desc,
-        expected_output=expected or base_task.expected_output,
-        agent=project_coordinator,
-        output_file=getattr(base_task, "output_file", "coordination_plan.md"),
-        config={},
-    )
-    crew = Crew(agents=[project_coordinator], tasks=[assigned_task], process=Process.sequential, verbose=False)
-    result = crew.kickoff()
-    return safe_extract_text(result)
 
-# -------------------------
-# Chat input handling
-# -------------------------
-# Disable chat input if processing
-if st.session_state.processing:
-    st.markdown('<div class="disabled-chat">', unsafe_allow_html=True)
-
-# Use a key that will change to force reset
-user_input = st.chat_input(
-    "Tell me about your Python experience or ask for a lesson...",
-    disabled=st.session_state.processing,
-    key=f"chat_input_{st.session_state.chat_input_key}"
-)
+def chat_area():
+    messages = st.session_state.messages
+
+    # Only the most recent messages are rendered; older ones load on demand
+    hidden = max(0, len(messages) - st.session_state.history_window)
+    if hidden:
+        if st.button(f"Show earlier messages ({hidden} hidden)", key="show_earlier_messages"):
+            st.session_state.history_window += HISTORY_PAGE_SIZE
+            rerun_chat()
 
-if st.session_state.processing:
+    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+    for msg in messages[hidden:]:
+        st.markdown(message_html(msg["role"], msg["content"]), unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-if user_input and not st.session_state.processing:
-    # Set processing flag
-    st.session_state.processing = True
+    # Disable chat input if processing
+    if st.session_state.processing:
+        st.markdown('<div class="disabled-chat">', unsafe_allow_html=True)
 
-    # append user message immediately
-    st.session_state.messages.append({"role": "user", "content": user_input})
-    save_chat()
+    # Use a key that will change to force reset
+    user_input = st.chat_input(
+        "Tell me about your Python experience or ask for a lesson...",
+        disabled=st.session_state.processing,
+        key=f"chat_input_{st.session_state.chat_input_key}"
+    )
 
-    # Rerun to show the user message immediately
-    st.rerun()
+    if st.session_state.processing:
+        st.markdown('</div>', unsafe_allow_html=True)
 
-# Check if we need to process a user message
-if st.session_state.messages and st.session_state.messages[-1]["role"] == "user" and st.session_state.processing:
-    # Get the last user message
-    last_user_message = st.session_state.messages[-1]["content"]
+    if user_input and not st.session_state.processing:
+        # Set processing flag
+        st.session_state.processing = True
 
-    # Reserve a placeholder area for streaming assistant output
-    placeholder = st.empty()
+        # append user message immediately
+        append_message("user", user_input)
 
-    # Run processing (assign tasks to agents and kickoff)
-    try:
-        ai_full_text = process_user_input_and_run(last_user_message)
-    except Exception as e:
-        # If Crew or Task creation throws, show the error but do not crash
-        ai_full_text = f"Error while running agent task: {e}"
+        # Hand the reply to the worker pool; the script thread stays free
+        limit_reply = start_job(user_input)
+        if limit_reply is not None:
+            finish_processing(limit_reply)
 
-    # Stream into the placeholder character-by-character, then finalize
-    streamed = typewriter_stream(ai_full_text, placeholder, delay=0.015)
+        # Full rerun so the chat fragment starts (or stops) polling the job
+        st.rerun()
 
-    # Add assistant final message to history and save
-    st.session_state.messages.append({"role": "assistant", "content": streamed})
-    save_chat()
+    # Show the reply being generated, if any
+    if st.session_state.processing:
+        job = current_job()
+        if job is None:
+            # The job was pruned or belongs to an older server process
+            finish_processing("Sorry, I lost track of that answer. Please ask again.")
+            st.rerun()
+
+        placeholder = st.empty()
+        if st.button("Stop", key=f"stop_{job.id}"):
+            job.cancel()
+
+        while True:
+            restarts, text = job.snapshot()
+            if text:
+                render_live_reply(placeholder, job, restarts, text)
+            else:
+                show_typing_indicator(placeholder)
+            # With fragments, run_every re-runs this block; otherwise wait here
+            if job.finished or chat_fragment is not None:
+                break
+            time.sleep(JOB_POLL_SECONDS)
+
+        if job.finished:
+            finish_processing(job_reply(job))
+            # Full rerun to show the final state and stop polling
+            st.rerun()
 
-    # Increment the chat input key to force a reset
-    st.session_state.chat_input_key += 1
-    st.session_state.processing = False
 
-    # Rerun to show the final state
-    st.rerun()
+if chat_fragment is not None:
+    # Poll the background job only while one is running
+    chat_area = chat_fragment(chat_area, run_every=JOB_POLL_SECONDS if st.session_state.processing else None)
+chat_area()
 
 # -------------------------
 # Footer
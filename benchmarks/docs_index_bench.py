@@ -0,0 +1,124 @@
+"""
+Benchmark: local docs index query latency on a corpus the size of the Python docs.
+
+Writes a synthetic docs snapshot about the size of the plain-text Python
+docs archive plus the PEPs (default: 1,000 files of ~1,500 words, ~1.5M
+words), with a Zipf-shaped vocabulary so common words have long posting
+lists as in real text. Builds the index, then times a cold load and
+``search`` (boosting ``/library/`` links, as the tutor does per skill
+level) for one- to six-word queries, from rare terms to the most common
+ones, plus the worst case: the six most frequent terms together, which
+touch nearly every passage. Finishes with an incremental rebuild after
+touching a few files, and checks that ``get_docs_index`` swaps to the new
+generation and closes the old one. The p95 of every group, the worst case
+included, should stay under 10 ms.
+
+    python benchmarks/docs_index_bench.py [--files 1000] [--words 1500] [--queries 500]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from TeachingDocsIndex import DocsIndex, build_index, get_docs_index  # noqa: E402
+
+TERMS = [
+    "list", "dict", "comprehension", "generator", "decorator", "exception", "iterator", "class", "module",
+    "import", "string", "format", "async", "await", "context", "manager", "lambda", "closure", "slice",
+    "tuple", "set", "typing", "dataclass", "property", "descriptor", "metaclass", "coroutine", "thread",
+]
+
+
+def vocabulary(size, rng):
+    words = TERMS + [f"word{i}" for i in range(size - len(TERMS))]
+    rng.shuffle(words)
+    # Zipf weights: the k-th word is about 1/k as common as the first
+    weights = [1.0 / (k + 1) for k in range(len(words))]
+    return words, weights
+
+
+def write_corpus(docs_dir, files, words_per_file, rng):
+    words, weights = vocabulary(50_000, rng)
+    for i in range(files):
+        body = rng.choices(words, weights, k=words_per_file)
+        paragraphs = [" ".join(body[j:j + 60]) + "." for j in range(0, len(body), 60)]
+        sections = []
+        for j in range(0, len(paragraphs), 6):
+            title = f"Section {j // 6} {rng.choice(TERMS)}"
+            sections.append(f"{title}\n{'=' * len(title)}\n\n" + "\n\n".join(paragraphs[j:j + 6]))
+        path = docs_dir / ("library" if i % 3 else "reference") / f"doc{i}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"Document {i}\n\n" + "\n\n".join(sections), encoding="utf-8")
+    return words
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=1500, help="words per file")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="pythonaut-docs-") as tmp:
+        docs_dir, index_dir = Path(tmp) / "docs", Path(tmp) / "index"
+        words = write_corpus(docs_dir, args.files, args.words, rng)
+
+        start = time.perf_counter()
+        stats = build_index(docs_dir, index_dir)
+        print(f"build: {stats['files']} files, {stats['passages']} passages, {stats['terms']} terms "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        index = get_docs_index(index_dir)
+        print(f"cold load: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        common = TERMS + words[:200]
+        rare = words[5000:]
+        worst_case = " ".join(sorted(index.lexicon, key=lambda term: -index.lexicon[term][1])[:6])
+        latencies = {}
+        groups = (("common terms", lambda: " ".join(rng.choice(common) for _ in range(rng.randint(1, 6)))),
+                  ("rare terms", lambda: " ".join(rng.choice(rare) for _ in range(rng.randint(1, 6)))),
+                  ("mixed", lambda: " ".join(rng.choice(common + rare) for _ in range(rng.randint(1, 6)))),
+                  ("worst case", lambda: worst_case))
+        for label, make_query in groups:
+            times = []
+            for _ in range(args.queries):
+                query = make_query()
+                start = time.perf_counter()
+                index.search(query, limit=5, boost_prefixes=("/library/",))
+                times.append((time.perf_counter() - start) * 1000)
+            latencies[label] = times
+            print(f"{label:<13} p50 {percentile(times, 0.5):6.2f} ms   p95 {percentile(times, 0.95):6.2f} ms   "
+                  f"max {max(times):6.2f} ms")
+
+        for path in sorted(docs_dir.rglob("*.txt"))[:10]:
+            path.write_text(path.read_text(encoding="utf-8") + "\n\nAppended paragraph about generators.\n",
+                            encoding="utf-8")
+        start = time.perf_counter()
+        stats = build_index(docs_dir, index_dir)
+        print(f"rebuild: {stats['reindexed']} files re-read, {stats['reused']} reused "
+              f"in {time.perf_counter() - start:.1f}s")
+        live = get_docs_index(index_dir)
+        print(f"swapped to the new generation: {live is not index and isinstance(live, DocsIndex)}, "
+              f"old index closed: {index.closed}")
+        live.close()
+
+        worst = max(percentile(times, 0.95) for times in latencies.values())
+        print(f"\nhighest p95 {worst:.2f} ms ({'under' if worst < 10 else 'OVER'} the 10 ms target)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark: offline end-to-end latency, CPU and memory per intent, with a fake LLM.
+
+Runs a fixed message per intent through ``TutorRouting.process_user_input``,
+the same path the app's job workers take, with every agent on
+``fake_llm.make_fake_llm``. Nothing touches the network or Streamlit. The
+answer streams into a ``Job`` the way a job worker's does, and a poller
+thread paints it the way app.py's chat area does: every ``--poll`` seconds
+it takes ``job.snapshot()`` and paints the job's ``LiveBubble`` into a
+counting placeholder. The rendering cost is therefore measured at the app's
+own repaint rate, and a render regression fails the baseline check. Needs
+crewai installed.
+
+"overhead" is latency minus the simulated LLM time. It is the part our own
+code controls, and the number to watch for regressions:
+
+    python benchmarks/e2e_bench.py --save bench.json            # record a baseline
+    python benchmarks/e2e_bench.py --baseline bench.json         # exit 1 on a regression
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Isolate the run: no response cache hits, no files, no traces, no real key
+os.environ.setdefault("PYTHONAUT_CACHE_DISABLED", "1")
+os.environ.setdefault("PYTHONAUT_FILE_OUTPUT", "off")
+os.environ.setdefault("PYTHONAUT_TRACE_FILE", "off")
+os.environ.setdefault("PYTHONAUT_DATA_DIR", tempfile.mkdtemp(prefix="pythonaut-bench-"))
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark-dummy-key")
+
+QUERIES = [
+    ("small_talk", "thanks so much!"),
+    ("conversation", "hey, I had a long day at work but I'm excited to code"),
+    ("teaching", "Can you explain how list comprehensions work in Python?"),
+    ("code_review", "Can you review my code?\n```python\nfor i in range(len(items)):\n    print(items[i])\n```"),
+    ("curriculum", "Create a learning path for data science"),
+    ("quiz", "Give me a quiz about dictionaries"),
+    ("coordination", "I'd like to build a small web scraper for my job"),
+    ("multi", "Explain this error and then quiz me on exceptions\n```python\nx = [1]\nprint(x[3])\n```"),
+]
+
+USER_INFO = {"level": "beginner", "goals": "data analysis", "interests": ""}
+HISTORY = [
+    {"role": "assistant", "content": "Hello! I'm Pythonaut, your AI Python tutor."},
+    {"role": "user", "content": "I'm a beginner and I want to get into data analysis."},
+    {"role": "assistant", "content": "# Welcome\n\nGreat goal! We'll start with lists, loops and functions."},
+]
+
+
+class CountingPlaceholder:
+    """Stands in for st.empty(): counts repaints and bytes pushed."""
+
+    def __init__(self):
+        self.repaints = 0
+        self.bytes = 0
+
+    def markdown(self, html, unsafe_allow_html=False):
+        self.repaints += 1
+        self.bytes += len(html)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_once(process_user_input, message, session_id, measure_memory, poll):
+    from TutorJobs import Job
+    from TutorRendering import LiveBubble, message_html
+
+    placeholder = CountingPlaceholder()
+    job = Job(session_id, session_id, timeout=None)
+    bubble = LiveBubble(job.id)
+    render_time = 0.0
+    done = threading.Event()
+
+    def poller():
+        # app.py's chat area: every poll, the bubble (or the typing indicator) is painted again
+        nonlocal render_time
+        while not done.wait(poll):
+            restarts, text = job.snapshot()
+            if text:
+                start = time.perf_counter()
+                bubble.paint(placeholder, restarts, text)
+                render_time += time.perf_counter() - start
+
+    polling = threading.Thread(target=poller, name="bench-poller", daemon=True)
+    polling.start()
+
+    if measure_memory:
+        tracemalloc.start()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        reply = process_user_input(message, USER_INFO, session_id, on_delta=job.emit, history=HISTORY)
+    finally:
+        done.set()
+        polling.join()
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    peak = 0
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    # Final paint of the finished message, bypassing the memo
+    start = time.perf_counter()
+    message_html.__wrapped__("assistant", reply)
+    render_time += time.perf_counter() - start
+    return {"wall": wall, "cpu": cpu, "peak": peak, "render": render_time, "repaints": placeholder.repaints}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per intent (after one warm-up)")
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=150.0)
+    parser.add_argument("--reply-tokens", type=int, default=400)
+    parser.add_argument("--poll", type=float, default=0.5, help="UI poll interval (app.py's JOB_POLL_SECONDS)")
+    parser.add_argument("--intents", nargs="+", help="only these intents")
+    parser.add_argument("--memory", action="store_true", help="track peak Python allocations (slower)")
+    parser.add_argument("--save", help="write results as JSON (a baseline)")
+    parser.add_argument("--baseline", help="compare against a saved baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed overhead/CPU/render growth vs baseline")
+    args = parser.parse_args()
+
+    from fake_llm import make_fake_llm
+    import TutorAgents
+    from TutorRouting import process_user_input
+
+    llm = make_fake_llm(args.ttft, args.tokens_per_second, args.reply_tokens)
+    TutorAgents.set_llm(llm)
+    per_call = args.ttft + args.reply_tokens / args.tokens_per_second
+
+    results = {}
+    print(f"{'intent':<13} | {'p50 ms':>8} | {'p95 ms':>8} | {'overhead':>8} | {'cpu ms':>7} | "
+          f"{'render ms':>9} | {'repaints':>8} | {'llm calls':>9} | {'peak KiB':>8}")
+    print("-" * 104)
+    for intent, message in QUERIES:
+        if args.intents and intent not in args.intents:
+            continue
+        # Warm-up builds the agents and imports crewai; not counted
+        run_once(process_user_input, message, "bench-warmup", False, args.poll)
+        runs = []
+        calls_before = llm.calls
+        for i in range(args.repeat):
+            runs.append(run_once(process_user_input, message, f"bench-{intent}-{i}", args.memory, args.poll))
+        calls = (llm.calls - calls_before) / args.repeat
+        walls = [r["wall"] for r in runs]
+        row = {
+            "p50_ms": percentile(walls, 50) * 1000,
+            "p95_ms": percentile(walls, 95) * 1000,
+            # Fan-out branches overlap, so this can go negative for "multi"; it's still comparable run to run
+            "overhead_ms": (statistics.mean(walls) - calls * per_call) * 1000,
+            "cpu_ms": statistics.mean(r["cpu"] for r in runs) * 1000,
+            "render_ms": statistics.mean(r["render"] for r in runs) * 1000,
+            "repaints": statistics.mean(r["repaints"] for r in runs),
+            "llm_calls": calls,
+            "peak_kib": max(r["peak"] for r in runs) / 1024,
+        }
+        results[intent] = row
+        print(f"{intent:<13} | {row['p50_ms']:>8.1f} | {row['p95_ms']:>8.1f} | {row['overhead_ms']:>8.1f} | "
+              f"{row['cpu_ms']:>7.1f} | {row['render_ms']:>9.2f} | {row['repaints']:>8.1f} | "
+              f"{row['llm_calls']:>9.1f} | {row['peak_kib'] if args.memory else float('nan'):>8.0f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = []
+        for intent, row in results.items():
+            old = baseline.get(intent)
+            if old is None:
+                continue
+            for key in ("overhead_ms", "cpu_ms", "render_ms", "llm_calls"):
+                # Small absolute slack so sub-millisecond noise never fails a deploy
+                slack = {"llm_calls": 0.0, "render_ms": 1.0}.get(key, 5.0)
+                if row[key] > old[key] + abs(old[key]) * args.tolerance + slack:
+                    regressions.append(f"{intent}: {key} {old[key]:.1f} -> {row[key]:.1f}")
+        if regressions:
+            print("\nRegressions vs baseline:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("\nNo regressions vs baseline.")
+
+
+if __name__ == "__main__":
+    main()
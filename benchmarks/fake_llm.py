@@ -0,0 +1,103 @@
+"""
+Deterministic stand-in for the OpenRouter model, for offline benchmarks.
+
+``fake_reply`` builds a reproducible ReAct-style answer ("Thought: ...
+Final Answer: ...") from a hash of the prompt. ``make_fake_llm`` wraps it
+in a CrewAI ``BaseLLM`` that waits ``first_token_latency`` seconds and then
+produces ``reply_tokens`` tokens at ``tokens_per_second``. When streaming,
+it emits them as ``LLMStreamChunkEvent``s the way litellm does, so the
+app's streaming path is exercised too.
+"""
+import hashlib
+import random
+import threading
+import time
+
+WORDS = (
+    "python list loop value function variable return index string object class method dictionary key "
+    "iterate example result error exception module import print range element append data simple step"
+).split()
+
+CODE_SNIPPETS = [
+    "numbers = [1, 2, 3]\nfor n in numbers:\n    print(n * 2)",
+    "def greet(name):\n    return f\"Hello, {name}!\"\n\nprint(greet(\"Ada\"))",
+    "try:\n    value = int(\"42\")\nexcept ValueError as e:\n    print(e)",
+]
+
+# Rough tokens per English word
+TOKENS_PER_WORD = 1.3
+
+
+def fake_reply(prompt, reply_tokens=400):
+    """Deterministic Markdown answer of about ``reply_tokens`` tokens for ``prompt``."""
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+    rng = random.Random(seed)
+    parts = ["# " + " ".join(rng.choice(WORDS) for _ in range(4)).title()]
+    words = 0
+    while words * TOKENS_PER_WORD < reply_tokens:
+        sentence = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+        words += len(sentence)
+        parts.append(" ".join(sentence).capitalize() + ".")
+        if rng.random() < 0.15:
+            parts.append("```python\n" + rng.choice(CODE_SNIPPETS) + "\n```")
+    return "Thought: I now can give a great answer\nFinal Answer: " + "\n\n".join(parts)
+
+
+def iter_chunks(text, chars_per_chunk=16):
+    for i in range(0, len(text), chars_per_chunk):
+        yield text[i:i + chars_per_chunk]
+
+
+def make_fake_llm(first_token_latency=0.3, tokens_per_second=150.0, reply_tokens=400, stream=True):
+    """Build a CrewAI LLM that answers locally with ``fake_reply`` (needs crewai installed)."""
+    try:
+        from crewai import BaseLLM
+    except ImportError:
+        from crewai.llms.base_llm import BaseLLM
+
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        try:
+            from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+        except ImportError:
+            crewai_event_bus = LLMStreamChunkEvent = None
+
+    class FakeLLM(BaseLLM):
+        def __init__(self):
+            super().__init__(model="fake/pythonaut-bench", temperature=0.0)
+            self.stream = stream
+            self.calls = 0
+            self._calls_lock = threading.Lock()
+
+        def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+            with self._calls_lock:
+                self.calls += 1
+            if isinstance(messages, str):
+                prompt = messages
+            else:
+                prompt = "\n".join(str(m.get("content", "")) for m in messages)
+            reply = fake_reply(prompt, reply_tokens)
+            time.sleep(first_token_latency)
+            chunks = list(iter_chunks(reply))
+            # Spread the generation time over the chunks, as a real stream would
+            per_chunk = (reply_tokens / tokens_per_second) / max(1, len(chunks))
+            for chunk in chunks:
+                time.sleep(per_chunk)
+                if self.stream and crewai_event_bus is not None:
+                    try:
+                        crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=chunk))
+                    except Exception:
+                        pass
+            return reply
+
+        def supports_function_calling(self):
+            return False
+
+        def supports_stop_words(self):
+            return False
+
+        def get_context_window_size(self):
+            return 128000
+
+    return FakeLLM()
@@ -0,0 +1,158 @@
+"""
+Local stand-in for OpenRouter's OpenAI-compatible chat completions API.
+
+Answers POST /chat/completions (and /v1/chat/completions) with
+``fake_llm.fake_reply`` after a configurable time to first token and token
+rate, streamed as server-sent events when the request asks for
+``"stream": true``. Point the app at it with
+PYTHONAUT_LLM_BASE_URL=http://127.0.0.1:<port>. ``--max-concurrency``
+answers 429 above a limit, like a provider rate limit.
+
+    python benchmarks/fake_openai_server.py --port 8799 --ttft 0.4 --tokens-per-second 120
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_llm import fake_reply, iter_chunks  # noqa: E402
+
+
+class ServerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def enter(self, limit):
+        with self.lock:
+            if limit and self.in_flight >= limit:
+                self.rejected += 1
+                return False
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        with self.lock:
+            return {"requests": self.requests, "rejected": self.rejected, "in_flight": self.in_flight,
+                    "peak_in_flight": self.peak_in_flight}
+
+    def reset_peak(self):
+        with self.lock:
+            self.peak_in_flight = self.in_flight
+
+
+def make_handler(ttft, tokens_per_second, reply_tokens, max_concurrency, stats):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not stats.enter(max_concurrency):
+                self._json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit", "code": 429}})
+                return
+            try:
+                prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+                reply = fake_reply(prompt, reply_tokens)
+                model = body.get("model", "fake")
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": reply_tokens,
+                         "total_tokens": len(prompt) // 4 + reply_tokens}
+                time.sleep(ttft)
+                if body.get("stream"):
+                    self._stream(reply, model, usage)
+                else:
+                    time.sleep(reply_tokens / tokens_per_second)
+                    self._json(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+                        "model": model, "usage": usage,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": reply}}],
+                    })
+            finally:
+                stats.leave()
+
+        def _stream(self, reply, model, usage):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            chunks = list(iter_chunks(reply))
+            per_chunk = (reply_tokens / tokens_per_second) / max(1, len(chunks))
+            for i, chunk in enumerate(chunks):
+                time.sleep(per_chunk)
+                delta = {"content": chunk}
+                if i == 0:
+                    delta["role"] = "assistant"
+                self._event({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            self._event({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "usage": usage,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _event(self, payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _json(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=0, ttft=0.4, tokens_per_second=120.0, reply_tokens=400, max_concurrency=0):
+    """Start the server on a daemon thread; returns (server, stats). Port 0 picks a free port."""
+    stats = ServerStats()
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 make_handler(ttft, tokens_per_second, reply_tokens, max_concurrency, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--ttft", type=float, default=0.4, help="seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=120.0)
+    parser.add_argument("--reply-tokens", type=int, default=400)
+    parser.add_argument("--max-concurrency", type=int, default=0, help="answer 429 above this many requests (0 = no limit)")
+    args = parser.parse_args()
+
+    server, stats = serve(args.port, args.ttft, args.tokens_per_second, args.reply_tokens, args.max_concurrency)
+    print(f"Fake OpenAI-compatible server on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(stats.snapshot())
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
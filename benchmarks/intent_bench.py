@@ -0,0 +1,145 @@
+"""
+Benchmark: single-pass intent matcher vs the old substring keyword cascade.
+
+The cascade is what ``_route_and_run`` used to do: lowercase the message,
+then ``any(phrase in lower ...)`` over each phrase table in turn, then the
+Python-indicator list and the fallback regexes. The matcher is
+``TutorIntents.INTENT_MATCHER``, one compiled pass that finds every phrase of
+every table with its position, over the prose ``TutorCodeDetect`` leaves once
+the code is taken out, as routing does.
+Both run over the same tables, from one-line chat messages up to large
+pasted code (fenced and unfenced) and prose. The benchmark also lists
+short messages where the two disagree (substring false positives such as
+"hi" in "this").
+
+    python benchmarks/intent_bench.py [--repeat 200]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from TutorCodeDetect import detect_code  # noqa: E402
+from TutorIntents import (  # noqa: E402
+    CODE_REVIEW_PHRASES,
+    CONVERSATIONAL_PHRASES,
+    CURRICULUM_PHRASES,
+    INTENT_MATCHER,
+    QUIZ_PHRASES,
+    TEACHING_PHRASES,
+)
+
+# The old code checks: substring fragments, then looser patterns
+PYTHON_INDICATORS = [
+    "import ", "def ", "class ", "if ", "for ", "while ", "try:", "except:",
+    "print(", "input(", "float(", "int(", "str(", "range(", "len(",
+    " = ", " == ", " != ", " += ", " -= ", " *= ", " /= ",
+    " and ", " or ", " not ", " in ", " is ", " with ", " as ",
+    "from ", "return ", "yield ", "assert ", "raise ", "pass ", "break ", "continue ",
+    "lambda ", "global ", "nonlocal ", "async ", "await ", "del ",
+    "if __name__", "self.", "super(", "init(", "repr("
+]
+PYTHON_PATTERN_RE = re.compile(
+    r'[a-zA-Z_][a-zA-Z0-9_]*\s*='  # variable assignment
+    r'|[a-zA-Z_][a-zA-Z0-9_]*\s*\('  # function call
+    r'|("""|\'\'\'|"|\').*?("""|\'\'\'|"|\')'  # strings
+    r'|#.*'  # comments
+    r'|(if|for|while|def|class|try|except|with)\s+[a-zA-Z_]'  # control flow
+)
+
+CODE_LINES = [
+    "import csv",
+    "",
+    "def load_rows(path):",
+    "    with open(path, newline='') as f:",
+    "        return [row for row in csv.DictReader(f)]",
+    "",
+    "class Report:",
+    "    def __init__(self, rows):",
+    "        self.rows = rows",
+    "    def total(self):",
+    "        return sum(float(r['amount']) for r in self.rows if r['amount'])",
+    "",
+    "for i in range(len(rows)):",
+    "    print(rows[i])",
+]
+PROSE = ("I have been trying to understand this for a while now and I am not sure where the problem comes "
+         "from, my teacher said it should work but it prints the wrong total every single time. ")
+
+INPUTS = {
+    "greeting (3 words)": "hi there friend",
+    "question (12 words)": "Can you explain how list comprehensions work with nested loops in Python?",
+    "code paste (40 lines)": "Why is this wrong?\n```python\n" + "\n".join(CODE_LINES * 3) + "\n```",
+    "code paste (400 lines)": "Why is this wrong?\n```python\n" + "\n".join(CODE_LINES * 30) + "\n```",
+    "unfenced code (400 lines)": "Why is this wrong?\n" + "\n".join(CODE_LINES * 30),
+    "prose (2k words)": PROSE * 50,
+    "prose + code (20 KB)": PROSE * 40 + "\n```python\n" + "\n".join(CODE_LINES * 40) + "\n```",
+}
+
+SAMPLES = [
+    "this is fine",
+    "what does this function do",
+    "can you show me python loops",
+    "I know nothing about classes",
+    "okay book club tonight",
+    "a question on python dictionaries",
+    "explain this",
+    "I appreciate it",
+    "why?\n```python\nif ok:\n    print('bad')\n```",
+]
+
+
+def cascade(text):
+    """The old checks: one substring scan of the message per phrase table, plus the indicator fallbacks."""
+    lower = text.lower().strip()
+    found = set()
+    for intent, phrases in CONVERSATIONAL_PHRASES.items():
+        if any(phrase in lower for phrase in phrases):
+            found.add(intent)
+            break
+    for intent, phrases in (("teaching", TEACHING_PHRASES), ("code_review", CODE_REVIEW_PHRASES),
+                            ("curriculum", CURRICULUM_PHRASES), ("quiz", QUIZ_PHRASES)):
+        if any(phrase in lower for phrase in phrases):
+            found.add(intent)
+    if any(indicator in text for indicator in PYTHON_INDICATORS) or re.search(PYTHON_PATTERN_RE.pattern, text):
+        found.add("python")
+    return found
+
+
+def matcher(text):
+    detection = detect_code(text)
+    found = INTENT_MATCHER.intents(detection.prose)
+    conversational = next((intent for intent in CONVERSATIONAL_PHRASES if intent in found), None)
+    intents = {intent for intent in found if intent not in CONVERSATIONAL_PHRASES and intent != "question"}
+    if conversational:
+        intents.add(conversational)
+    if detection.spans:
+        intents.add("python")
+    return intents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="calls per input and implementation")
+    args = parser.parse_args()
+
+    print(f"{'input':<26} | {'chars':>7} | {'cascade us':>10} | {'matcher us':>10} | {'speedup':>7}")
+    print("-" * 73)
+    for label, text in INPUTS.items():
+        old = min(timeit.repeat(lambda: cascade(text), number=args.repeat, repeat=3)) / args.repeat * 1e6
+        new = min(timeit.repeat(lambda: matcher(text), number=args.repeat, repeat=3)) / args.repeat * 1e6
+        print(f"{label:<26} | {len(text):>7} | {old:>10.1f} | {new:>10.1f} | {old / new:>6.1f}x")
+
+    print("\nWhere they disagree:")
+    for text in SAMPLES:
+        old, new = cascade(text), matcher(text)
+        if old != new:
+            print(f"  {text!r:<38} cascade {sorted(old)}  matcher {sorted(new)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Evaluate the local intent classifier: accuracy, confusion matrix, latency.
+
+Scores ``TutorClassifier`` on the held-out rows of the labeled set (the ones
+``is_heldout`` keeps out of training) next to the keyword cascade
+(``TutorRouting.rule_intent``) on the same rows. Also reports how many
+messages fall below the confidence threshold (and so go to the
+coordinator) and the per-message prediction latency. "As routed" is
+``TutorRouting.pick_intent``, which also sends a message of nothing but
+code to code review; a few unfenced pastes check that separately.
+
+    python TutorClassifier.py train
+    python benchmarks/intent_eval.py [--data data/intents.jsonl] [--model data/intent_model.json] [--all]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from TutorClassifier import (  # noqa: E402
+    DEFAULT_DATA_PATH,
+    DEFAULT_MIN_CONFIDENCE,
+    DEFAULT_MODEL_PATH,
+    IntentClassifier,
+    is_heldout,
+    load_rows,
+)
+from TutorCodeDetect import detect_code  # noqa: E402
+from TutorRouting import pick_intent, rule_intent  # noqa: E402
+
+# Code pasted without a fence or a question: the student wants it reviewed
+UNFENCED_PASTES = [
+    "x = [1,2,3]\nfor i in x:\nprint(i)",
+    "def add(a, b):\n    return a + b\nprint(add(1, 2))",
+    "import os\nfiles = os.listdir('.')\nprint(files)",
+    "while True:\n    n = int(input())\n    if n == 0:\n        break",
+    "print(len(names)",
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def confusion(labels, pairs):
+    """Print a confusion matrix (rows: expected, columns: predicted)."""
+    width = max(len(label) for label in labels) + 1
+    print(" " * width + "".join(f"{label:>{width}}" for label in labels))
+    for expected in labels:
+        counts = [sum(1 for e, p in pairs if e == expected and p == predicted) for predicted in labels]
+        print(f"{expected:<{width}}" + "".join(f"{n:>{width}}" for n in counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=str(DEFAULT_DATA_PATH))
+    parser.add_argument("--model", default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE)
+    parser.add_argument("--all", action="store_true", help="score every row, not only the held-out ones")
+    parser.add_argument("--repeat", type=int, default=20, help="timed predictions per message")
+    args = parser.parse_args()
+
+    model = IntentClassifier.load(args.model, args.min_confidence)
+    rows = [row for row in load_rows(args.data) if args.all or is_heldout(row[0])]
+    labels = model.labels
+
+    predicted, latencies, rules = [], [], []
+    for text, expected in rows:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            intent, confidence = model.predict(text)
+        latencies.append((time.perf_counter() - start) / args.repeat * 1000)
+        routed = pick_intent(text, detect_code(text), model)
+        predicted.append((expected, intent, routed, confidence))
+        rules.append((expected, rule_intent(text)))
+
+    n = len(rows)
+    top1 = sum(1 for e, p, _, _ in predicted if e == p) / n
+    routed_ok = sum(1 for e, _, r, _ in predicted if e == r) / n
+    fallbacks = sum(1 for _, _, _, c in predicted if c < model.min_confidence)
+    rule_ok = sum(1 for e, p in rules if e == p) / n
+
+    print(f"{n} messages ({'all rows' if args.all else 'held out'}), threshold {model.min_confidence}")
+    print(f"  classifier top-1 accuracy   {top1:6.1%}")
+    print(f"  as routed (low -> coord.)   {routed_ok:6.1%}   ({fallbacks} below threshold)")
+    print(f"  keyword cascade             {rule_ok:6.1%}")
+    print(f"  latency per message         p50 {percentile(latencies, 0.5):.3f} ms   "
+          f"p95 {percentile(latencies, 0.95):.3f} ms   max {max(latencies):.3f} ms")
+
+    print("\nClassifier, as routed:")
+    confusion(labels, [(e, r) for e, _, r, _ in predicted])
+    print("\nKeyword cascade:")
+    confusion(labels, rules)
+
+    pastes = [(model.predict(text)[0], pick_intent(text, detect_code(text), model)) for text in UNFENCED_PASTES]
+    print(f"\nUnfenced pastes to code_review: {sum(r == 'code_review' for _, r in pastes)}/{len(pastes)} as routed, "
+          f"{sum(p == 'code_review' for p, _ in pastes)}/{len(pastes)} by the model alone")
+    for text, (intent, routed) in zip(UNFENCED_PASTES, pastes):
+        if routed != "code_review":
+            print(f"  {text.splitlines()[0][:56]!r:<60} -> {routed} (model: {intent})")
+
+    print("\nMisrouted by the classifier:")
+    for (text, _), (expected, intent, routed, confidence) in zip(rows, predicted):
+        if routed != expected:
+            print(f"  {text.splitlines()[0][:56]!r:<60} {expected} -> {routed} (model: {intent} {confidence:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Load test: N concurrent student sessions against a local fake OpenRouter server.
+
+Each simulated session picks a message from a weighted mix (greetings,
+lessons, code reviews, quizzes), sends it the way app.py does (journal the
+message, submit ``process_user_input`` to the shared ``TutorJobs`` queue,
+wait for the job), journals the reply, then "thinks" for a random while.
+The model calls go over HTTP to ``fake_openai_server`` through the real
+shared ``LLM`` (via PYTHONAUT_LLM_BASE_URL), so the client, job pool,
+coalescing, LLM pool and artifact writer are all the production code.
+Needs crewai installed.
+
+Sessions are swept over several levels, reporting throughput and
+p50/p95/p99 latency per level. A background sampler records how full each
+shared resource is, and the first level where throughput stops scaling is
+blamed on whichever one saturated: the job pool (queue wait), the LLM pool
+(calls waiting for a slot), the artifact writer (pending journal writes),
+the shared LLM client (jobs running but no request reaching the server), or
+our own CPU time.
+
+    python benchmarks/load_test.py --sessions 1 4 16 32 --duration 30 --workers 8
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# (kind, weight, messages)
+MIX = [
+    ("greeting", 0.3, [
+        "hi!",
+        "thanks so much!",
+        "hello, I'm back for another session",
+        "hey, I had a long day at work but I'm excited to code",
+    ]),
+    ("lesson", 0.3, [
+        "Can you explain how list comprehensions work in Python?",
+        "Teach me about dictionaries and when to use them",
+        "What is the difference between a tuple and a list?",
+        "Explain how for loops work with range",
+        "How do I handle exceptions with try and except?",
+    ]),
+    ("code_review", 0.2, [
+        "Can you review my code?\n```python\nfor i in range(len(items)):\n    print(items[i])\n```",
+        "Please check this code, what's wrong with it?\n```python\ndef add(a, b):\n    result = a + b\n    print(result)\n```",
+        "Can you review my code? It feels slow\n```python\nnums = []\nfor n in range(10):\n    if n % 2 == 0:\n        nums.append(n)\n```",
+    ]),
+    ("quiz", 0.2, [
+        "Give me a quiz about dictionaries",
+        "Quiz me on loops",
+        "Test my knowledge of functions",
+    ]),
+]
+
+USER_INFO = {"level": "beginner", "goals": "data analysis", "interests": ""}
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def pick(rng):
+    kinds = [kind for kind, _, _ in MIX]
+    kind = rng.choices(kinds, weights=[weight for _, weight, _ in MIX])[0]
+    messages = next(messages for name, _, messages in MIX if name == kind)
+    return kind, rng.choice(messages)
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []
+
+    def add(self, **sample):
+        with self.lock:
+            self.samples.append(sample)
+
+
+class Sampler:
+    """Polls the shared resources while a level runs and keeps their peaks and means."""
+
+    def __init__(self, job_queue, store, server_stats, interval=0.1):
+        self.job_queue = job_queue
+        self.store = store
+        self.server_stats = server_stats
+        self.interval = interval
+        self.readings = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        from TutorCoalescing import inflight_generations
+        from TutorJobs import QUEUED, RUNNING
+        from TutorLLM import get_llm_pool
+
+        while not self._stop.wait(self.interval):
+            jobs = self.job_queue.stats()
+            self.readings.append({
+                "queued": jobs[QUEUED],
+                "running": jobs[RUNNING],
+                "pending_writes": self.store.stats()["pending_writes"],
+                "coalesced_waiting": inflight_generations.stats()["waiting"],
+                "llm_pool_waiting": get_llm_pool().stats()["waiting"],
+                "llm_in_flight": self.server_stats.snapshot()["in_flight"] if self.server_stats else None,
+            })
+
+    def peak(self, key):
+        values = [r[key] for r in self.readings if r[key] is not None]
+        return max(values) if values else None
+
+    def mean(self, key):
+        values = [r[key] for r in self.readings if r[key] is not None]
+        return statistics.mean(values) if values else None
+
+
+def run_session(index, deadline, args, job_queue, store, recorder):
+    from TutorJobs import DONE, JobLimitError
+    from TutorRouting import process_user_input
+
+    rng = random.Random(args.seed * 100003 + index)
+    session_id = f"load-{index}-{uuid.uuid4().hex[:8]}"
+    messages = []
+    previous_reply = None
+    # Stagger the first message so the sessions don't all start in lockstep
+    time.sleep(rng.uniform(0, args.think))
+    while time.monotonic() < deadline:
+        kind, text = pick(rng)
+        message = {"role": "user", "content": text}
+        messages.append(message)
+        store.append_message(session_id, message, messages)
+        history = list(messages[:-1])
+
+        def work(job, text=text, history=history, previous_reply=previous_reply):
+            return process_user_input(text, USER_INFO, session_id, previous_reply,
+                                      on_delta=job.emit, history=history)
+
+        try:
+            job = job_queue.submit(session_id, work)
+        except JobLimitError:
+            recorder.add(kind=kind, status="rejected")
+            continue
+        first_text = None
+        while not job.finished:
+            if first_text is None and job.text:
+                first_text = time.monotonic() - job.submitted_at
+            time.sleep(args.poll)
+        status = job.status
+        recorder.add(
+            kind=kind,
+            status=status,
+            latency=job.finished_at - job.submitted_at,
+            first_text=first_text,
+            queue_wait=(job.started_at or job.finished_at) - job.submitted_at,
+        )
+        reply = job.result if status == DONE and job.result else job.text or "(no reply)"
+        message = {"role": "assistant", "content": reply}
+        messages.append(message)
+        store.append_message(session_id, message, messages)
+        previous_reply = reply
+        time.sleep(rng.expovariate(1 / args.think) if args.think > 0 else 0)
+
+
+def run_level(sessions, args, job_queue, store, server_stats):
+    recorder = Recorder()
+    if server_stats:
+        server_stats.reset_peak()
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=run_session, args=(i, deadline, args, job_queue, store, recorder),
+                                name=f"load-session-{i}", daemon=True)
+               for i in range(sessions)]
+    wall = time.monotonic()
+    cpu = time.process_time()
+    with Sampler(job_queue, store, server_stats) as sampler:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    wall = time.monotonic() - wall
+    cpu = time.process_time() - cpu
+    store.flush()
+
+    from TutorJobs import DONE
+
+    samples = recorder.samples
+    done = [s for s in samples if s["status"] == DONE]
+    latencies = [s["latency"] for s in done]
+    return {
+        "sessions": sessions,
+        "requests": len(samples),
+        "ok": len(done),
+        "errors": len(samples) - len(done),
+        "throughput": len(done) / wall,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "first_text_p50_s": percentile([s["first_text"] for s in done if s["first_text"] is not None], 50),
+        "queue_wait_p95_s": percentile([s["queue_wait"] for s in done], 95),
+        "cpu": cpu / wall,
+        "running_mean": sampler.mean("running"),
+        "queued_peak": sampler.peak("queued"),
+        "pending_writes_peak": sampler.peak("pending_writes"),
+        "coalesced_waiting_peak": sampler.peak("coalesced_waiting"),
+        "llm_pool_waiting_peak": sampler.peak("llm_pool_waiting"),
+        "llm_in_flight_mean": sampler.mean("llm_in_flight"),
+        "llm_in_flight_peak": server_stats.snapshot()["peak_in_flight"] if server_stats else None,
+        "by_kind": {
+            kind: {
+                "requests": sum(1 for s in samples if s["kind"] == kind),
+                "p50_s": percentile([s["latency"] for s in done if s["kind"] == kind], 50),
+                "p95_s": percentile([s["latency"] for s in done if s["kind"] == kind], 95),
+            }
+            for kind, _, _ in MIX
+        },
+    }
+
+
+def diagnose(rows, workers, efficiency):
+    """Find the first level whose throughput gain is below ``efficiency`` of linear, and name the likely cause."""
+    for prev, row in zip(rows, rows[1:]):
+        if not prev["throughput"]:
+            continue
+        ideal = row["sessions"] / prev["sessions"] - 1
+        gain = row["throughput"] / prev["throughput"] - 1
+        if gain >= ideal * efficiency:
+            continue
+        causes = []
+        if row["queue_wait_p95_s"] > 0.25 * row["p50_s"]:
+            causes.append(f"job pool: all {workers} workers busy, jobs wait {row['queue_wait_p95_s']:.2f}s (p95) "
+                          "before starting (PYTHONAUT_JOB_WORKERS)")
+        if (row["llm_pool_waiting_peak"] or 0) > 0:
+            causes.append(f"LLM pool: up to {row['llm_pool_waiting_peak']} model calls waiting for a slot "
+                          "(PYTHONAUT_LLM_MAX_CONCURRENCY)")
+        if (row["pending_writes_peak"] or 0) > row["sessions"]:
+            causes.append(f"artifact writer: {row['pending_writes_peak']} journal/report writes queued "
+                          "behind the single writer thread")
+        if (row["llm_in_flight_mean"] is not None and row["running_mean"]
+                and row["llm_in_flight_mean"] < 0.5 * row["running_mean"]):
+            causes.append(f"shared LLM client: {row['running_mean']:.1f} jobs running on average but only "
+                          f"{row['llm_in_flight_mean']:.1f} model requests in flight")
+        if row["cpu"] > 0.85:
+            causes.append(f"CPU/GIL: the process used {row['cpu']:.0%} of a core (prompt building, parsing, "
+                          "streaming callbacks)")
+        if not causes:
+            causes.append("no shared resource looks saturated; the model server itself is the limit")
+        return prev["sessions"], row["sessions"], causes
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 32], help="concurrency levels to sweep")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per level")
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds between a reply and the next message")
+    parser.add_argument("--workers", type=int, default=8, help="job pool size (PYTHONAUT_JOB_WORKERS)")
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="LLM pool size (PYTHONAUT_LLM_MAX_CONCURRENCY)")
+    parser.add_argument("--poll", type=float, default=0.05, help="seconds between job status polls")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--server", help="use an already running fake server at this base URL instead of starting one")
+    parser.add_argument("--ttft", type=float, default=0.4, help="fake server seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=120.0)
+    parser.add_argument("--reply-tokens", type=int, default=300)
+    parser.add_argument("--max-concurrency", type=int, default=0, help="fake server answers 429 above this (0 = no limit)")
+    parser.add_argument("--cache", action="store_true", help="leave the response cache on (off by default)")
+    parser.add_argument("--file-output", default="on", choices=("on", "history", "off"), help="PYTHONAUT_FILE_OUTPUT")
+    parser.add_argument("--efficiency", type=float, default=0.5, help="scaling below this fraction of linear is a knee")
+    parser.add_argument("--json", help="write the raw numbers to this file")
+    args = parser.parse_args()
+
+    server_stats = None
+    if args.server:
+        base_url = args.server
+    else:
+        from fake_openai_server import serve
+
+        server, server_stats = serve(0, args.ttft, args.tokens_per_second, args.reply_tokens, args.max_concurrency)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Configure the app before its modules read the environment
+    os.environ["PYTHONAUT_LLM_BASE_URL"] = base_url
+    os.environ["PYTHONAUT_JOB_WORKERS"] = str(args.workers)
+    os.environ["PYTHONAUT_LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["PYTHONAUT_FILE_OUTPUT"] = args.file_output
+    if not args.cache:
+        os.environ["PYTHONAUT_CACHE_DISABLED"] = "1"
+    os.environ.setdefault("PYTHONAUT_TRACE_FILE", "off")
+    os.environ.setdefault("PYTHONAUT_DATA_DIR", tempfile.mkdtemp(prefix="pythonaut-load-"))
+    os.environ.setdefault("OPENROUTER_API_KEY", "load-test-dummy-key")
+
+    from TutorJobs import get_job_queue
+    from TutorStorage import get_artifact_store
+
+    job_queue = get_job_queue()
+    store = get_artifact_store()
+    print(f"Model server {base_url}, {args.workers} job workers, {args.llm_concurrency} LLM slots, "
+          f"{args.duration:.0f}s per level, "
+          f"think {args.think:.1f}s, file output {args.file_output}")
+
+    header = (f"{'sessions':>8} | {'req':>5} | {'err':>4} | {'req/s':>6} | {'p50 s':>6} | {'p95 s':>6} | "
+              f"{'p99 s':>6} | {'1st txt':>7} | {'q wait':>6} | {'llm q':>5} | {'llm in':>6} | {'writes':>6} | {'cpu':>5}")
+    print(header)
+    print("-" * len(header))
+    rows = []
+    for sessions in args.sessions:
+        row = run_level(sessions, args, job_queue, store, server_stats)
+        rows.append(row)
+        llm_peak = "-" if row["llm_in_flight_peak"] is None else str(row["llm_in_flight_peak"])
+        print(f"{sessions:>8} | {row['requests']:>5} | {row['errors']:>4} | {row['throughput']:>6.2f} | "
+              f"{row['p50_s']:>6.2f} | {row['p95_s']:>6.2f} | {row['p99_s']:>6.2f} | "
+              f"{row['first_text_p50_s']:>7.2f} | {row['queue_wait_p95_s']:>6.2f} | {row['llm_pool_waiting_peak'] or 0:>5} | "
+              f"{llm_peak:>6} | "
+              f"{row['pending_writes_peak'] or 0:>6} | {row['cpu']:>5.0%}")
+
+    last = rows[-1]
+    print(f"\nBy kind at {last['sessions']} sessions:")
+    for kind, numbers in last["by_kind"].items():
+        print(f"  {kind:<12} {numbers['requests']:>5} req   p50 {numbers['p50_s']:.2f}s   p95 {numbers['p95_s']:.2f}s")
+
+    knee = diagnose(rows, args.workers, args.efficiency)
+    if knee is None:
+        print("\nThroughput scaled across every level; try more sessions to find the limit.")
+    else:
+        before, after, causes = knee
+        print(f"\nThroughput stops scaling between {before} and {after} sessions. Likely bottleneck:")
+        for cause in causes:
+            print("  - " + cause)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "levels": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
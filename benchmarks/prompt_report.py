@@ -0,0 +1,124 @@
+"""
+Report: prompt size (and optionally latency) of the full vs compact prompt profiles.
+
+Every query in a fixed set is rendered under both profiles (see
+PYTHONAUT_PROMPT_PROFILE) and its tokens are counted: the agent's
+role/goal/backstory, which is sent as the system prompt on every call, plus
+the task description and expected output. With ``--live`` each query is
+also run against the configured LLM under both profiles, and the report adds
+wall-clock latency and the token usage the provider reported.
+
+    python benchmarks/prompt_report.py [--live] [--repeat 3] [--json report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from TutorAgents import agent_config  # noqa: E402
+from TutorContext import count_tokens  # noqa: E402
+
+PROFILES = ("full", "compact")
+SAMPLE_CONTEXT = (
+    "Recent messages:\n"
+    "student: I'm a beginner, I want to get into data analysis.\n"
+    "tutor: Great! Let's start with the basics of lists and loops."
+)
+
+# (label, agent, task factory name, factory arguments)
+QUERIES = [
+    ("teach variables", "teaching_expert", "teaching_task", dict(topic="What are variables in Python?", skill_level="beginner")),
+    ("teach decorators", "teaching_expert", "teaching_task",
+     dict(topic="Explain decorators with arguments", skill_level="intermediate", context=SAMPLE_CONTEXT)),
+    ("review loop", "code_reviewer", "code_review_task",
+     dict(code_snippet="nums = [1, 2, 3]\nfor i in range(len(nums) + 1):\n    print(nums[i])", skill_level="beginner")),
+    ("plan data science", "curriculum_planner", "curriculum_task",
+     dict(student_goals="data analysis", current_level="beginner", time_availability="5 hours a week")),
+    ("quiz exceptions", "quiz_master", "quiz_task", dict(topic="exceptions", skill_level="beginner")),
+    ("coordinate", "project_coordinator", "coordination_task",
+     dict(context=[SAMPLE_CONTEXT], student_query="What should I do after lists?", student_level="beginner",
+          student_goals="data analysis")),
+    ("chat", "conversation_agent", "conversation_task", dict(user_input="that was fun, what now?", context=SAMPLE_CONTEXT)),
+]
+
+
+def render(agent_name, factory_name, kwargs, profile):
+    import TutorTasks
+
+    task = getattr(TutorTasks, factory_name)(profile=profile, **kwargs)
+    config = agent_config(agent_name, profile)
+    desc, expected = TutorTasks.task_to_strings(task)
+    system = count_tokens(f"{config['role']}\n{config['goal']}\n{config['backstory']}")
+    return task, system, count_tokens(desc) + count_tokens(expected)
+
+
+def run_live(agent_name, task, profile):
+    """Run one task against the real LLM; returns (seconds, prompt_tokens, completion_tokens)."""
+    from crewai import Crew, Process, Task
+    from TutorAgents import build_agent
+    from TutorTasks import task_to_strings
+
+    agent = build_agent(agent_name, profile)
+    desc, expected = task_to_strings(task)
+    assigned = Task(description=desc, expected_output=expected or task.expected_output, agent=agent, config={})
+    crew = Crew(agents=[agent], tasks=[assigned], process=Process.sequential, verbose=False)
+    start = time.perf_counter()
+    result = crew.kickoff()
+    elapsed = time.perf_counter() - start
+    usage = getattr(result, "token_usage", None)
+    return elapsed, getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--live", action="store_true", help="also call the LLM and time each query")
+    parser.add_argument("--repeat", type=int, default=1, help="live runs per query and profile")
+    parser.add_argument("--json", help="write the raw numbers to this file")
+    args = parser.parse_args()
+
+    rows = []
+    for label, agent_name, factory_name, kwargs in QUERIES:
+        row = {"query": label, "agent": agent_name}
+        for profile in PROFILES:
+            task, system, task_tokens = render(agent_name, factory_name, kwargs, profile)
+            row[profile] = {"system_tokens": system, "task_tokens": task_tokens, "prompt_tokens": system + task_tokens}
+            if args.live:
+                runs = [run_live(agent_name, task, profile) for _ in range(args.repeat)]
+                row[profile].update(
+                    latency_s=statistics.median(r[0] for r in runs),
+                    provider_prompt_tokens=statistics.median(r[1] for r in runs),
+                    completion_tokens=statistics.median(r[2] for r in runs),
+                )
+        rows.append(row)
+
+    header = f"{'query':<18} | {'full tok':>8} | {'compact tok':>11} | {'saved':>6}"
+    if args.live:
+        header += f" | {'full s':>7} | {'compact s':>9} | {'full out':>8} | {'compact out':>11}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        full, compact = row["full"], row["compact"]
+        saved = 1 - compact["prompt_tokens"] / full["prompt_tokens"]
+        line = f"{row['query']:<18} | {full['prompt_tokens']:>8} | {compact['prompt_tokens']:>11} | {saved:>6.0%}"
+        if args.live:
+            line += (f" | {full['latency_s']:>7.2f} | {compact['latency_s']:>9.2f}"
+                     f" | {full['completion_tokens']:>8.0f} | {compact['completion_tokens']:>11.0f}")
+        print(line)
+
+    total_full = sum(row["full"]["prompt_tokens"] for row in rows)
+    total_compact = sum(row["compact"]["prompt_tokens"] for row in rows)
+    print("-" * len(header))
+    print(f"{'total':<18} | {total_full:>8} | {total_compact:>11} | {1 - total_compact / total_full:>6.0%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: streaming render cost vs. reply length.
+
+Compares the old per-character typewriter (re-format the whole prefix and
+push it to the browser on every character) with IncrementalRenderer fed
+character by character. Sleeps are left out; only CPU time and the number of
+bytes that would be sent through placeholder.markdown are measured.
+
+    python benchmarks/render_bench.py [--lengths 1000 2000 4000 8000] [--legacy-max 8000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TutorRendering import IncrementalRenderer, ai_bubble_html, format_code_blocks  # noqa: E402
+
+SAMPLE = (
+    "A list comprehension builds a new list from an iterable in one expression.\n\n"
+    "```python\nsquares = [n * n for n in range(10)]\nprint(squares)\n```\n\n"
+    "You can also filter items with an `if` clause, which keeps only the values you want. "
+)
+
+
+def make_reply(length):
+    return (SAMPLE * (length // len(SAMPLE) + 1))[:length]
+
+
+def legacy_render(text):
+    sent = 0
+    out = ""
+    for ch in text:
+        out += ch
+        sent += len(ai_bubble_html(format_code_blocks(out)))
+    return sent, len(text)
+
+
+def incremental_render(text):
+    renderer = IncrementalRenderer()
+    sent = 0
+    for ch in text:
+        if renderer.feed(ch):
+            sent += len(renderer.html())
+    sent += len(renderer.html())
+    return sent, renderer.repaints
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    sent, paints = fn(text)
+    return time.perf_counter() - start, sent, paints
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000])
+    parser.add_argument("--legacy-max", type=int, default=8000,
+                        help="skip the quadratic legacy renderer above this length")
+    args = parser.parse_args()
+
+    print(f"{'chars':>7} | {'renderer':<11} | {'ms':>9} | {'us/char':>8} | {'paints':>6} | {'KB sent':>9}")
+    print("-" * 66)
+    for length in args.lengths:
+        text = make_reply(length)
+        rows = [("incremental", incremental_render)]
+        if length <= args.legacy_max:
+            rows.insert(0, ("typewriter", legacy_render))
+        for name, fn in rows:
+            elapsed, sent, paints = timed(fn, text)
+            print(f"{length:>7} | {name:<11} | {elapsed * 1000:>9.2f} | "
+                  f"{elapsed * 1e6 / length:>8.2f} | {paints:>6} | {sent / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: near-duplicate lookup latency as the semantic index grows.
+
+Fills a SemanticIndex with synthetic tutoring queries (1k .. 100k) and times
+paraphrased lookups. Per-lookup cost should stay roughly flat because only
+the posting lists of the query's rarest terms are scored.
+
+    python benchmarks/semantic_bench.py [--sizes 1000 10000 100000] [--lookups 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TutorSemanticIndex import SemanticIndex  # noqa: E402
+
+CONCEPTS = [
+    "decorators", "generators", "list comprehensions", "dictionaries", "closures", "context managers",
+    "exceptions", "classes", "inheritance", "recursion", "lambda functions", "f-strings", "sets",
+    "tuples", "modules", "packages", "virtual environments", "async await", "threads", "iterators",
+    "type hints", "dataclasses", "file handling", "regular expressions", "unit testing", "slicing",
+]
+TEMPLATES = ["what are python {c}", "explain {c} in python", "how do {c} work",
+             "teach me about {c}", "{c} with examples", "when should i use {c}"]
+
+
+def synthetic_queries(n, rng):
+    # Suffix tokens make most entries distinct, like a real long tail of questions
+    vocab = [f"topic{i}" for i in range(max(1, n // 4))]
+    for i in range(n):
+        concept = rng.choice(CONCEPTS)
+        yield i, rng.choice(TEMPLATES).format(c=concept) + " " + rng.choice(vocab)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} | {'build s':>8} | {'us/lookup':>9} | {'hit rate':>8}")
+    print("-" * 44)
+    for size in args.sizes:
+        rng = random.Random(size)
+        index = SemanticIndex()
+        queries = list(synthetic_queries(size, rng))
+        start = time.perf_counter()
+        for doc_id, text in queries:
+            index.add(doc_id, "teacher|beginner", text)
+        build = time.perf_counter() - start
+
+        probes = [rng.choice(queries)[1] for _ in range(args.lookups)]
+        # Paraphrase: swap the template but keep the content words
+        probes = [p.replace("what are python", "explain").replace("teach me about", "python") for p in probes]
+        hits = 0
+        start = time.perf_counter()
+        for probe in probes:
+            if index.search("teacher|beginner", probe) is not None:
+                hits += 1
+        per_lookup = (time.perf_counter() - start) / len(probes)
+        print(f"{size:>8} | {build:>8.2f} | {per_lookup * 1e6:>9.1f} | {hits / len(probes):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: cold-start cost per module and per agent.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` so the
+numbers reflect a cold container, not this process's import cache. If crewai
+is installed, the shared LLM and each agent are then built through the lazy
+registry and timed individually (a dummy OPENROUTER_API_KEY is used when none
+is set; nothing is sent over the network).
+
+    python benchmarks/startup_bench.py [--modules TutorAgents TutorTasks ...] [--no-agents]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_MODULES = [
+    # App modules: these should stay cheap, they are on the first-paint path
+    "TutorRendering", "TutorStreaming", "TutorStorage", "TutorCache", "TutorCoalescing",
+    "TutorAgents", "TeachingDocsIndex",
+    # Deferred until the first request
+    "TutorTasks", "TeachingTools",
+    # Third-party heavyweights, for reference
+    "streamlit", "crewai", "litellm", "langchain_community",
+]
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$")
+
+
+def cold_import(module):
+    """Return (cumulative_us, wall_s) for importing ``module`` in a fresh interpreter, or None."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        return None
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME.search(line)
+        if match and match.group(3).strip() == module:
+            cumulative = int(match.group(2))
+    return cumulative, wall
+
+
+def time_agents():
+    os.environ.setdefault("OPENROUTER_API_KEY", "benchmark-dummy-key")
+    import TutorAgents
+
+    rows = []
+    start = time.perf_counter()
+    TutorAgents.get_llm()
+    rows.append(("llm", time.perf_counter() - start))
+    for name in TutorAgents.AGENT_NAMES:
+        start = time.perf_counter()
+        TutorAgents.get_agent(name)
+        rows.append((name, time.perf_counter() - start))
+    start = time.perf_counter()
+    TutorAgents.get_agent(TutorAgents.AGENT_NAMES[0])
+    rows.append(("cached lookup", time.perf_counter() - start))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--no-agents", action="store_true", help="skip agent construction timing")
+    args = parser.parse_args()
+
+    print(f"{'module':<22} | {'import ms':>9} | {'process ms':>10}")
+    print("-" * 48)
+    for module in args.modules:
+        result = cold_import(module)
+        if result is None:
+            print(f"{module:<22} | {'not importable here':>22}")
+            continue
+        cumulative, wall = result
+        print(f"{module:<22} | {cumulative / 1000:>9.1f} | {wall * 1000:>10.1f}")
+
+    if args.no_agents:
+        return
+    print()
+    try:
+        rows = time_agents()
+    except ImportError as e:
+        print(f"Agent construction skipped: {e}")
+        return
+    print(f"{'agent':<22} | {'build ms':>9}")
+    print("-" * 35)
+    for name, elapsed in rows:
+        print(f"{name:<22} | {elapsed * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: cost of persisting one chat message as the history grows.
+
+Compares the old save_chat (rewrite chat_history.json with indent=2 and push
+the whole history to local storage) with ChatJournal.append plus the paged
+LocalStorageSync. Reports the mean cost of the writes in each window of
+history sizes up to 1,000 messages; the journal should stay flat.
+
+    python benchmarks/storage_bench.py [--messages 1000] [--window 100]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TutorStorage import ChatJournal, LocalStorageSync  # noqa: E402
+
+
+class FakeLocalStorage:
+    """Counts the bytes that would be sent to the browser."""
+
+    def __init__(self):
+        self.bytes_sent = 0
+
+    def setItem(self, item_key, item_value, key=None):
+        self.bytes_sent += len(item_key) + len(item_value)
+
+
+def make_message(i):
+    role = "user" if i % 2 == 0 else "assistant"
+    body = "explain list comprehensions please" if role == "user" else (
+        "A list comprehension builds a list in one expression. " * 25)
+    return {"role": role, "content": f"{i}: {body}"}
+
+
+def legacy_save(path, messages, local):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(messages, f, indent=2, ensure_ascii=False)
+    local.setItem("pythonaut_chat_history", json.dumps(messages))
+
+
+def run(n, window, workdir):
+    legacy_path = os.path.join(workdir, "chat_history.json")
+    journal = ChatJournal(os.path.join(workdir, "chat_history.jsonl"))
+    legacy_local = FakeLocalStorage()
+    paged_local = FakeLocalStorage()
+    sync = LocalStorageSync(paged_local)
+
+    legacy_messages, journal_messages = [], []
+    rows = []
+    legacy_t = journal_t = 0.0
+    legacy_b = journal_b = 0
+    for i in range(n):
+        message = make_message(i)
+
+        legacy_messages.append(message)
+        before = legacy_local.bytes_sent
+        start = time.perf_counter()
+        legacy_save(legacy_path, legacy_messages, legacy_local)
+        legacy_t += time.perf_counter() - start
+        legacy_b += legacy_local.bytes_sent - before
+
+        journal_messages.append(message)
+        before = paged_local.bytes_sent
+        start = time.perf_counter()
+        journal.append(message, journal_messages)
+        sync.append(journal_messages)
+        journal_t += time.perf_counter() - start
+        journal_b += paged_local.bytes_sent - before
+
+        if (i + 1) % window == 0:
+            rows.append((i + 1, legacy_t / window, journal_t / window, legacy_b / window, journal_b / window))
+            legacy_t = journal_t = 0.0
+            legacy_b = journal_b = 0
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--window", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rows = run(args.messages, args.window, workdir)
+    print(f"{'history':>7} | {'save_chat ms':>12} | {'journal ms':>10} | {'save_chat KB':>12} | {'journal KB':>10}")
+    print("-" * 64)
+    for size, legacy_t, journal_t, legacy_b, journal_b in rows:
+        print(f"{size:>7} | {legacy_t * 1000:>12.3f} | {journal_t * 1000:>10.3f} | "
+              f"{legacy_b / 1024:>12.1f} | {journal_b / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
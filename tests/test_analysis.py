@@ -0,0 +1,52 @@
+"""Mechanical syntax fixes must only ever add what is missing, never move code into a string."""
+import ast
+
+import pytest
+
+from TutorAnalysis import analyze_code
+
+
+def string_values(source):
+    return [node.value for node in ast.walk(ast.parse(source))
+            if isinstance(node, ast.Constant) and isinstance(node.value, str)]
+
+
+@pytest.mark.parametrize("code, contents", [
+    ('print("hello)', ["hello"]),
+    ("print('a', 'b)", ["a", "b"]),
+    ('x = "abc', ["abc"]),
+    ('foo(bar["key])', ["key"]),
+    ("d = {'a': [1, 'x]}", ["a", "x"]),
+    ('print("hi)  # greet', ["hi"]),
+])
+def test_unterminated_string_fix_keeps_the_string_contents(code, contents):
+    analysis = analyze_code(code)
+
+    assert analysis.trivial
+    assert sorted(string_values(analysis.fixed_code)) == sorted(contents)
+
+
+@pytest.mark.parametrize("code, fixed", [
+    ('print(len(x)\n', 'print(len(x))'),
+    ('print("a",\n      "b"\nx = 1\n', 'print("a",\n      "b")\nx = 1'),
+    ('def f():\n    y = foo(1,\n        2\n    return y\n', 'def f():\n    y = foo(1,\n        2)\n    return y'),
+])
+def test_unclosed_bracket_closes_after_its_last_line(code, fixed):
+    analysis = analyze_code(code)
+
+    assert analysis.trivial
+    assert analysis.fixed_code == fixed
+
+
+def test_unclosed_bracket_with_missing_arguments_is_left_to_the_model():
+    analysis = analyze_code('print("a",\nx = 1\n')
+
+    assert not analysis.trivial
+    assert analysis.fixed_code is None
+
+
+def test_missing_colon_is_fixed_without_the_model():
+    analysis = analyze_code("def f(x)\n    return x\n")
+
+    assert analysis.trivial
+    assert analysis.fixed_code == "def f(x):\n    return x"
@@ -0,0 +1,71 @@
+"""ResponseCache: keys, expiry, LRU trimming and persistence."""
+import pytest
+
+import TutorCache
+from TutorCache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(TutorCache, "time", clock)
+    return clock
+
+
+def test_trivial_topic_variants_share_an_entry(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    cache.put("teaching_expert", "List Comprehensions?", "Beginner", "lesson")
+
+    assert cache.get("teaching_expert", "list   comprehensions", "beginner") == "lesson"
+    assert cache.get("teaching_expert", "list comprehensions", "advanced") is None
+    assert cache.get("quiz_master", "list comprehensions", "beginner") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl=60)
+    cache.put("teaching_expert", "loops", "beginner", "lesson")
+
+    clock.now += 61
+
+    assert cache.get("teaching_expert", "loops", "beginner") is None
+    assert cache.evictions == 1
+
+
+def test_least_recently_used_entry_is_trimmed_first(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_entries=2)
+    for topic in ("loops", "sets"):
+        cache.put("teaching_expert", topic, "beginner", f"{topic} lesson")
+        clock.now += 1
+    cache.get("teaching_expert", "loops", "beginner")
+    clock.now += 1
+
+    cache.put("teaching_expert", "tuples", "beginner", "tuples lesson")
+
+    assert cache.get("teaching_expert", "sets", "beginner") is None
+    assert cache.get("teaching_expert", "loops", "beginner") == "loops lesson"
+    assert cache.get("teaching_expert", "tuples", "beginner") == "tuples lesson"
+
+
+def test_entries_survive_a_restart(tmp_path):
+    ResponseCache(tmp_path / "cache.sqlite3").put(
+        "teaching_expert", "decorators", "beginner", "lesson", query="what are python decorators")
+    reopened = ResponseCache(tmp_path / "cache.sqlite3")
+
+    assert reopened.get("teaching_expert", "decorators", "beginner") == "lesson"
+    assert reopened.get_similar("teaching_expert", "explain decorators in python", "beginner") == "lesson"
+
+
+def test_blank_responses_are_not_stored(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    cache.put("teaching_expert", "loops", "beginner", "   ")
+
+    assert cache.get("teaching_expert", "loops", "beginner") is None
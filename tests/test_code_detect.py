@@ -0,0 +1,46 @@
+"""detect_code: which lines of a student message are Python code."""
+import pytest
+
+from TutorCodeDetect import detect_code
+
+
+@pytest.mark.parametrize("text", [
+    "how do I reverse a list in python?",
+    "I think for loops are great: they make it easy.",
+    "Can you import this idea into my plan? Thanks.",
+    "what does this do",
+])
+def test_prose_with_python_words_is_prose(text):
+    detection = detect_code(text)
+
+    assert detection.kind == "prose"
+    assert detection.spans == [] and detection.prose == text
+
+
+@pytest.mark.parametrize("text", [
+    "def f(x):\n    return x * 2",
+    "x = [1,2,3]\nfor i in x:\nprint(i)",
+    ">>> nums = [3, 1, 2]\n>>> sorted(nums)",
+])
+def test_code_alone_is_code(text):
+    detection = detect_code(text)
+
+    assert detection.kind == "code"
+    assert len(detection.spans) == 1 and detection.prose == ""
+
+
+def test_question_with_unfenced_code_is_mixed():
+    detection = detect_code("Why does this fail?\n\nfor i in range(3)\n    print(i)")
+
+    assert detection.kind == "mixed"
+    assert detection.prose == "Why does this fail?"
+    assert detection.code == "for i in range(3)\n    print(i)"
+    assert (detection.spans[0].start, detection.spans[0].end, detection.spans[0].fenced) == (3, 4, False)
+
+
+def test_fenced_block_is_code_whatever_it_holds():
+    detection = detect_code("is this right?\n```python\nthis is not python\n```")
+
+    assert detection.kind == "mixed"
+    assert detection.code == "this is not python" and detection.spans[0].fenced
+    assert detection.prose == "is this right?"
@@ -0,0 +1,18 @@
+"""A message of nothing but pasted code goes to code review, whatever the classifier makes of it."""
+import pytest
+
+from TutorClassifier import get_intent_classifier
+from TutorCodeDetect import detect_code
+from TutorRouting import pick_intent
+
+
+@pytest.mark.parametrize("classifier", [get_intent_classifier(), None], ids=["classifier", "rules"])
+@pytest.mark.parametrize("text", ["x = [1,2,3]\nfor i in x:\nprint(i)", "print(len(names)"])
+def test_unfenced_paste_is_a_code_review(classifier, text):
+    assert pick_intent(text, detect_code(text), classifier) == "code_review"
+
+
+def test_prose_still_goes_to_the_classifier():
+    text = "thanks, that was really helpful!"
+
+    assert pick_intent(text, detect_code(text), get_intent_classifier()) == "conversation"
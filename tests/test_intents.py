@@ -0,0 +1,46 @@
+"""PhraseMatcher: phrases match whole words only, in one pass, with every phrase reported."""
+import re
+
+import pytest
+
+from TutorIntents import INTENT_MATCHER, PhraseMatcher
+
+CODE_BLOCK = re.compile(r"```.*?```", re.DOTALL)
+
+
+@pytest.fixture
+def matcher():
+    return PhraseMatcher({
+        "greeting": ["hi", "hello"],
+        "teaching": ["explain", "what is"],
+        "question": ["?"],
+        "gratitude": ["thank", "thank you"],
+    })
+
+
+def found(matcher, text, skip=None):
+    return [(match.intent, match.phrase) for match in matcher.scan(text, skip)]
+
+
+@pytest.mark.parametrize("text", ["this is history", "unexplained", "what isn't it", "chi"])
+def test_phrases_inside_other_words_do_not_match(matcher, text):
+    assert found(matcher, text) == []
+
+
+def test_whole_words_match_in_any_case(matcher):
+    assert found(matcher, "Hi there, EXPLAIN this?") == [
+        ("greeting", "hi"), ("teaching", "explain"), ("question", "?")]
+
+
+def test_shorter_phrases_inside_a_longer_one_are_reported(matcher):
+    assert found(matcher, "thank you so much") == [("gratitude", "thank you"), ("gratitude", "thank")]
+
+
+def test_skipped_regions_are_not_scanned(matcher):
+    assert found(matcher, "say hi\n```\nhi = explain()\n```\n", CODE_BLOCK) == [("greeting", "hi")]
+
+
+def test_intent_tables_match_whole_words():
+    assert "greeting" not in INTENT_MATCHER.intents("this is about history")
+    assert "greeting" in INTENT_MATCHER.intents("hi!")
+    assert "disagreement" not in INTENT_MATCHER.intents("know your notation")
@@ -0,0 +1,99 @@
+"""JobQueue: per-owner limits, cancellation and timeouts, as the app relies on them."""
+import threading
+import time
+
+import pytest
+
+from TutorJobs import CANCELLED, DONE, FAILED, TIMED_OUT, JobLimitError, JobQueue
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def blocked(release, started=None):
+    def fn(job):
+        if started is not None:
+            started.set()
+        release.wait(5)
+        job.emit("late text")
+        return "late result"
+    return fn
+
+
+def wait_for(job):
+    job._future.result(timeout=5)
+
+
+def test_owner_limit_rejects_a_second_active_job(release):
+    queue = JobQueue(max_workers=4, per_owner_limit=1)
+    queue.submit("alice", blocked(release))
+
+    with pytest.raises(JobLimitError):
+        queue.submit("alice", lambda job: "again")
+    other = queue.submit("bob", lambda job: "bob's answer")
+    wait_for(other)
+
+    assert other.status == DONE and other.result == "bob's answer"
+    assert queue.stats()["rejected"] == 1
+
+
+def test_finished_and_cancelled_jobs_free_the_owner_slot(release):
+    queue = JobQueue(max_workers=2, per_owner_limit=1)
+    done = queue.submit("alice", lambda job: "first")
+    wait_for(done)
+    running = queue.submit("alice", blocked(release))
+
+    assert running.cancel()
+    assert queue.submit("alice", lambda job: "third")
+
+
+def test_cancelled_queued_job_never_starts(release):
+    queue = JobQueue(max_workers=1, per_owner_limit=2)
+    started = threading.Event()
+    queue.submit("alice", blocked(release, started))
+    assert started.wait(5)
+    ran = []
+    queued = queue.submit("alice", lambda job: ran.append(1))
+
+    assert queued.cancel()
+    release.set()
+    time.sleep(0.05)
+
+    assert queued.status == CANCELLED and ran == []
+    assert not queued.cancel()
+
+
+def test_cancelled_running_job_drops_its_result(release):
+    queue = JobQueue(max_workers=1)
+    started = threading.Event()
+    job = queue.submit("alice", blocked(release, started))
+    assert started.wait(5)
+
+    job.cancel()
+    release.set()
+    wait_for(job)
+
+    assert job.status == CANCELLED
+    assert job.result is None and job.text == ""
+
+
+def test_job_times_out_while_running(release):
+    queue = JobQueue(max_workers=1, timeout=0.05)
+    job = queue.submit("alice", blocked(release))
+    time.sleep(0.1)
+
+    assert job.status == TIMED_OUT and job.finished
+    # The owner can ask again while the abandoned call finishes in the background
+    assert queue.submit("alice", lambda job: "retry")
+
+
+def test_error_fails_the_job():
+    queue = JobQueue(max_workers=1)
+    job = queue.submit("alice", lambda job: 1 / 0)
+    wait_for(job)
+
+    assert job.status == FAILED and isinstance(job.error, ZeroDivisionError)
@@ -0,0 +1,38 @@
+"""The pool's gauges and slots must stay right when waiting for a slot is interrupted."""
+import pytest
+
+from TutorLLM import LLMPool
+
+
+class Interrupted(BaseException):
+    pass
+
+
+class InterruptedSemaphore:
+    def acquire(self):
+        raise Interrupted()
+
+    def release(self):
+        raise AssertionError("released a slot that was never acquired")
+
+
+def test_interrupted_acquire_leaves_the_gauges_alone():
+    pool = LLMPool(max_concurrency=1)
+    pool._global = InterruptedSemaphore()
+
+    with pytest.raises(Interrupted):
+        with pool.slot("model"):
+            pass
+
+    assert (pool.in_flight, pool.waiting) == (0, 0)
+    # The model slot taken before the interruption was given back
+    assert pool._model_semaphore("model").acquire(blocking=False)
+
+
+def test_slot_counts_the_call_in_flight():
+    pool = LLMPool(max_concurrency=1)
+
+    with pool.slot("model"):
+        assert (pool.in_flight, pool.waiting) == (1, 0)
+        assert not pool._global.acquire(blocking=False)
+    assert pool.in_flight == 0
@@ -0,0 +1,18 @@
+"""Agents with different stop words must get their own routed LLM instead of sharing and changing one."""
+from TutorLLM import ModelRouter
+
+
+class FakeLLM:
+    def __init__(self, model, max_tokens, stop):
+        self.model, self.max_tokens, self.stop = model, max_tokens, stop
+
+
+def test_stop_words_are_part_of_the_llm_key():
+    router = ModelRouter({"*": {"*": {"models": ["m"]}}}, FakeLLM)
+    react = router.llm("m", 100, ["\nObservation:"])
+    other = router.llm("m", 100, ["\nResult:"])
+
+    assert react is not other
+    assert react.stop == ["\nObservation:"] and other.stop == ["\nResult:"]
+    assert router.llm("m", 100, ("\nObservation:",)) is react
+    assert router.llm("m", 100).stop is None
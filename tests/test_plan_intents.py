@@ -0,0 +1,35 @@
+"""plan_intents: which messages fan out to several specialists, and the clause each one gets."""
+import pytest
+
+from TutorRouting import plan_intents
+
+
+@pytest.mark.parametrize("message, plan", [
+    ("explain decorators and then quiz me on closures",
+     [("teaching", "explain decorators"), ("quiz", "quiz me on closures")]),
+    ("quiz me on sets, then explain tuples",
+     [("quiz", "quiz me on sets"), ("teaching", "explain tuples")]),
+    ("explain generators. quiz me on generators too",
+     [("teaching", "explain generators"), ("quiz", "quiz me on generators too")]),
+    ("explain decorators and quiz me on them",
+     [("teaching", "explain decorators"), ("quiz", "quiz me on them")]),
+])
+def test_clauses_are_split_in_the_order_asked(message, plan):
+    assert plan_intents(message) == plan
+
+
+@pytest.mark.parametrize("message", [
+    # "and" inside one request is not a second request
+    "explain lists and dicts",
+    "teach me loops",
+    # A review needs code to review
+    "review my code and explain classes",
+])
+def test_single_requests_are_not_fanned_out(message):
+    assert plan_intents(message) == []
+
+
+def test_code_is_left_out_of_the_clauses():
+    message = "what is wrong with this code and quiz me on loops\n```\nfor i in range(3) print(i)\n```"
+
+    assert plan_intents(message) == [("code_review", "what is wrong with this code"), ("quiz", "quiz me on loops")]
@@ -0,0 +1,74 @@
+"""The shared response cache must never hand one session's context-dependent reply to another."""
+import sys
+import types
+
+import pytest
+
+import TutorCache
+import TutorRouting
+
+
+@pytest.fixture
+def routing(monkeypatch, tmp_path):
+    cache = TutorCache.ResponseCache(path=tmp_path / "cache.sqlite3")
+    calls = []
+
+    def run_agent_task(agent, base_task, session_id=None, on_delta=None):
+        calls.append(base_task.context)
+        return f"answer {len(calls)} for: {base_task.context}"
+
+    def task(*args, context="", **kwargs):
+        return types.SimpleNamespace(context=context)
+
+    # Stand-ins for the crewai task factories: the test is about what reaches the cache
+    fake_tasks = types.ModuleType("TutorTasks")
+    for name in ("teaching_task", "code_review_task", "curriculum_task", "quiz_task",
+                 "coordination_task", "conversation_task"):
+        setattr(fake_tasks, name, task)
+    monkeypatch.setitem(sys.modules, "TutorTasks", fake_tasks)
+    monkeypatch.setenv("PYTHONAUT_TRACE_FILE", str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(TutorRouting, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(TutorRouting, "get_intent_classifier", lambda: None)
+    monkeypatch.setattr(TutorRouting, "rule_intent", lambda *args: "teaching")
+    monkeypatch.setattr(TutorRouting, "get_agent", lambda name: types.SimpleNamespace(role=name))
+    monkeypatch.setattr(TutorRouting, "run_agent_task", run_agent_task)
+    return calls
+
+
+def ask(message, session_id, history=None):
+    return TutorRouting.process_user_input(message, {"level": "beginner"}, session_id, history=history)
+
+
+def test_sessions_with_different_histories_get_their_own_answers(routing):
+    message = "explain that example again but simpler"
+    decorators = [{"role": "user", "content": "show me a decorator"},
+                  {"role": "assistant", "content": "@timer wraps a function..."}]
+    loops = [{"role": "user", "content": "how do for loops work"},
+             {"role": "assistant", "content": "for item in items: ..."}]
+
+    first = ask(message, "session-a", decorators)
+    second = ask(message, "session-b", loops)
+
+    assert len(routing) == 2
+    assert "decorator" in first and "decorator" not in second
+    assert "for loops" in second
+
+
+def test_context_free_requests_are_still_cached(routing):
+    first = ask("explain list comprehensions to me", "session-a")
+    second = ask("explain list comprehensions to me", "session-b")
+
+    assert first == second
+    assert len(routing) == 1
+
+
+def test_first_question_after_the_greeting_is_cached(routing):
+    # The app's history for a first question: just its greeting (messages[:-1])
+    greeting = [{"role": "assistant", "content": "Hello! I'm Pythonaut, your AI Python tutor. "
+                                                 "Tell me about your current experience with Python."}]
+
+    first = ask("explain list comprehensions to me", "session-a", greeting)
+    second = ask("explain list comprehensions to me", "session-b", greeting)
+
+    assert first == second
+    assert routing == [""]
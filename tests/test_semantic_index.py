@@ -0,0 +1,25 @@
+"""Questions about different Python keywords are different topics, however alike the rest of the wording."""
+import pytest
+
+from TutorSemanticIndex import SemanticIndex
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("explain the with statement", "explain the if statement"),
+    ("explain the and operator", "explain the or operator"),
+    ("explain the and operator", "explain the in operator"),
+    ("explain for loops", "explain while loops"),
+])
+def test_keyword_questions_do_not_match_each_other(cached, asked):
+    index = SemanticIndex()
+    index.add(1, "teacher|beginner", cached)
+
+    assert index.search("teacher|beginner", asked) is None
+    assert index.search("teacher|beginner", cached) == (1, pytest.approx(1.0))
+
+
+def test_keywords_used_as_words_are_still_ignored():
+    index = SemanticIndex()
+    index.add(1, "teacher|beginner", "what are python decorators")
+
+    assert index.search("teacher|beginner", "explain decorators in python") is not None
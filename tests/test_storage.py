@@ -0,0 +1,34 @@
+"""A journal opened without load() must still compact once enough of its file is dead records."""
+from TutorStorage import ChatJournal
+
+
+def message(i):
+    return {"role": "user", "content": f"message {i}"}
+
+
+def lines(path):
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+def test_reopened_journal_compacts(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    journal = ChatJournal(path, compact_every=5)
+    for i in range(4):
+        journal.append(message(i))
+    journal.clear()
+
+    # A new journal object for the same file, with the history taken from elsewhere
+    reopened = ChatJournal(path, compact_every=5)
+    reopened.append(message(4), messages=[message(4)])
+
+    assert len(lines(path)) == 1
+    assert reopened.load() == [message(4)]
+
+
+def test_journal_below_the_threshold_only_appends(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    ChatJournal(path, compact_every=5).append(message(0))
+
+    ChatJournal(path, compact_every=5).append(message(1), messages=[message(0), message(1)])
+
+    assert len(lines(path)) == 2
@@ -0,0 +1,47 @@
+"""A retried streaming call must replace what the failed attempt showed, not repeat it."""
+import threading
+
+from TutorJobs import Job
+from TutorLLM import LLMPool
+from TutorStreaming import _sinks_lock, _thread_sinks, stream_answer
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+def flaky_llm(failures):
+    """Streams "Hello there, student" to this thread's sink, failing mid-answer ``failures`` times."""
+    attempts = []
+
+    def call():
+        with _sinks_lock:
+            sink = _thread_sinks[threading.get_ident()]
+        attempts.append(1)
+        for chunk in ("Hello ", "there, ", "student"):
+            sink(chunk)
+            if len(attempts) <= failures and chunk == "there, ":
+                raise ServiceUnavailable("try again")
+        return "Hello there, student"
+
+    return call
+
+
+def test_retry_after_streamed_chunks_restarts_the_answer():
+    job = Job("job", "owner", timeout=None)
+    pool = LLMPool(retries=2, backoff_base=0.001)
+
+    stream_answer(lambda: pool.call("model", flaky_llm(failures=1)), job.emit)
+
+    restarts, text = job.snapshot()
+    assert text == "Hello there, student"
+    assert restarts == 1
+
+
+def test_call_without_retry_is_not_restarted():
+    job = Job("job", "owner", timeout=None)
+    pool = LLMPool(retries=2, backoff_base=0.001)
+
+    stream_answer(lambda: pool.call("model", flaky_llm(failures=0)), job.emit)
+
+    assert job.snapshot() == (0, "Hello there, student")
@@ -0,0 +1,55 @@
+"""The web search must say why it has no results: a failed search is not a timeout."""
+import sys
+import types
+
+import pytest
+
+
+@pytest.fixture
+def tools(monkeypatch, tmp_path):
+    # crewai isn't needed to run the search itself; its tool decorator is the identity here
+    crewai = types.ModuleType("crewai")
+    crewai_tools = types.ModuleType("crewai.tools")
+    crewai_tools.tool = lambda name: (lambda fn: fn)
+    monkeypatch.setitem(sys.modules, "crewai", crewai)
+    monkeypatch.setitem(sys.modules, "crewai.tools", crewai_tools)
+    monkeypatch.delitem(sys.modules, "TeachingTools", raising=False)
+    monkeypatch.setenv("PYTHONAUT_TRACE_FILE", str(tmp_path / "traces.jsonl"))
+    import TeachingTools
+
+    # Forget this import afterwards, so other tests don't see a TeachingTools built on the fakes
+    monkeypatch.setitem(sys.modules, "TeachingTools", TeachingTools)
+    monkeypatch.setattr(TeachingTools, "SEARCH_BACKEND", "duckduckgo")
+    monkeypatch.setattr(TeachingTools, "DUCKDUCKGO_AVAILABLE", True)
+    return TeachingTools
+
+
+def search(tools, monkeypatch, primary, fallback):
+    def raw_search(query):
+        outcome = fallback if query.startswith("Python programming") else primary
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(tools, "_raw_search", raw_search)
+    return tools._search("decorators", "beginner", types.SimpleNamespace(set=lambda **attrs: None))
+
+
+def test_failed_primary_and_empty_fallback_is_a_search_error(tools, monkeypatch):
+    result = search(tools, monkeypatch, ConnectionError("rate limited"), [])
+
+    assert result.startswith("Search error: rate limited")
+
+
+def test_empty_results_are_not_called_a_timeout(tools, monkeypatch):
+    result = search(tools, monkeypatch, [], "No results found.")
+
+    assert result.startswith("No search results.")
+    assert "within" not in result
+
+
+def test_fallback_results_are_used_when_the_primary_fails(tools, monkeypatch):
+    result = search(tools, monkeypatch, ConnectionError("rate limited"),
+                    [{"title": "Decorators", "link": "https://docs.python.org/", "snippet": "wrap functions"}])
+
+    assert "Decorators" in result